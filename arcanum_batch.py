@@ -0,0 +1,121 @@
+"""
+Batched, side-effect-free legality checks for candidate actions.
+
+Search code can filter hundreds of candidate moves or attacks in one vectorized
+pass instead of calling move_unit_streamlit / attack_unit_streamlit one at a
+time (which mutate the game and write Portuguese errors to the event log).
+The masks apply exactly the same rules as those functions.
+
+Requires NumPy, which the rules engine itself does not import.
+"""
+import numpy as np
+
+import arcanum_engine as engine
+
+DISTANCE_TABLE_MAX_CELLS = 4096 # Acima disto a tabela N x N ficaria demasiado grande; usa coordenadas axiais
+DISTANCE_TABLE_CACHE = {} # (colunas, linhas) -> tabela de distâncias, partilhada pelo processo
+
+
+def get_board_axial():
+    """Axial (q, r) arrays indexed by engine cell ID."""
+    return np.array(engine.CELL_AXIAL_Q, dtype=np.int64), np.array(engine.CELL_ROW, dtype=np.int64)
+
+
+def get_distance_table():
+    """Full cell-to-cell distance table for the current board, or None if the board is too large."""
+    key = (len(engine.BOARD_COLS), len(engine.BOARD_ROWS))
+    if key[0] * key[1] > DISTANCE_TABLE_MAX_CELLS:
+        return None
+    if key not in DISTANCE_TABLE_CACHE:
+        q, r = get_board_axial()
+        dq = q[:, None] - q[None, :]
+        dr = r[:, None] - r[None, :]
+        DISTANCE_TABLE_CACHE[key] = ((np.abs(dq) + np.abs(dr) + np.abs(dq + dr)) // 2).astype(np.int16)
+    return DISTANCE_TABLE_CACHE[key]
+
+
+class BatchSnapshot:
+    """
+    Array view of the bound game state: one slot per unit with its cell, player,
+    MV, AP, range and attack, plus an occupancy array per cell.
+    Build it once per position and reuse it for every batch checked against that position.
+    """
+
+    def __init__(self):
+        state = engine.state
+        self.current_player = state.current_turn
+        self.num_cells = engine.NUM_CELLS
+
+        self.unit_ids = list(state.units)
+        self.slot_of = {uid: slot for slot, uid in enumerate(self.unit_ids)}
+        units = [state.units[uid] for uid in self.unit_ids]
+        self.cell = np.array([u['cell'] for u in units], dtype=np.int64)
+        self.player = np.array([u['player'] for u in units], dtype=np.int8)
+        self.mv = np.array([u['mv_remaining'] for u in units], dtype=np.int16)
+        self.ap = np.array([u['ap_remaining'] for u in units], dtype=np.int16)
+        self.range = np.array([u['range'] for u in units], dtype=np.int16)
+        self.is_core = np.array([u['type'] == 'Arcane Core' for u in units], dtype=bool)
+
+        self.occupant = np.full(self.num_cells, -1, dtype=np.int64)
+        self.occupant[self.cell] = np.arange(len(units))
+
+        self.distance_table = get_distance_table()
+        if self.distance_table is None:
+            self.axial_q, self.axial_r = get_board_axial()
+
+    def encode_units(self, unit_ids):
+        return np.array([self.slot_of.get(uid, -1) for uid in unit_ids], dtype=np.int64)
+
+    def encode_cells(self, cells):
+        return np.asarray(cells, dtype=np.int64)
+
+    def distances(self, from_cells, to_cells):
+        if self.distance_table is not None:
+            return self.distance_table[from_cells, to_cells]
+        dq = self.axial_q[from_cells] - self.axial_q[to_cells]
+        dr = self.axial_r[from_cells] - self.axial_r[to_cells]
+        return (np.abs(dq) + np.abs(dr) + np.abs(dq + dr)) // 2
+
+
+def legal_moves_mask(unit_ids, target_cells, snapshot=None):
+    """
+    Boolean mask over candidate moves (unit_ids[i] -> target_cells[i]), with the same rules as
+    move_unit_streamlit. target_cells are engine cell IDs (a sequence or an array).
+    """
+    snapshot = snapshot or BatchSnapshot()
+    slots = snapshot.encode_units(unit_ids)
+    targets = snapshot.encode_cells(target_cells)
+    if len(snapshot.unit_ids) == 0: # Sem unidades não há movimentos (e os arrays por unidade estão vazios)
+        return np.zeros(len(slots), dtype=bool)
+
+    legal = (slots >= 0) & (targets >= 0) & (targets < snapshot.num_cells)
+    s = np.where(legal, slots, 0)
+    t = np.where(legal, targets, 0)
+
+    legal &= snapshot.player[s] == snapshot.current_player
+    legal &= ~snapshot.is_core[s]
+    legal &= snapshot.mv[s] > 0
+    legal &= snapshot.occupant[t] < 0
+    legal &= snapshot.distances(snapshot.cell[s], t) <= snapshot.mv[s]
+    return legal
+
+
+def legal_attacks_mask(attacker_ids, target_ids, snapshot=None):
+    """Boolean mask over candidate attacks (attacker_ids[i] -> target_ids[i]), as attack_unit_streamlit."""
+    snapshot = snapshot or BatchSnapshot()
+    attackers = snapshot.encode_units(attacker_ids)
+    targets = snapshot.encode_units(target_ids)
+    if len(snapshot.unit_ids) == 0:
+        return np.zeros(len(attackers), dtype=bool)
+
+    legal = (attackers >= 0) & (targets >= 0)
+    a = np.where(legal, attackers, 0)
+    t = np.where(legal, targets, 0)
+
+    legal &= snapshot.player[a] == snapshot.current_player
+    legal &= ~snapshot.is_core[a]
+    legal &= snapshot.player[t] != snapshot.current_player
+    legal &= a != t
+    legal &= snapshot.ap[a] > 0
+    legal &= snapshot.distances(snapshot.cell[a], snapshot.cell[t]) <= snapshot.range[a]
+    return legal
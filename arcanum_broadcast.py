@@ -0,0 +1,167 @@
+"""
+Spectator broadcast: one immutable frame per game state change, shared by every viewer.
+
+A broadcast game is published with publish(game_id, snapshot), where snapshot is
+the last entry of its history (record_history snapshots are never mutated, so
+they can be read from any thread). The frame is built once per new snapshot:
+the board cell labels and help texts (format_board_cells, the same formatting
+the player's board uses), the board as one HTML table and the event log as one
+string. Publishing the same snapshot again is a no-op, but counts as activity:
+a broadcast not published for BROADCAST_TTL_SECONDS (the player closed the tab)
+is dropped. Versions come from one process-wide counter, so a game published
+again after unpublish or eviction never reuses a version a viewer has seen.
+
+Frames live in a process-wide cache shared by all Streamlit sessions. Viewers
+poll get_frame(game_id) or block in wait_for_frame(game_id, after_version) until
+a newer version is published, and draw the prebuilt strings, so a viewer never
+runs game logic or formats the board: 1,000 spectators cost one frame per change
+plus 1,000 dictionary lookups.
+
+Standard library only.
+"""
+import collections
+import html
+import itertools
+import threading
+import time
+
+import arcanum_engine as engine
+
+UNIT_SYMBOLS = {'Arcane Core': 'N', 'Sentinela Arcana': 'S', 'Guardião': 'G', 'Brutamontes': 'T',
+                'Batedor': 'B', 'Adeptus': 'A'} # Restantes tipos: primeira letra
+ZONE_SYMBOLS = {1: "🔵", 2: "🟠", None: "🟪"}
+ZONE_HELP = {1: " (Zona Mística - Controlada pelo Jogador 1)", 2: " (Zona Mística - Controlada pelo Jogador 2)",
+             None: " (Zona Mística - Contestada/Livre)"}
+
+BROADCAST_TTL_SECONDS = 1800 # Transmissões sem publish() há mais do que isto são descartadas (como os jogos ativos nas métricas)
+
+Frame = collections.namedtuple('Frame', [
+    'game_id', 'version', 'published_at', 'turn_number', 'current_turn', 'game_over', 'game_message',
+    'cells',       # tuplo de linhas (de cima para baixo), cada uma um tuplo de (rótulo, ajuda) por coluna
+    'board_html',  # tabuleiro completo numa tabela HTML
+    'event_log',   # log de eventos, mais recentes primeiro, numa só string
+])
+
+FRAMES = {} # id do jogo -> último Frame publicado
+FRAME_SOURCES = {} # id do jogo -> snapshot a partir do qual o frame foi construído
+LAST_PUBLISHED = {} # id do jogo -> último publish() (time.monotonic)
+FRAME_VERSIONS = itertools.count(1) # Versões crescentes em todo o processo
+FRAME_CONDITION = threading.Condition() # Acorda os subscritores quando há um frame novo
+BROADCAST_STATS = {'published': 0, 'frames_built': 0}
+
+
+# --- FORMATAÇÃO DO TABULEIRO ---
+
+def format_board_cells(units, mystic_zone_control):
+    """(label, help text) of every hex, indexed by cell ID, without selection or last-action highlights."""
+    cells = [(label, f"Coordenadas: {label}") for label in map(engine.coord_label, range(engine.NUM_CELLS))]
+
+    for zone_coords in engine.MYSTIC_ZONES:
+        controller = mystic_zone_control.get(zone_coords)
+        label, help_text = cells[zone_coords]
+        cells[zone_coords] = (ZONE_SYMBOLS[controller], help_text + ZONE_HELP[controller])
+
+    for uid, unit in units.items():
+        pos = unit['cell']
+        symbol = UNIT_SYMBOLS.get(unit['type'], unit['type'][0])
+        unit_label = f"{unit['player']}{symbol}({unit['hp']})"
+        label, help_text = cells[pos]
+        if pos in engine.MYSTIC_ZONES:
+            cells[pos] = (label + unit_label, help_text)
+        else:
+            cells[pos] = (unit_label, help_text + (
+                f"\nUnidade: {unit['type']} (ID: {uid})"
+                f"\nHP: {unit['hp']}/{unit['max_hp']}"
+                f"\nMV: {unit['mv_remaining']}/{unit['max_mv']}"
+                f"\nAP: {unit['ap_remaining']}"
+            ))
+    return cells
+
+def board_html(rows):
+    header = ''.join(f"<th>{html.escape(col_char)}</th>" for col_char in engine.BOARD_COLS)
+    body = ''.join(
+        f"<tr><th>{row}</th>"
+        + ''.join(f'<td title="{html.escape(help_text)}">{html.escape(label)}</td>' for label, help_text in cells)
+        + "</tr>"
+        for row, cells in zip(reversed(engine.BOARD_ROWS), rows)
+    )
+    return f'<table class="arcanum-board"><tr><th></th>{header}</tr>{body}</table>'
+
+def build_frame(game_id, version, snapshot):
+    units = {uid: unit for bucket in snapshot['unit_buckets'] for uid, unit in bucket.items()}
+    cells = format_board_cells(units, snapshot['mystic_zone_control'])
+    num_cols = len(engine.BOARD_COLS)
+    rows = tuple(tuple(cells[(row - 1) * num_cols:row * num_cols]) for row in reversed(engine.BOARD_ROWS))
+    BROADCAST_STATS['frames_built'] += 1
+    return Frame(
+        game_id=game_id,
+        version=version,
+        published_at=time.time(),
+        turn_number=snapshot['turn_number'],
+        current_turn=snapshot['current_turn'],
+        game_over=snapshot['game_over'],
+        game_message=snapshot['game_message'],
+        cells=rows,
+        board_html=board_html(rows),
+        event_log='\n'.join(reversed(snapshot['event_log'])),
+    )
+
+
+# --- PUBLICAÇÃO E SUBSCRIÇÃO ---
+
+def publish(game_id, snapshot):
+    """Publishes the position in snapshot (a history entry) for game_id. Returns the current Frame."""
+    with FRAME_CONDITION:
+        BROADCAST_STATS['published'] += 1
+        LAST_PUBLISHED[game_id] = time.monotonic()
+        evict_stale_broadcasts()
+        if FRAME_SOURCES.get(game_id) is snapshot:
+            return FRAMES[game_id]
+        frame = build_frame(game_id, next(FRAME_VERSIONS), snapshot)
+        FRAMES[game_id] = frame
+        FRAME_SOURCES[game_id] = snapshot
+        FRAME_CONDITION.notify_all()
+        return frame
+
+def unpublish(game_id):
+    """Ends the broadcast of game_id; waiting viewers wake up and get None."""
+    with FRAME_CONDITION:
+        drop_broadcast(game_id)
+        FRAME_CONDITION.notify_all()
+
+def drop_broadcast(game_id):
+    FRAMES.pop(game_id, None)
+    FRAME_SOURCES.pop(game_id, None)
+    LAST_PUBLISHED.pop(game_id, None)
+
+def evict_stale_broadcasts():
+    """Drops the broadcasts not published for BROADCAST_TTL_SECONDS. Called with FRAME_CONDITION held."""
+    cutoff = time.monotonic() - BROADCAST_TTL_SECONDS
+    stale = [game_id for game_id, last_published in LAST_PUBLISHED.items() if last_published < cutoff]
+    for game_id in stale:
+        drop_broadcast(game_id)
+    if stale:
+        FRAME_CONDITION.notify_all()
+
+def get_frame(game_id):
+    """Latest Frame of game_id, or None if it is not being broadcast."""
+    last_published = LAST_PUBLISHED.get(game_id)
+    if last_published is None or last_published < time.monotonic() - BROADCAST_TTL_SECONDS:
+        return None
+    return FRAMES.get(game_id)
+
+def wait_for_frame(game_id, after_version, timeout=None):
+    """
+    Blocks until game_id has a frame newer than after_version, the broadcast ends or
+    timeout seconds pass. Returns the latest Frame (None if the broadcast ended).
+    """
+    with FRAME_CONDITION:
+        FRAME_CONDITION.wait_for(lambda: game_id not in FRAMES or FRAMES[game_id].version > after_version, timeout)
+        return FRAMES.get(game_id)
+
+def list_broadcasts():
+    """[(game_id, turn number, game over)] of the games being broadcast."""
+    with FRAME_CONDITION:
+        evict_stale_broadcasts()
+        return [(frame.game_id, frame.turn_number, frame.game_over)
+                for frame in sorted(FRAMES.values(), key=lambda frame: frame.game_id)]
@@ -0,0 +1,1805 @@
+"""
+Rules engine for Arcanum Tactics: board geometry, game state, rules, cards and AI.
+
+It has no Streamlit or pandas dependency, so simulators, tests and worker
+processes can import it cheaply. Rule functions operate on the game state bound
+to the current thread with bind_state (the Streamlit app binds state
+on every run); threads that never bind one share a plain GameState.
+
+Positions ("coords") are integer cell IDs, (row - 1) * number of columns + column
+index, as in the NumPy environments. 'E7'-style labels (coord_label,
+parse_coord_label) are only used by the UI and the event log.
+"""
+import collections
+import heapq
+import json
+import os
+import random
+import threading
+import time
+import types
+
+import arcanum_metrics as metrics
+
+# --- GAME DATA & CONSTANTS ---
+
+# O tamanho do tabuleiro e as zonas místicas são definidos por configure_board (ver abaixo);
+# por omissão 11x13 (A-K, 1-13) com zonas em E7, G7 e I7.
+BOARD_COLS = []
+BOARD_ROWS = []
+BOARD_COL_INDEX = {} # Rótulo da coluna -> índice (0..N-1)
+NUM_CELLS = 0 # IDs de célula válidos: 0..NUM_CELLS-1
+CELL_IDS = () # ID -> o próprio ID; as tabelas reutilizam estes objetos int em vez de criar cópias
+CELL_ROW = () # ID -> linha (1..N)
+CELL_AXIAL_Q = () # ID -> coordenada axial q (a coordenada axial r é a linha)
+CELL_NEIGHBORS = () # ID -> tuplo dos IDs vizinhos, construído uma vez por tabuleiro
+MIN_BOARD_COLS = 5 # A disposição inicial (INITIAL_LAYOUT) usa colunas até ±2 do centro
+MIN_BOARD_ROWS = 4 # e duas linhas junto à borda de cada jogador
+MYSTIC_ZONES = [] # IDs de célula
+MYSTIC_ZONES_TO_WIN = 3 # Zonas a controlar para vencer (limitado ao número de zonas)
+HEX_RING_INDEX = {} # raio -> {ID: tuplo do anel}, partilhado por todas as sessões do processo
+HEX_DISK_INDEX = {} # raio -> {ID: tuplo do disco, ordenado por distância}
+AI_OBJECTIVE_BONUS = {'zone': 3, 'core': 2, 'enemy': 1} # Preferência da AI por tipo de objetivo (subtraída ao custo)
+AI_UNREACHABLE_COST = 10**6 # Custo finito para objetivos inalcançáveis no problema de atribuição
+AI_PLANNER_MAX_UNITS = 64 # Acima disto a AI usa um campo de distâncias em vez do problema de atribuição
+QUERY_CACHE_SIZE = 256 # Máximo de consultas (movimentos/ataques/invocações) guardadas por jogo
+HISTORY_BUCKETS = 32 # Partições do mapa de unidades em cada snapshot (partições sem alterações são partilhadas)
+PATH_CACHE_SIZE = 4096 # Máximo de caminhos A* guardados por jogo (a cache é esvaziada ao ultrapassar)
+POLICY_CACHE_VERSION = 4 # Incrementar quando a lógica da AI muda (planos antigos deixam de ser usados)
+POLICY_CACHE_MAX_ENTRIES = 100_000 # Planos guardados no ficheiro partilhado antes de despejar os menos usados
+POLICY_CACHE_EVICT_FRACTION = 0.1 # Fração despejada de uma vez ao ultrapassar o limite
+POLICY_CACHE_MAX_TURN = 12 # Só os turnos iniciais (que se repetem entre jogos) são guardados
+POLICY_CACHE_TOUCH_SECONDS = 3600 # Intervalo mínimo entre atualizações de last_used de um plano (leituras sem escrita)
+FOG_OF_WAR = os.environ.get('ARCANUM_FOG_OF_WAR', '') not in ('', '0') # Regra opcional por omissão em initialize_game
+DRAWING_PLAYERS = (1,) # Jogadores que desenham uma carta no início do turno (a AI não desenha nesta versão)
+# Processos da procura por rollouts da AI (arcanum_rollouts): vazio usa o planeador, 0 procura no próprio processo
+AI_ROLLOUT_WORKERS = int(os.environ['ARCANUM_AI_ROLLOUT_WORKERS']) if os.environ.get('ARCANUM_AI_ROLLOUT_WORKERS') else None
+AI_ROLLOUT_BUDGET_MS = int(os.environ.get('ARCANUM_AI_ROLLOUT_BUDGET_MS', 200)) # Tempo por decisão da procura
+
+UNIT_DATA = {
+    'Arcane Core': {'hp': 20, 'atk': 0, 'mv': 0, 'range': 0, 'vision': 2},
+    'Sylvara': {'hp': 10, 'atk': 2, 'mv': 2, 'range': 1, 'vision': 2},
+    'Guardião': {'hp': 5, 'atk': 2, 'mv': 2, 'range': 1, 'vision': 2},
+    'Batedor': {'hp': 3, 'atk': 2, 'mv': 3, 'range': 1, 'vision': 4},
+    'Adeptus': {'hp': 2, 'atk': 3, 'mv': 2, 'range': 3, 'vision': 3},
+    'Brutamontes': {'hp': 6, 'atk': 3, 'mv': 1, 'range': 1, 'vision': 2},
+    'Sentinela Arcana': {'hp': 4, 'atk': 1, 'mv': 2, 'range': 2, 'vision': 3},
+} # vision: raio de visão com nevoeiro de guerra (nunca menor que o alcance)
+
+CARD_DATA = {
+    "Invocação: Adeptus": {"type": "invocation", "unit_type": "Adeptus", "cost": 2, "desc": "Invoca um Adeptus."},
+    "Invocação: Batedor": {"type": "invocation", "unit_type": "Batedor", "cost": 2, "desc": "Invoca um Batedor."},
+    "Invocação: Sentinela Arcana": {"type": "invocation", "unit_type": "Sentinela Arcana", "cost": 3, "desc": "Invoca uma Sentinela Arcana."},
+    "Feitiço: Pulso Etéreo": {"type": "spell", "cost": 2, "desc": "Causa 2 de dano a uma unidade a até 4 casas."},
+    "Feitiço: Escudo Etéreo": {"type": "spell", "cost": 2, "desc": "Aplica 3 de escudo a uma unidade aliada."},
+    "Feitiço: Reflexo Estratégico": {"type": "spell", "cost": 4, "desc": "Compra 2 cartas."},
+    "Feitiço: Translocação Rápida": {"type": "spell", "cost": 1, "desc": "Move um aliado 1 hexágono."},
+}
+
+# --- COORDINATE HELPER FUNCTIONS ---
+
+def int_to_col(col_int):
+    """Converts a column integer (0, 1, ...) to a label ('A'-'Z', 'AA', 'AB', ...)."""
+    label = ""
+    n = col_int + 1
+    while n > 0:
+        n, remainder = divmod(n - 1, 26)
+        label = chr(ord('A') + remainder) + label
+    return label
+
+def cell_id(col, row):
+    """Cell ID of column index col (0..N-1) and row row (1..N). Raises ValueError if it is not on the board."""
+    num_cols = len(BOARD_COLS)
+    if not (0 <= col < num_cols and 1 <= row <= len(BOARD_ROWS)):
+        raise ValueError(f"Coordenadas fora do tabuleiro: coluna {col}, linha {row}")
+    return (row - 1) * num_cols + col
+
+def coord_label(coords):
+    """Formats a cell ID as an 'E7'-style label."""
+    return f"{BOARD_COLS[coords % len(BOARD_COLS)]}{CELL_ROW[coords]}"
+
+def parse_coord_label(label):
+    """Parses an 'E7'-style label into a cell ID. Raises ValueError if it is not on the board."""
+    label = label.strip().upper()
+    split_at = len(label) - len(label.lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    col_char, row = label[:split_at], int(label[split_at:])
+    if col_char not in BOARD_COL_INDEX or not BOARD_ROWS[0] <= row <= BOARD_ROWS[-1]:
+        raise ValueError(f"Coordenadas fora do tabuleiro: {label}")
+    return cell_id(BOARD_COL_INDEX[col_char], row)
+
+def configure_board(num_cols, num_rows, mystic_zones=None):
+    """
+    Sets the board dimensions and the mystic zone layout ('E7'-style labels) for the whole process,
+    and builds the per-cell tables (rows, axial coordinates and neighbour lists).
+    With mystic_zones=None, three zones are placed on the middle row around the centre column,
+    which reproduces the original E7/G7/I7 layout on the 11x13 board.
+    """
+    global BOARD_COLS, BOARD_ROWS, BOARD_COL_INDEX, MYSTIC_ZONES, MYSTIC_ZONES_TO_WIN
+    global NUM_CELLS, CELL_IDS, CELL_ROW, CELL_AXIAL_Q, CELL_NEIGHBORS
+
+    if num_cols < MIN_BOARD_COLS or num_rows < MIN_BOARD_ROWS:
+        raise ValueError(f"Tabuleiro demasiado pequeno: {num_cols}x{num_rows} "
+                         f"(mínimo {MIN_BOARD_COLS}x{MIN_BOARD_ROWS} para a disposição inicial)")
+    BOARD_COLS = [int_to_col(i) for i in range(num_cols)]
+    BOARD_ROWS = list(range(1, num_rows + 1))
+    BOARD_COL_INDEX = {col_char: i for i, col_char in enumerate(BOARD_COLS)}
+    NUM_CELLS = num_cols * num_rows
+    CELL_IDS = tuple(range(NUM_CELLS))
+    CELL_ROW = tuple(cell // num_cols + 1 for cell in CELL_IDS)
+    CELL_AXIAL_Q = tuple(cell % num_cols - (row - (row & 1)) // 2 for cell, row in enumerate(CELL_ROW))
+    CELL_NEIGHBORS = tuple(build_cell_neighbors(cell % num_cols, row) for cell, row in enumerate(CELL_ROW))
+
+    if mystic_zones is None:
+        center_col = num_cols // 2
+        middle_row = (num_rows + 1) // 2
+        zones = [cell_id(center_col + offset, middle_row)
+                 for offset in (-1, 1, 3) if 0 <= center_col + offset < num_cols]
+    else:
+        zones = []
+        for label in mystic_zones:
+            try:
+                zones.append(parse_coord_label(label))
+            except ValueError:
+                raise ValueError(f"Zona mística fora do tabuleiro: {label}") from None
+
+    MYSTIC_ZONES = zones
+    MYSTIC_ZONES_TO_WIN = min(3, len(MYSTIC_ZONES))
+    HEX_RING_INDEX.clear()
+    HEX_DISK_INDEX.clear()
+
+def is_valid_coord(coords):
+    """Checks if a cell ID is on the board."""
+    return 0 <= coords < NUM_CELLS
+
+def build_cell_neighbors(col, row):
+    """
+    Implements the hexagonal adjacency rule on the square grid (odd rows shifted right).
+    Returns the tuple of valid neighbouring cell IDs.
+    """
+    potential_neighbors = [
+        (col, row - 1), (col, row + 1),
+        (col - 1, row), (col + 1, row),
+    ]
+    
+    if row % 2 != 0: # Odd rows
+        potential_neighbors.extend([
+            (col + 1, row - 1), (col + 1, row + 1)
+        ])
+    else: # Even rows
+        potential_neighbors.extend([
+            (col - 1, row - 1), (col - 1, row + 1)
+        ])
+        
+    num_cols = len(BOARD_COLS)
+    num_rows = len(BOARD_ROWS)
+    return tuple(CELL_IDS[(r - 1) * num_cols + c] for c, r in potential_neighbors if 0 <= c < num_cols and 1 <= r <= num_rows)
+
+def get_adjacent_hexes(coords):
+    """Neighbouring cell IDs of a cell (a prebuilt tuple, nothing is allocated)."""
+    return CELL_NEIGHBORS[coords]
+
+def calculate_distance(start_coords, end_coords):
+    """
+    Hexagonal distance between two cell IDs (inf if either is invalid), in closed form on the axial
+    coordinates. On the rectangular board this equals the BFS distance over get_adjacent_hexes.
+    """
+    if not (0 <= start_coords < NUM_CELLS and 0 <= end_coords < NUM_CELLS):
+        return float('inf')
+
+    dq = CELL_AXIAL_Q[start_coords] - CELL_AXIAL_Q[end_coords]
+    dr = CELL_ROW[start_coords] - CELL_ROW[end_coords]
+    return (abs(dq) + abs(dr) + abs(dq + dr)) // 2
+
+# Direções axiais (dq, dr), por ordem, para percorrer um anel
+AXIAL_DIRECTIONS = [(1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1)]
+
+def get_hex_ring(center_coords, radius):
+    """
+    Returns the board cells at exactly `radius` from center_coords, as a static tuple.
+    Computed once per (cell, radius) and shared by every session in the process.
+    """
+    rings = HEX_RING_INDEX.get(radius)
+    if rings is None:
+        rings = HEX_RING_INDEX[radius] = {}
+    ring = rings.get(center_coords)
+    if ring is not None:
+        return ring
+
+    if radius == 0:
+        ring = (CELL_IDS[center_coords],)
+    else:
+        # Percorre o anel em coordenadas axiais: 6 lados de `radius` passos
+        q = CELL_AXIAL_Q[center_coords] - radius
+        r = CELL_ROW[center_coords] + radius
+        num_cols = len(BOARD_COLS)
+        num_rows = len(BOARD_ROWS)
+        cells = []
+        for dq, dr in AXIAL_DIRECTIONS:
+            for _ in range(radius):
+                col = q + (r - (r & 1)) // 2
+                if 0 <= col < num_cols and 1 <= r <= num_rows:
+                    cells.append(CELL_IDS[(r - 1) * num_cols + col])
+                q += dq
+                r += dr
+        ring = tuple(cells)
+
+    rings[center_coords] = ring
+    return ring
+
+def get_hex_disk(center_coords, radius):
+    """
+    Returns the board cells at distance <= radius from center_coords (ordered by distance),
+    as a static tuple built from the shared ring index.
+    """
+    disks = HEX_DISK_INDEX.get(radius)
+    if disks is None:
+        disks = HEX_DISK_INDEX[radius] = {}
+    disk = disks.get(center_coords)
+    if disk is not None:
+        return disk
+
+    if radius == 0:
+        disk = get_hex_ring(center_coords, 0)
+    else:
+        disk = get_hex_disk(center_coords, radius - 1) + get_hex_ring(center_coords, radius)
+
+    disks[center_coords] = disk
+    return disk
+
+configure_board(
+    int(os.environ.get('ARCANUM_BOARD_COLS', 11)),
+    int(os.environ.get('ARCANUM_BOARD_ROWS', 13)),
+    os.environ['ARCANUM_MYSTIC_ZONES'].split(',') if os.environ.get('ARCANUM_MYSTIC_ZONES') else None,
+)
+
+# --- GAME STATE BINDING ---
+
+class GameState(types.SimpleNamespace):
+    """Plain attribute container for one game, used outside Streamlit."""
+
+    def __contains__(self, name):
+        return name in self.__dict__
+
+BOUND_STATE = threading.local()
+DEFAULT_STATE = GameState()
+
+def bind_state(game_state):
+    """Makes the rule functions in the current thread operate on game_state (e.g. st.session_state)."""
+    BOUND_STATE.game_state = game_state
+
+def get_bound_state():
+    return getattr(BOUND_STATE, 'game_state', DEFAULT_STATE)
+
+class StateProxy:
+    """Forwards attribute access to the game state bound to the current thread."""
+
+    def __getattr__(self, name):
+        return getattr(get_bound_state(), name)
+
+    def __setattr__(self, name, value):
+        setattr(get_bound_state(), name, value)
+
+    def __contains__(self, name):
+        return name in get_bound_state()
+
+state = StateProxy()
+
+
+# --- SESSION STATE INITIALIZATION ---
+
+INITIAL_MANA = {1: 3, 2: 3}
+INITIAL_HANDS = {
+    1: ["Invocação: Adeptus", "Feitiço: Pulso Etéreo", "Invocação: Batedor"], # Cartas iniciais para o Jogador 1
+    2: [], # AI não desenha cartas inicialmente nesta versão
+}
+MAX_HAND_SIZE = 7
+
+# Disposição inicial: (jogador, tipo, deslocamento de coluna face ao centro, linhas a partir da borda do jogador)
+INITIAL_LAYOUT = [
+    # Player 1 units
+    (1, 'Arcane Core', 0, 0),
+    (1, 'Sylvara', -1, 1),
+    (1, 'Guardião', -2, 0),
+    (1, 'Batedor', 1, 1),
+    (1, 'Adeptus', 2, 0),
+    # Player 2 units (AI)
+    (2, 'Arcane Core', 0, 0),
+    (2, 'Guardião', -1, 1), # AI Champion placeholder
+    (2, 'Adeptus', -2, 0),
+    (2, 'Batedor', 1, 1),
+    (2, 'Sentinela Arcana', 2, 0),
+]
+
+# Função para adicionar mensagens ao log
+def add_event_message(message, is_critical=False):
+    if 'event_log' not in state:
+        state.event_log = collections.deque(maxlen=7) # Limite para 7 mensagens
+    state.event_log.append(message)
+    # Se for uma mensagem crítica (e.g., vitória/derrota), também a coloca como game_message
+    if is_critical:
+        state.game_message = message
+
+def create_unit(unit_type, player_id, coords, ready=True):
+    """Builds a unit dict from UNIT_DATA. Units that are not ready (freshly invoked) have no MV/AP."""
+    unit_base_data = UNIT_DATA[unit_type]
+    return {
+        'type': unit_type,
+        'player': player_id,
+        'cell': coords,
+        'hp': unit_base_data['hp'],
+        'max_hp': unit_base_data['hp'],
+        'mv_remaining': unit_base_data['mv'] if ready else 0,
+        'ap_remaining': 1 if ready else 0,
+        'max_mv': unit_base_data['mv'],
+        'atk': unit_base_data['atk'],
+        'range': unit_base_data['range'],
+    }
+
+def initialize_game(fog_of_war=None):
+    """Starts a new game. fog_of_war=None uses FOG_OF_WAR (ARCANUM_FOG_OF_WAR)."""
+    state.fog_of_war = FOG_OF_WAR if fog_of_war is None else fog_of_war
+    state.vision_counts = {1: {}, 2: {}} # Jogador -> {ID de célula: unidades próprias que veem o hexágono}
+    state.units = {}
+    state.unit_positions = {} # Índice de ocupação: ID de célula -> unit_id
+    state.next_unit_id = 0 # Próximo ID disponível para novas unidades
+    state.dirty_units = set() # IDs de unidades alteradas desde o último snapshot do histórico
+    # Cache de consultas: chave (tipo, alvo, versão do estado) -> frozenset, com despejo LRU
+    state.state_version = 0
+    state.query_cache = collections.OrderedDict()
+    state.query_cache_stats = {'hits': 0, 'misses': 0}
+    # Cache de caminhos A*: (início, destino) -> caminho, invalidado quando um hexágono do caminho é ocupado
+    state.path_cache = {}
+    state.path_cache_index = collections.defaultdict(set) # hexágono -> chaves que passam por ele
+    state.path_cache_stats = {'hits': 0, 'misses': 0, 'nodes': 0} # nodes = nós A* expandidos
+    state.policy_cache_stats = {'hits': 0, 'misses': 0} # Turnos da AI servidos pela cache de planos
+    state.metrics_game_id = metrics.new_game()
+    state.action_log = [] # Uma linha por ação concluída (ver log_action), para arcanum_outcomes
+    state.outcome = None # (vencedor, 'core' | 'zones') quando o jogo termina
+
+    center_col = len(BOARD_COLS) // 2
+    for player_id, unit_type, col_offset, rows_from_edge in INITIAL_LAYOUT:
+        row = BOARD_ROWS[-1] - rows_from_edge if player_id == 1 else BOARD_ROWS[0] + rows_from_edge
+        add_unit(create_unit(unit_type, player_id, cell_id(center_col + col_offset, row)))
+
+    state.selected_unit = None
+    state.mana = dict(INITIAL_MANA)
+    state.hand = {player_id: list(cards) for player_id, cards in INITIAL_HANDS.items()}
+    state.current_turn = 1
+    state.turn_number = 1
+    state.game_message = "Bem-vindo ao Arcanum Tactics!"
+    state.game_over = False
+    state.valid_moves = set() # para guardar hexágonos de movimento válido
+    state.valid_attacks = set() # para guardar hexágonos de ataque válido
+    state.mystic_zone_control = { # Inicializa o controlo das zonas místicas
+        zone_coords: None for zone_coords in MYSTIC_ZONES
+    }
+    state.invocation_mode = False
+    state.unit_type_to_invoke = None
+    state.valid_invocations = set() # para guardar hexágonos de invocação válida
+    # Inicializa o log de eventos
+    state.event_log = collections.deque(maxlen=7) # Armazena as últimas 7 mensagens
+    
+    # INICIALIZAÇÃO DOS ESTADOS DE FEEDBACK VISUAL
+    state.last_moved_unit = None
+    state.last_move_from = None
+    state.last_move_to = None
+    state.last_attack_info = None
+
+    add_event_message("Jogo iniciado! Que a tua estratégia te guie.")
+
+    # Histórico de snapshots (um por ação) para desfazer jogadas e recuar turnos
+    state.history = []
+    record_history("Início do jogo", turn_start=True)
+
+    state.game_initialized = True
+
+
+# --- QUERY CACHE ---
+
+def bump_state_version():
+    """Invalidates every cached query. Must be called by any function that mutates units."""
+    state.state_version += 1
+
+def cached_query(kind, key, compute):
+    """
+    Returns compute() memoized under (kind, key, state version).
+    Entries from older versions are never hit again and age out of the LRU.
+    """
+    cache = state.query_cache
+    stats = state.query_cache_stats
+    cache_key = (kind, key, state.state_version)
+
+    if cache_key in cache:
+        cache.move_to_end(cache_key)
+        stats['hits'] += 1
+        return cache[cache_key]
+
+    stats['misses'] += 1
+    result = frozenset(compute())
+    cache[cache_key] = result
+    if len(cache) > QUERY_CACHE_SIZE:
+        cache.popitem(last=False)
+    return result
+
+def get_query_cache_stats():
+    """Returns hits, misses and hit rate of the query cache."""
+    stats = state.query_cache_stats
+    total = stats['hits'] + stats['misses']
+    hit_rate = stats['hits'] / total if total else 0.0
+    return {'hits': stats['hits'], 'misses': stats['misses'], 'hit_rate': hit_rate}
+
+
+# --- UNIT REGISTRY ---
+# Todas as alterações de posição passam por aqui para manter o índice de ocupação e a versão do estado.
+# Quem altera hp/mv/ap de uma unidade marca-a em state.dirty_units para o próximo snapshot do histórico.
+
+def add_unit(unit):
+    """Places a new unit on the board and returns its ID."""
+    new_unit_id = str(state.next_unit_id)
+    state.next_unit_id += 1
+    state.units[new_unit_id] = unit
+    state.unit_positions[unit['cell']] = new_unit_id
+    state.dirty_units.add(new_unit_id)
+    invalidate_paths_through(unit['cell'])
+    if state.fog_of_war:
+        update_unit_vision(unit, 1)
+    bump_state_version()
+    return new_unit_id
+
+def relocate_unit(unit_id, target_coords):
+    unit = state.units[unit_id]
+    if state.fog_of_war:
+        update_unit_vision(unit, -1)
+    del state.unit_positions[unit['cell']]
+    unit['cell'] = target_coords
+    state.unit_positions[target_coords] = unit_id
+    state.dirty_units.add(unit_id)
+    if state.fog_of_war:
+        update_unit_vision(unit, 1)
+    invalidate_paths_through(target_coords)
+    bump_state_version()
+
+def remove_unit(unit_id):
+    unit = state.units.pop(unit_id)
+    del state.unit_positions[unit['cell']]
+    state.dirty_units.add(unit_id)
+    if state.fog_of_war:
+        update_unit_vision(unit, -1)
+    bump_state_version()
+
+
+# --- FOG OF WAR ---
+# Cada jogador vê os hexágonos a até UNIT_DATA[tipo]['vision'] das suas unidades. A visibilidade é um
+# contador por hexágono atualizado pelo registo de unidades: só o disco da unidade afetada muda.
+
+def update_unit_vision(unit, delta):
+    """Adds (delta=1) or removes (delta=-1) the vision disk of unit from its player's counts."""
+    counts = state.vision_counts[unit['player']]
+    for coords in get_hex_disk(unit['cell'], UNIT_DATA[unit['type']]['vision']):
+        count = counts.get(coords, 0) + delta
+        if count:
+            counts[coords] = count
+        else:
+            del counts[coords]
+
+def rebuild_vision():
+    """Recomputes every player's vision from the units (after restoring a snapshot)."""
+    state.vision_counts = {1: {}, 2: {}}
+    if state.fog_of_war:
+        for unit in state.units.values():
+            update_unit_vision(unit, 1)
+
+def is_hex_visible(player_id, coords):
+    """True if player_id sees coords (always, without fog of war)."""
+    return not state.fog_of_war or coords in state.vision_counts[player_id]
+
+def get_visible_hexes(player_id):
+    """Set of the hexes player_id sees (every hex, without fog of war)."""
+    if not state.fog_of_war:
+        return set(range(NUM_CELLS))
+    return set(state.vision_counts[player_id])
+
+FOG_ACTION_MESSAGE = "A AI agiu no nevoeiro."
+
+def add_action_message(message, player_id, cells):
+    """
+    Logs an action by player_id involving `cells`. The event log is read by player 1, so under fog of
+    war another player's action is only described when player 1 sees all its cells.
+    """
+    if player_id == 1 or all(is_hex_visible(1, coords) for coords in cells):
+        add_event_message(message)
+    elif not state.event_log or state.event_log[-1] != FOG_ACTION_MESSAGE: # Uma linha por sequência
+        add_event_message(FOG_ACTION_MESSAGE)
+
+
+# --- PATHFINDING ---
+
+def invalidate_paths_through(coords):
+    """Drops every cached path that crosses coords (called when coords becomes occupied)."""
+    cache = state.path_cache
+    index = state.path_cache_index
+    for cache_key in index.pop(coords, ()):
+        path = cache.pop(cache_key, None)
+        if path is None:
+            continue
+        for path_coords in path[:-1]:
+            if path_coords != coords:
+                index[path_coords].discard(cache_key)
+
+def store_path(start_coords, goal_coords, path):
+    if len(state.path_cache) >= PATH_CACHE_SIZE:
+        state.path_cache.clear()
+        state.path_cache_index.clear()
+
+    cache_key = (start_coords, goal_coords)
+    state.path_cache[cache_key] = path
+    for path_coords in path[:-1]: # O destino pode estar ocupado (ex: unidade inimiga)
+        state.path_cache_index[path_coords].add(cache_key)
+
+def find_path(start_coords, goal_coords):
+    """
+    A* from start_coords to goal_coords around occupied hexes, using the hex distance as an
+    admissible heuristic. The goal itself may be occupied. Returns a tuple of coords from the
+    first step up to the goal, () if start == goal, or None if there is no path.
+    """
+    if start_coords == goal_coords:
+        return ()
+
+    g_score = {start_coords: 0}
+    came_from = {}
+    counter = 0 # Desempate estável no heap
+    open_heap = [(calculate_distance(start_coords, goal_coords), 0, counter, start_coords)]
+
+    expanded = 0
+    while open_heap:
+        f, neg_g, _, current_coords = heapq.heappop(open_heap)
+        if current_coords == goal_coords:
+            state.path_cache_stats['nodes'] += expanded
+            path = [current_coords]
+            while path[-1] in came_from:
+                path.append(came_from[path[-1]])
+            path.pop() # Remove o início
+            return tuple(reversed(path))
+
+        current_g = -neg_g
+        if current_g > g_score[current_coords]:
+            continue
+        expanded += 1
+
+        for neighbor in get_adjacent_hexes(current_coords):
+            if neighbor != goal_coords and neighbor in state.unit_positions:
+                continue
+            new_g = current_g + 1
+            if new_g < g_score.get(neighbor, float('inf')):
+                g_score[neighbor] = new_g
+                came_from[neighbor] = current_coords
+                counter += 1
+                # Em empate de f, expande primeiro o nó mais profundo
+                heapq.heappush(open_heap, (new_g + calculate_distance(neighbor, goal_coords), -new_g, counter, neighbor))
+
+    state.path_cache_stats['nodes'] += expanded
+    return None
+
+def get_path(start_coords, goal_coords):
+    """Cached find_path. Paths stay valid until one of their hexes becomes occupied."""
+    cache_key = (start_coords, goal_coords)
+    stats = state.path_cache_stats
+    if cache_key in state.path_cache:
+        stats['hits'] += 1
+        return state.path_cache[cache_key]
+
+    stats['misses'] += 1
+    path = find_path(start_coords, goal_coords)
+    if path is not None:
+        store_path(start_coords, goal_coords, path)
+    return path
+
+
+# --- TURN HISTORY ---
+# Cada snapshot guarda as unidades em HISTORY_BUCKETS partições imutáveis. Só as unidades marcadas em
+# state.dirty_units desde o snapshot anterior são copiadas, e só as suas partições são refeitas; as
+# restantes partições e unidades reutilizam os mesmos objetos, por isso o custo de cada snapshot e a
+# memória crescem com as unidades alteradas e não com o número de unidades ou de snapshots.
+
+def snapshot_unit_buckets(previous_buckets):
+    if previous_buckets is None:
+        buckets = [{} for _ in range(HISTORY_BUCKETS)]
+        for uid, unit in state.units.items():
+            buckets[int(uid) % HISTORY_BUCKETS][uid] = dict(unit)
+        state.dirty_units.clear()
+        return tuple(buckets)
+
+    buckets = list(previous_buckets)
+    for uid in state.dirty_units:
+        i = int(uid) % HISTORY_BUCKETS
+        unit = state.units.get(uid)
+        if unit == previous_buckets[i].get(uid):
+            continue
+        if buckets[i] is previous_buckets[i]:
+            buckets[i] = dict(previous_buckets[i])
+        if unit is None:
+            del buckets[i][uid]
+        else:
+            buckets[i][uid] = dict(unit)
+    state.dirty_units.clear()
+    return tuple(buckets)
+
+def record_history(label, turn_start=False):
+    """Appends a snapshot of the game after an action. Snapshots must never be mutated."""
+    history = state.history
+    previous_buckets = history[-1]['unit_buckets'] if history else None
+    history.append({
+        'label': label,
+        'turn_start': turn_start,
+        'turn_number': state.turn_number,
+        'unit_buckets': snapshot_unit_buckets(previous_buckets),
+        'next_unit_id': state.next_unit_id,
+        'current_turn': state.current_turn,
+        'mana': dict(state.mana),
+        'hand': {player_id: tuple(cards) for player_id, cards in state.hand.items()},
+        'mystic_zone_control': dict(state.mystic_zone_control),
+        'game_over': state.game_over,
+        'outcome': state.outcome,
+        'game_message': state.game_message,
+        'event_log': tuple(state.event_log),
+        'actions_logged': len(state.action_log),
+    })
+
+def restore_snapshot(snapshot):
+    stored_units = [(uid, unit) for bucket in snapshot['unit_buckets'] for uid, unit in bucket.items()]
+    state.units = {uid: dict(unit) for uid, unit in sorted(stored_units, key=lambda item: int(item[0]))}
+    state.unit_positions = {unit['cell']: uid for uid, unit in state.units.items()}
+    state.dirty_units = set() # O estado volta a ser igual ao do snapshot
+    rebuild_vision()
+    state.next_unit_id = snapshot['next_unit_id']
+    state.current_turn = snapshot['current_turn']
+    state.turn_number = snapshot['turn_number']
+    state.mana = dict(snapshot['mana'])
+    state.hand = {player_id: list(cards) for player_id, cards in snapshot['hand'].items()}
+    state.mystic_zone_control = dict(snapshot['mystic_zone_control'])
+    state.game_over = snapshot['game_over']
+    state.outcome = snapshot['outcome']
+    state.game_message = snapshot['game_message']
+    state.event_log = collections.deque(snapshot['event_log'], maxlen=7)
+    del state.action_log[snapshot['actions_logged']:]
+
+    # As posições mudaram arbitrariamente: invalida caches e estados de seleção/feedback
+    state.path_cache.clear()
+    state.path_cache_index.clear()
+    bump_state_version()
+    state.selected_unit = None
+    state.valid_moves = set()
+    state.valid_attacks = set()
+    state.invocation_mode = False
+    state.unit_type_to_invoke = None
+    state.valid_invocations = set()
+    state.last_moved_unit = None
+    state.last_move_from = None
+    state.last_move_to = None
+    state.last_attack_info = None
+
+def get_turn_start_index():
+    history = state.history
+    for i in range(len(history) - 1, -1, -1):
+        if history[i]['turn_start']:
+            return i
+    return 0
+
+def can_undo():
+    return len(state.history) - 1 > get_turn_start_index()
+
+def undo_last_action():
+    """Reverts the last action of the current turn. Returns False if there is nothing to undo."""
+    if not can_undo():
+        return False
+    undone = state.history.pop()
+    restore_snapshot(state.history[-1])
+    add_event_message(f"Jogada desfeita: {undone['label']}.")
+    return True
+
+def get_rewind_turns():
+    """Turn numbers that can be rewound to (one turn-start snapshot each)."""
+    return [snapshot['turn_number'] for snapshot in state.history if snapshot['turn_start']]
+
+def rewind_to_turn(turn_number):
+    """Restores the start of turn_number and discards every later snapshot."""
+    for i, snapshot in enumerate(state.history):
+        if snapshot['turn_start'] and snapshot['turn_number'] == turn_number:
+            del state.history[i + 1:]
+            restore_snapshot(snapshot)
+            add_event_message(f"Jogo recuado para o início do turno {turn_number}.")
+            return True
+    return False
+
+def get_history_stats():
+    """Snapshots recorded and distinct unit dicts actually stored across all of them."""
+    stored_units = {id(unit) for snapshot in state.history
+                    for bucket in snapshot['unit_buckets'] for unit in bucket.values()}
+    return {'snapshots': len(state.history), 'stored_units': len(stored_units)}
+
+
+# --- GAME LOGIC FUNCTIONS ---
+
+def get_unit_at_coords_streamlit(coords):
+    uid = state.unit_positions.get(coords)
+    if uid is None:
+        return None, None
+    return uid, state.units[uid]
+
+def update_mystic_zone_control():
+    # Um hexágono só pode ter uma unidade, logo a zona é de quem a ocupa (ou livre se vazia)
+    for zone_coords in MYSTIC_ZONES:
+        unit_on_zone_id, unit_on_zone = get_unit_at_coords_streamlit(zone_coords)
+        
+        if unit_on_zone:
+            state.mystic_zone_control[zone_coords] = unit_on_zone['player']
+        else:
+            state.mystic_zone_control[zone_coords] = None
+
+def declare_winner(player_id, reason):
+    """Ends the game: reason is 'core' (enemy Arcane Core destroyed) or 'zones'."""
+    state.game_over = True
+    state.outcome = (player_id, reason)
+    metrics.finish_game(state.metrics_game_id, player_id, reason)
+
+def log_action(kind, unit_type=None, damage=0, card_name=None, mana_spent=0):
+    """
+    Appends a completed action of the player to act to state.action_log, before its history snapshot.
+    Zone captures are the zones the player controls now but did not before the action.
+    """
+    player_id = state.current_turn
+    previous_control = state.history[-1]['mystic_zone_control']
+    zone_captures = sum(1 for zone_coords, controller in state.mystic_zone_control.items()
+                        if controller == player_id and previous_control.get(zone_coords) != player_id)
+    # Meios-turnos (1 = primeiro turno do Jogador 1, 2 = turno seguinte da AI, ...), como no ambiente vetorizado
+    half_turn = 2 * state.turn_number - (1 if player_id == 1 else 2)
+    state.action_log.append((half_turn, player_id, kind, unit_type, damage, card_name, mana_spent, zone_captures))
+
+def check_mystic_zone_victory(player_id):
+    controlled_zones_count = 0
+    for zone_coords, controller_id in state.mystic_zone_control.items():
+        if controller_id == player_id:
+            controlled_zones_count += 1
+            
+    if MYSTIC_ZONES_TO_WIN > 0 and controlled_zones_count >= MYSTIC_ZONES_TO_WIN:
+        add_event_message(f"🎉🎉🎉 Jogador {player_id} VENCEU! Controla {MYSTIC_ZONES_TO_WIN} Zonas Místicas! 🎉🎉🎉", is_critical=True)
+        declare_winner(player_id, 'zones')
+        return True
+    return False
+
+
+def move_unit_streamlit(unit_id_str, target_coords):
+    unit = state.units.get(unit_id_str)
+    current_player_id = state.current_turn
+    
+    if not unit:
+        add_event_message(f"Erro: Unidade com ID {unit_id_str} não encontrada.")
+        return False
+    if unit['player'] != current_player_id:
+        add_event_message(f"Erro: Unidade {unit['type']} (ID: {unit_id_str}) não pertence ao Jogador {current_player_id}.")
+        return False
+    if unit['type'] == 'Arcane Core':
+        add_event_message(f"Erro: Núcleo Arcano é imóvel.")
+        return False
+
+    if unit['mv_remaining'] <= 0:
+        add_event_message(f"Erro: Unidade {unit['type']} (ID: {unit_id_str}) não tem pontos de movimento restantes.")
+        return False
+
+    if not is_valid_coord(target_coords):
+        add_event_message(f"Erro: Coordenadas alvo {target_coords} são inválidas.")
+        return False
+
+    target_uid, target_occupant = get_unit_at_coords_streamlit(target_coords)
+    
+    if target_occupant: # Se há alguma unidade no alvo
+        add_event_message(f"Erro: Hexágono {coord_label(target_coords)} já está ocupado por {target_occupant['type']}.")
+        return False
+    
+    start_coords = unit['cell']
+    distance = calculate_distance(start_coords, target_coords) # A distância agora é o custo direto
+
+    if distance == float('inf'):
+        add_event_message(f"Erro: Não é possível alcançar {coord_label(target_coords)} a partir de {coord_label(start_coords)} (caminho inválido).")
+        return False
+
+    movement_cost = distance
+
+    if movement_cost > unit['mv_remaining']:
+        add_event_message(f"Erro: Unidade {unit['type']} (ID: {unit_id_str}) não tem movimento suficiente ({movement_cost} necessário, {unit['mv_remaining']} restante).")
+        return False
+    
+    # Guarda as coordenadas antes de mover para o feedback visual
+    state.last_moved_unit = unit_id_str
+    state.last_move_from = start_coords
+    state.last_move_to = target_coords
+
+    unit['mv_remaining'] -= movement_cost
+    relocate_unit(unit_id_str, target_coords) # Marca a unidade em dirty_units
+    
+    add_action_message(f"{unit['type']} (ID: {unit_id_str}) moveu-se para {coord_label(target_coords)}. {unit['mv_remaining']} Mv restante.",
+                       unit['player'], (start_coords, target_coords))
+    update_mystic_zone_control() 
+    metrics.ACTIONS.inc(action='move')
+    log_action('move', unit['type'])
+    record_history(f"{unit['type']} (ID: {unit_id_str}) para {coord_label(target_coords)}")
+    return True
+
+def attack_unit_streamlit(attacker_id_str, target_id_str):
+    attacker = state.units.get(attacker_id_str)
+    target = state.units.get(target_id_str)
+    current_player_id = state.current_turn
+
+    if not attacker:
+        add_event_message(f"Erro de Ataque: Unidade atacante com ID {attacker_id_str} não encontrada.")
+        return False
+    if not target:
+        add_event_message(f"Erro de Ataque: Unidade alvo com ID {target_id_str} não encontrada.")
+        return False
+
+    if attacker['player'] != current_player_id:
+        add_event_message(f"Erro de Ataque: Unidade {attacker['type']} (ID: {attacker_id_str}) não pertence ao Jogador {current_player_id}.")
+        return False
+    if attacker['type'] == 'Arcane Core':
+        add_event_message(f"Erro de Ataque: Núcleo Arcano não pode atacar.")
+        return False
+    
+    if target['player'] == current_player_id:
+        add_event_message(f"Erro de Ataque: Não podes atacar uma unidade aliada (ID: {target_id_str}).")
+        return False
+    if attacker_id_str == target_id_str:
+        add_event_message(f"Erro de Ataque: Não podes atacar a própria unidade (ID: {attacker_id_str}).")
+        return False
+
+    if attacker['ap_remaining'] <= 0:
+        add_event_message(f"Erro de Ataque: Unidade {attacker['type']} (ID: {attacker_id_str}) não tem pontos de ação (AP) restantes.")
+        return False
+
+    attacker_coords = attacker['cell']
+    target_coords = target['cell']
+    distance = calculate_distance(attacker_coords, target_coords)
+
+    if distance == float('inf') or distance > attacker['range']:
+        add_event_message(f"Erro de Ataque: Alvo {target_id_str} fora do alcance de {attacker['type']} (Alcance: {attacker['range']}, Distância: {distance}).")
+        return False
+
+    damage = attacker['atk']
+    target['hp'] -= damage
+    attacker['ap_remaining'] -= 1
+    state.dirty_units.update((target_id_str, attacker_id_str))
+    bump_state_version()
+
+    # Guarda informação do ataque para feedback visual
+    state.last_attack_info = {
+        'attacker_coords': attacker_coords,
+        'target_coords': target_coords,
+        'target_id': target_id_str,
+        'damage_dealt': damage
+    }
+
+    add_action_message(f"{attacker['type']} (ID: {attacker_id_str}) atacou {target['type']} (ID: {target_id_str}) causando {damage} de dano.",
+                       current_player_id, (attacker_coords, target_coords))
+
+    if target['hp'] <= 0:
+        add_action_message(f"Unidade {target_id_str} ({target['type']}) foi destruída!", current_player_id, (target_coords,))
+        remove_unit(target_id_str)
+
+        if target['type'] == 'Arcane Core':
+            add_event_message(f"🎉🎉🎉 Jogador {current_player_id} VENCEU! O Núcleo Arcano do inimigo foi destruído! 🎉🎉🎉", is_critical=True)
+            declare_winner(current_player_id, 'core')
+            
+    update_mystic_zone_control() 
+    metrics.ACTIONS.inc(action='attack')
+    log_action('attack', attacker['type'], damage=damage)
+    record_history(f"{attacker['type']} (ID: {attacker_id_str}) atacou {target['type']} (ID: {target_id_str})")
+    return True
+
+# --- CARD LOGIC FUNCTIONS ---
+
+def play_card_streamlit(card_name, target_coords=None, target_unit_id=None):
+    current_player_id = state.current_turn
+    card_info = CARD_DATA.get(card_name)
+    
+    if card_name not in state.hand[current_player_id]:
+        add_event_message(f"Erro: Carta '{card_name}' não está na tua mão.")
+        return False
+    
+    if not card_info:
+        add_event_message(f"Erro: Informações da carta '{card_name}' não encontradas.")
+        return False
+    
+    cost = card_info.get('cost', 0)
+    if state.mana[current_player_id] < cost:
+        add_event_message(f"Erro: Mana insuficiente para jogar '{card_name}' (Custo: {cost}, Mana: {state.mana[current_player_id]}).")
+        return False
+
+    success = False
+    if card_info['type'] == 'invocation':
+        if target_coords is not None:
+            success = invoke_unit_from_card(card_info['unit_type'], target_coords, current_player_id)
+            if success:
+                state.mana[current_player_id] -= cost
+                state.hand[current_player_id].remove(card_name)
+                add_event_message(f"Carta '{card_name}' jogada com sucesso! {cost} Mana deduzida.")
+                metrics.ACTIONS.inc(action='card')
+                log_action('card', card_info['unit_type'], card_name=card_name, mana_spent=cost)
+                record_history(card_name)
+                state.invocation_mode = False
+                state.unit_type_to_invoke = None
+                state.valid_invocations = set()
+        else:
+            state.invocation_mode = True
+            state.unit_type_to_invoke = card_info['unit_type']
+            state.valid_invocations = get_valid_invocation_hexes(current_player_id, card_info['unit_type'])
+            add_event_message(f"Selecione um hexágono verde no tabuleiro para invocar {card_info['unit_type']}.")
+            state.selected_card_in_play = card_name
+            success = True
+            
+    elif card_info['type'] == 'spell':
+        success = cast_spell_from_card(card_name, target_coords, target_unit_id, current_player_id)
+        if success:
+            state.mana[current_player_id] -= cost
+            state.hand[current_player_id].remove(card_name)
+            add_event_message(f"Carta '{card_name}' jogada com sucesso! {cost} Mana deduzida.")
+            metrics.ACTIONS.inc(action='card')
+            damage = state.last_attack_info['damage_dealt'] if card_name == "Feitiço: Pulso Etéreo" else 0
+            log_action('card', damage=damage, card_name=card_name, mana_spent=cost)
+            record_history(card_name)
+            
+    return success
+
+def invoke_unit_from_card(unit_type, target_coords, player_id):
+    if not is_valid_coord(target_coords):
+        add_event_message(f"Erro de Invocação: Coordenadas '{target_coords}' são inválidas.")
+        return False
+    
+    uid_at_target, unit_at_target = get_unit_at_coords_streamlit(target_coords)
+    if unit_at_target:
+        add_event_message(f"Erro de Invocação: Hexágono {coord_label(target_coords)} já está ocupado por {unit_at_target['type']}.")
+        return False
+        
+    unit_base_data = UNIT_DATA.get(unit_type)
+    if not unit_base_data:
+        add_event_message(f"Erro de Invocação: Tipo de unidade '{unit_type}' não encontrado nos dados.")
+        return False
+
+    player_core = None
+    for uid, unit in state.units.items():
+        if unit['player'] == player_id and unit['type'] == 'Arcane Core':
+            player_core = unit
+            break
+    
+    if not player_core:
+        add_event_message("Erro de Invocação: Núcleo Arcano do jogador não encontrado.")
+        return False
+
+    core_coords = player_core['cell']
+    distance_from_core = calculate_distance(core_coords, target_coords)
+
+    if distance_from_core > 2 or distance_from_core == float('inf'): # Raio de 2 hexágonos
+        add_event_message(f"Erro de Invocação: Unidade deve ser invocada a até 2 hexágonos do seu Núcleo Arcano. Distância: {distance_from_core}.")
+        return False
+
+    # Fadiga de invocação: sem MV/AP até ao próximo turno do jogador
+    new_unit_id = add_unit(create_unit(unit_type, player_id, target_coords, ready=False))
+    add_event_message(f"Unidade '{unit_type}' (ID: {new_unit_id}) invocada para {coord_label(target_coords)}. Ela estará pronta para agir no teu próximo turno.")
+    update_mystic_zone_control() 
+    return True
+
+def cast_spell_from_card(card_name, target_coords, target_unit_id, player_id):
+    success = False
+    
+    if card_name == "Feitiço: Pulso Etéreo":
+        if not target_unit_id:
+            add_event_message("Erro: Pulso Etéreo requer um alvo.")
+            return False
+        
+        target_unit = state.units.get(target_unit_id)
+        # Com nevoeiro de guerra, um alvo fora da visão é tratado como inexistente (sem revelar a posição)
+        if not target_unit or not is_hex_visible(player_id, target_unit['cell']):
+            add_event_message(f"Erro: Alvo '{target_unit_id}' não encontrado para Pulso Etéreo.")
+            return False
+            
+        attacker_core = next((unit for uid, unit in state.units.items() 
+                              if unit['type'] == 'Arcane Core' and unit['player'] == player_id), None)
+        if not attacker_core:
+            add_event_message("Erro: Não foi possível encontrar o teu Núcleo Arcano para determinar o alcance do feitiço.")
+            return False
+            
+        distance = calculate_distance(attacker_core['cell'], target_unit['cell'])
+        
+        if distance > 4 or distance == float('inf'): # Exemplo: Alcance de 4 para Pulso Etéreo
+            add_event_message(f"Erro: Alvo '{target_unit_id}' fora do alcance de Pulso Etéreo (Max 4, Distância: {distance}).")
+            return False
+
+        if target_unit['player'] == player_id:
+            add_event_message("Erro: Não podes usar Pulso Etéreo numa unidade aliada.")
+            return False
+
+        damage = 2
+        target_unit['hp'] -= damage
+        state.dirty_units.add(target_unit_id)
+        # Feedback visual para feitiços
+        state.last_attack_info = {
+            'attacker_coords': attacker_core['cell'],
+            'target_coords': target_unit['cell'],
+            'target_id': target_unit_id,
+            'damage_dealt': damage
+        }
+        add_event_message(f"Pulso Etéreo causa {damage} de dano a {target_unit['type']} (ID: {target_unit_id}).")
+        
+        if target_unit['hp'] <= 0:
+            add_event_message(f"Unidade {target_unit_id} ({target_unit['type']}) foi destruída!")
+            remove_unit(target_unit_id)
+            if target_unit['type'] == 'Arcane Core':
+                add_event_message(f"🎉🎉🎉 Jogador {player_id} VENCEU! O Núcleo Arcano do inimigo foi destruído! 🎉🎉🎉", is_critical=True)
+                declare_winner(player_id, 'core')
+        success = True
+
+    elif card_name == "Feitiço: Escudo Etéreo":
+        if not target_unit_id:
+            add_event_message("Erro: Escudo Etéreo requer um alvo.")
+            return False
+
+        target_unit = state.units.get(target_unit_id)
+        # Com nevoeiro de guerra, um alvo fora da visão é tratado como inexistente (sem revelar a posição)
+        if not target_unit or not is_hex_visible(player_id, target_unit['cell']):
+            add_event_message(f"Erro: Alvo '{target_unit_id}' não encontrado para Escudo Etéreo.")
+            return False
+        
+        if target_unit['player'] != player_id:
+            add_event_message("Erro: Não podes usar Escudo Etéreo numa unidade inimiga.")
+            return False
+
+        shield_amount = 3
+        target_unit['hp'] = min(target_unit['max_hp'], target_unit['hp'] + shield_amount) 
+        state.dirty_units.add(target_unit_id)
+        add_event_message(f"Escudo Etéreo aplicado a {target_unit['type']} (ID: {target_unit_id}). Cura {shield_amount} HP.")
+        success = True
+
+    elif card_name == "Feitiço: Reflexo Estratégico":
+        cards_drawn = 0
+        for _ in range(2):
+            if len(state.hand[player_id]) < MAX_HAND_SIZE: 
+                new_card = random.choice(list(CARD_DATA.keys()))
+                state.hand[player_id].append(new_card)
+                cards_drawn += 1
+            else:
+                add_event_message("Mão cheia, não foi possível comprar mais cartas.")
+                break
+        add_event_message(f"Reflexo Estratégico jogado. Compraste {cards_drawn} cartas.")
+        success = True
+
+    elif card_name == "Feitiço: Translocação Rápida":
+        if not target_unit_id or target_coords is None:
+            add_event_message("Erro: Translocação Rápida requer uma unidade alvo e uma posição alvo.")
+            return False
+
+        unit_to_move = state.units.get(target_unit_id)
+        if not unit_to_move or unit_to_move['player'] != player_id:
+            add_event_message(f"Erro: Unidade '{target_unit_id}' não encontrada ou não é aliada para Translocação Rápida.")
+            return False
+        if not is_valid_coord(target_coords):
+            add_event_message(f"Erro: Coordenadas '{target_coords}' são inválidas para Translocação Rápida.")
+            return False
+
+        uid_at_target, occupant_at_target = get_unit_at_coords_streamlit(target_coords)
+        if occupant_at_target:
+            add_event_message(f"Erro: Hexágono {coord_label(target_coords)} está ocupado para Translocação Rápida.")
+            return False
+
+        current_unit_coords = unit_to_move['cell']
+        distance = calculate_distance(current_unit_coords, target_coords)
+        if distance != 1:
+            add_event_message(f"Erro: Translocação Rápida move apenas 1 hexágono. Distância para {coord_label(target_coords)} é {distance}.")
+            return False
+        
+        # Guarda as coordenadas antes de mover para o feedback visual do feitiço
+        state.last_moved_unit = target_unit_id
+        state.last_move_from = current_unit_coords
+        state.last_move_to = target_coords
+
+        relocate_unit(target_unit_id, target_coords)
+        add_event_message(f"Unidade {unit_to_move['type']} (ID: {target_unit_id}) translocada para {coord_label(target_coords)}.")
+        success = True
+
+    else:
+        add_event_message(f"Erro: Feitiço '{card_name}' não implementado ou inválido.")
+        return False
+        
+    bump_state_version()
+    update_mystic_zone_control() 
+    return success
+
+# --- POSITION EVALUATION ---
+# Avaliação linear da posição: soma ponderada de características (jogador menos inimigo).
+# Os pesos são ajustados a partir de jogos de self-play (arcanum_eval.py) e lidos de um
+# ficheiro JSON versionado quando o módulo é importado.
+
+EVAL_WEIGHTS_VERSION = 1
+EVAL_WEIGHTS_PATH = os.environ.get('ARCANUM_EVAL_WEIGHTS',
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), 'arcanum_eval_weights.json'))
+EVAL_FEATURES = (['bias', 'core_hp']
+                 + [f'material:{unit_type}' for unit_type in UNIT_DATA if unit_type != 'Arcane Core']
+                 + ['zones', 'zone_distance', 'mana', 'hand'])
+DEFAULT_EVAL_WEIGHTS = {'core_hp': 0.1, 'zones': 0.5, 'zone_distance': 0.05, 'mana': 0.05, 'hand': 0.05,
+                        **{name: 0.3 for name in EVAL_FEATURES if name.startswith('material:')}}
+
+def extract_features(player_id, units=None):
+    """
+    Features of the position for player_id in EVAL_FEATURES order, each as own minus enemy.
+    `units` defaults to state.units; a zone belongs to the unit standing on it and
+    zone_distance is the enemy's summed distance to the zones minus the player's.
+    """
+    if units is None:
+        units = state.units
+    enemy_id = 2 if player_id == 1 else 1
+    sign = {player_id: 1, enemy_id: -1}
+    no_unit_distance = len(BOARD_COLS) + len(BOARD_ROWS) # Distância usada quando o jogador não tem unidades
+
+    core_hp = 0
+    material = dict.fromkeys(UNIT_DATA, 0)
+    positions = {}
+    mobile_coords = {player_id: [], enemy_id: []}
+    for unit in units.values():
+        s = sign.get(unit['player'], 0)
+        coords = unit['cell']
+        positions[coords] = unit['player']
+        if unit['type'] == 'Arcane Core':
+            core_hp += s * unit['hp']
+        else:
+            material[unit['type']] += s
+            mobile_coords[unit['player']].append(coords)
+
+    zones = 0
+    zone_distance = 0
+    for zone_coords in MYSTIC_ZONES:
+        zones += sign.get(positions.get(zone_coords), 0)
+        for pid in (player_id, enemy_id):
+            nearest = min((calculate_distance(coords, zone_coords) for coords in mobile_coords[pid]),
+                          default=no_unit_distance)
+            zone_distance -= sign[pid] * nearest
+
+    return ([1.0, float(core_hp)]
+            + [float(material[name.split(':', 1)[1]]) for name in EVAL_FEATURES[2:-4]]
+            + [float(zones), float(zone_distance),
+               float(state.mana.get(player_id, 0) - state.mana.get(enemy_id, 0)),
+               float(len(state.hand.get(player_id, [])) - len(state.hand.get(enemy_id, [])))])
+
+def load_eval_weights(path=EVAL_WEIGHTS_PATH):
+    """
+    Reads a weights file ({'version', 'features', 'weights'}) and returns the weights in EVAL_FEATURES order.
+    Features missing from the file weigh 0. Raises ValueError for another file version.
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != EVAL_WEIGHTS_VERSION:
+        raise ValueError(f"Versão de pesos {data.get('version')} não suportada (esperada {EVAL_WEIGHTS_VERSION}).")
+    weights = dict(zip(data['features'], data['weights']))
+    return [float(weights.get(name, 0.0)) for name in EVAL_FEATURES]
+
+try:
+    EVAL_WEIGHTS = load_eval_weights()
+except (OSError, ValueError, KeyError):
+    EVAL_WEIGHTS = [DEFAULT_EVAL_WEIGHTS.get(name, 0.0) for name in EVAL_FEATURES]
+
+def evaluate_position(player_id, units=None):
+    """Linear evaluation of the position for player_id (higher is better)."""
+    return sum(w * f for w, f in zip(EVAL_WEIGHTS, extract_features(player_id, units)))
+
+def evaluate_attack(attacker_id, target_id):
+    """
+    Change in the evaluation for the attacker's player if attacker_id hits target_id, without changing
+    the game. Only the target's terms move: its core HP, or on a kill its material, zone and zone distance.
+    """
+    attacker = state.units[attacker_id]
+    target = state.units[target_id]
+    weights = dict(zip(EVAL_FEATURES, EVAL_WEIGHTS))
+    sign = 1 if target['player'] == attacker['player'] else -1
+    is_core = target['type'] == 'Arcane Core'
+    if target['hp'] > attacker['atk']:
+        return -sign * weights['core_hp'] * attacker['atk'] if is_core else 0.0
+
+    change = -sign * (weights['core_hp'] * target['hp'] if is_core else weights[f"material:{target['type']}"])
+    if target['cell'] in MYSTIC_ZONES:
+        change -= sign * weights['zones']
+    if not is_core:
+        # A distância às zonas só muda onde o alvo era a unidade móvel mais próxima do seu jogador
+        others = [unit['cell'] for uid, unit in state.units.items()
+                  if uid != target_id and unit['player'] == target['player'] and unit['type'] != 'Arcane Core']
+        for zone_coords in MYSTIC_ZONES:
+            distance = calculate_distance(target['cell'], zone_coords)
+            nearest = min((calculate_distance(coords, zone_coords) for coords in others),
+                          default=len(BOARD_COLS) + len(BOARD_ROWS))
+            if nearest > distance:
+                change -= sign * weights['zone_distance'] * (nearest - distance)
+    return change
+
+
+# --- AI POLICY CACHE ---
+# Plano da AI (lista de movimentos e ataques) por posição canónica, guardado em SQLite (modo WAL)
+# e partilhado por todos os processos do servidor. Como todos os jogos começam na mesma disposição,
+# os turnos iniciais da AI passam a ser consultas e a cache persiste entre reinícios.
+
+POLICY_CACHE_PATH = os.environ.get('ARCANUM_POLICY_CACHE',
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), 'arcanum_policy_cache.sqlite3'))
+POLICY_CACHE_CONNECTIONS = threading.local() # Uma ligação por thread (sqlite3 não partilha ligações entre threads)
+
+def configure_policy_cache(path):
+    """Points the AI policy cache at another SQLite file; None or '' disables it."""
+    global POLICY_CACHE_PATH
+    POLICY_CACHE_PATH = path or None
+    POLICY_CACHE_CONNECTIONS.__dict__.clear()
+
+def get_policy_cache_connection():
+    """Opens (once per thread) the cache database, or returns None if it is disabled or unavailable."""
+    if not POLICY_CACHE_PATH:
+        return None
+    connection = getattr(POLICY_CACHE_CONNECTIONS, 'connection', None)
+    if connection is not None and POLICY_CACHE_CONNECTIONS.path == POLICY_CACHE_PATH:
+        return connection
+
+    import sqlite3 # Importado só quando a AI joga, para manter o import do motor leve
+    try:
+        connection = sqlite3.connect(POLICY_CACHE_PATH, timeout=1.0, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS ai_policy ("
+            " state_hash BLOB PRIMARY KEY, plan TEXT NOT NULL, created REAL NOT NULL,"
+            " last_used REAL NOT NULL) WITHOUT ROWID")
+        connection.execute("CREATE INDEX IF NOT EXISTS ai_policy_last_used ON ai_policy (last_used)")
+    except sqlite3.Error:
+        return None
+    POLICY_CACHE_CONNECTIONS.connection = connection
+    POLICY_CACHE_CONNECTIONS.path = POLICY_CACHE_PATH
+    return connection
+
+def get_policy_state_hash():
+    """
+    Hash of everything the AI decision depends on: units (sorted by position, so unit IDs do not matter),
+    board, zones, evaluation weights, the fog-of-war rule and the cache version.
+    """
+    import hashlib
+    units = sorted((unit['cell'], unit['type'], unit['player'], unit['hp'], unit['max_hp'],
+                    unit['mv_remaining'], unit['max_mv'], unit['ap_remaining'], unit['atk'], unit['range'])
+                   for unit in state.units.values())
+    canonical = repr((POLICY_CACHE_VERSION, len(BOARD_COLS), len(BOARD_ROWS), MYSTIC_ZONES, MYSTIC_ZONES_TO_WIN,
+                      EVAL_WEIGHTS, state.fog_of_war, state.current_turn, units))
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).digest()
+
+def lookup_policy(state_hash):
+    """
+    Returns the cached plan for state_hash (list of (action, from_coords, to_coords)) or None.
+    Hits are counted per game in state.policy_cache_stats; the file only keeps last_used for eviction.
+    """
+    connection = get_policy_cache_connection()
+    if connection is None:
+        return None
+    import sqlite3
+    try:
+        row = connection.execute("SELECT plan, last_used FROM ai_policy WHERE state_hash = ?", (state_hash,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > POLICY_CACHE_TOUCH_SECONDS:
+            connection.execute("UPDATE ai_policy SET last_used = ? WHERE state_hash = ?", (now, state_hash))
+    except sqlite3.Error:
+        return None
+    return [tuple(step) for step in json.loads(row[0])]
+
+def store_policy(state_hash, plan):
+    """Saves a plan, evicting the least recently used plans when the file exceeds POLICY_CACHE_MAX_ENTRIES."""
+    connection = get_policy_cache_connection()
+    if connection is None:
+        return
+    import sqlite3
+    now = time.time()
+    try:
+        connection.execute("INSERT OR REPLACE INTO ai_policy (state_hash, plan, created, last_used) VALUES (?, ?, ?, ?)",
+                           (state_hash, json.dumps(plan), now, now))
+        (count,) = connection.execute("SELECT COUNT(*) FROM ai_policy").fetchone()
+        if count > POLICY_CACHE_MAX_ENTRIES:
+            evict = count - POLICY_CACHE_MAX_ENTRIES + int(POLICY_CACHE_MAX_ENTRIES * POLICY_CACHE_EVICT_FRACTION)
+            connection.execute("DELETE FROM ai_policy WHERE state_hash IN "
+                               "(SELECT state_hash FROM ai_policy ORDER BY last_used LIMIT ?)", (evict,))
+    except sqlite3.Error:
+        pass # A cache é opcional: a AI continua a jogar sem ela
+
+def replay_ai_plan(plan):
+    """Plays a cached plan. Returns False (leaving the actions already played) if an action is no longer legal."""
+    for action, from_coords, to_coords in plan:
+        unit_id = state.unit_positions.get(from_coords)
+        if unit_id is None:
+            return False
+        if action == 'move':
+            if not move_unit_streamlit(unit_id, to_coords):
+                return False
+        else:
+            target_id = state.unit_positions.get(to_coords)
+            if target_id is None or not attack_unit_streamlit(unit_id, target_id):
+                return False
+    return True
+
+def get_policy_cache_stats():
+    """AI turns of this game answered from the policy cache and turns that had to be computed."""
+    stats = state.policy_cache_stats
+    return {'hits': stats['hits'], 'misses': stats['misses']}
+
+
+# --- AI LOGIC FUNCTIONS ---
+
+def get_player_units(player_id):
+    """Retorna um dicionário de unidades pertencentes a um jogador específico."""
+    return {uid: unit for uid, unit in state.units.items() if unit['player'] == player_id}
+
+def find_targets_in_range(attacker_id_str):
+    """Encontra unidades inimigas dentro do alcance do atacante."""
+    attacker = state.units.get(attacker_id_str)
+    if not attacker or attacker['ap_remaining'] <= 0 or attacker.get('atk', 0) <= 0:
+        return []
+
+    targets_coords = [coords for coords in get_valid_attack_targets_for_unit(attacker_id_str)
+                      if is_hex_visible(attacker['player'], coords)]
+    
+    # Ordena por ID para a escolha do alvo ser determinística
+    return sorted((state.unit_positions[coords] for coords in targets_coords), key=int)
+
+def solve_assignment(cost_matrix):
+    """
+    Hungarian algorithm (Kuhn-Munkres) in O(n^2 * m).
+    cost_matrix has n rows and m >= n columns; returns the column assigned to each row.
+    """
+    n = len(cost_matrix)
+    if n == 0:
+        return []
+    m = len(cost_matrix[0])
+
+    u = [0] * (n + 1)
+    v = [0] * (m + 1)
+    p = [0] * (m + 1) # p[j]: linha atribuída à coluna j (1-indexado, 0 = livre)
+    way = [0] * (m + 1)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [float('inf')] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            delta = float('inf')
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = cost_matrix[i0 - 1][j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while True:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+            if j0 == 0:
+                break
+
+    assignment = [-1] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            assignment[p[j] - 1] = j - 1
+    return assignment
+
+def get_ai_objectives(enemy_player_id):
+    """
+    Objetivos da AI: zonas místicas livres ou do inimigo, unidades inimigas visíveis e o Núcleo inimigo
+    (a posição inicial é conhecida mesmo com nevoeiro de guerra).
+    Retorna uma lista de (tipo_objetivo, coords) e as coordenadas do Núcleo inimigo (ou None).
+    """
+    ai_player_id = 1 if enemy_player_id == 2 else 2
+    objectives = []
+    for zone_coords in MYSTIC_ZONES:
+        controller = state.mystic_zone_control.get(zone_coords)
+        if controller is None or controller == enemy_player_id:
+            objectives.append(('zone', zone_coords))
+
+    enemy_core_coords = None
+    for uid, unit in get_player_units(enemy_player_id).items():
+        if unit['type'] == 'Arcane Core':
+            enemy_core_coords = unit['cell']
+        elif is_hex_visible(ai_player_id, unit['cell']):
+            objectives.append(('enemy', unit['cell']))
+    if enemy_core_coords is not None:
+        objectives.append(('core', enemy_core_coords))
+
+    return objectives, enemy_core_coords
+
+def plan_ai_assignments(unit_ids, objectives, enemy_core_coords):
+    """
+    Atribui cada unidade da AI a um objetivo resolvendo um único problema de atribuição para o turno.
+    Retorna {unit_id: (tipo_objetivo, coords)}.
+    """
+    if not unit_ids or not objectives:
+        return {}
+
+    # O problema precisa de pelo menos tantos objetivos quanto unidades: o Núcleo inimigo aceita várias
+    objectives = list(objectives)
+    base_objectives = list(objectives)
+    while len(objectives) < len(unit_ids):
+        if enemy_core_coords is not None:
+            objectives.append(('core', enemy_core_coords))
+        else:
+            objectives.extend(base_objectives)
+
+    cost_matrix = []
+    for uid in unit_ids:
+        unit = state.units[uid]
+        unit_coords = unit['cell']
+
+        row = []
+        for kind, objective_coords in objectives:
+            dist = calculate_distance(unit_coords, objective_coords)
+            if dist == float('inf'):
+                row.append(AI_UNREACHABLE_COST)
+                continue
+            if kind != 'zone': # Basta chegar ao alcance de ataque
+                dist = max(0, dist - unit['range'])
+            row.append(dist - AI_OBJECTIVE_BONUS[kind])
+        cost_matrix.append(row)
+
+    assignment = solve_assignment(cost_matrix)
+    return {uid: objectives[col] for uid, col in zip(unit_ids, assignment)}
+
+def build_objective_field(objectives):
+    """
+    BFS multi-origem a partir de todos os objetivos: para cada hexágono, (distância, tipo) do objetivo
+    mais próximo. Usado em vez do problema de atribuição quando a AI tem demasiadas unidades.
+    """
+    field = {}
+    q = collections.deque()
+    for kind, objective_coords in objectives:
+        if objective_coords not in field:
+            field[objective_coords] = (0, kind)
+            q.append(objective_coords)
+
+    while q:
+        current_coords = q.popleft()
+        dist, kind = field[current_coords]
+        for neighbor in get_adjacent_hexes(current_coords):
+            if neighbor not in field:
+                field[neighbor] = (dist + 1, kind)
+                q.append(neighbor)
+
+    return field
+
+def find_step_on_field(current_coords, field):
+    """Escolhe o hexágono vizinho livre com menor distância no campo de objetivos (ou None)."""
+    best_next_move = None
+    smallest_remaining_dist = field[current_coords][0]
+
+    for neighbor_coords in get_adjacent_hexes(current_coords):
+        occupant_uid, occupant_data = get_unit_at_coords_streamlit(neighbor_coords)
+        if occupant_data:
+            continue
+        if field[neighbor_coords][0] < smallest_remaining_dist:
+            smallest_remaining_dist = field[neighbor_coords][0]
+            best_next_move = neighbor_coords
+
+    return best_next_move
+
+def plan_path_move(unit, kind, objective_coords, use_path_cache=True):
+    """
+    Percorre o caminho A* até ao objetivo gastando todo o MV restante. Para objetivos de ataque
+    pára assim que o alvo fica ao alcance. Retorna (destino, caminho restante) ou (None, None).
+    Com use_path_cache=False o caminho é sempre recalculado (planos guardados na cache de planos).
+    """
+    current_coords = unit['cell']
+    path = get_path(current_coords, objective_coords) if use_path_cache else find_path(current_coords, objective_coords)
+    if not path:
+        return None, None
+
+    steps_taken = 0
+    for step_coords in path[:unit['mv_remaining']]:
+        if step_coords in state.unit_positions: # Destino ocupado (inimigo ou zona tomada)
+            break
+        steps_taken += 1
+        if kind != 'zone' and calculate_distance(step_coords, objective_coords) <= unit['range']:
+            break
+
+    if steps_taken == 0:
+        return None, None
+    return path[steps_taken - 1], path[steps_taken:]
+
+def plan_field_move(unit, field):
+    """Desce o campo de objetivos por hexágonos livres, até esgotar o MV ou chegar ao alcance."""
+    current_coords = unit['cell']
+    destination = None
+    for _ in range(unit['mv_remaining']):
+        dist, kind = field[current_coords]
+        if dist == 0 or (kind != 'zone' and dist <= unit['range']):
+            break
+        next_coords = find_step_on_field(current_coords, field)
+        if next_coords is None:
+            break
+        current_coords = destination = next_coords
+    return destination
+
+def ai_try_attack(unit_id, plan):
+    unit = state.units[unit_id]
+    if unit['ap_remaining'] > 0 and unit.get('atk', 0) > 0:
+        targets_in_range = find_targets_in_range(unit_id)
+        if targets_in_range:
+            # Com vários alvos, escolhe o que deixa a melhor posição segundo a avaliação linear
+            target_id = max(targets_in_range, key=lambda tid: evaluate_attack(unit_id, tid)) if len(targets_in_range) > 1 else targets_in_range[0]
+            target = state.units[target_id]
+            target_coords = target['cell']
+            if attack_unit_streamlit(unit_id, target_id):
+                plan.append(('attack', unit['cell'], target_coords))
+            return True
+    return False
+
+def play_ai_turn_with_rollouts():
+    """
+    Plays the AI turn with the rollout search of this process (ARCANUM_AI_ROLLOUT_WORKERS workers).
+    Returns False, without playing, if the position does not fit the vectorized rules.
+    """
+    import arcanum_rollouts # NumPy só quando a AI usa rollouts
+    try:
+        arcanum_rollouts.play_process_ai_turn(AI_ROLLOUT_WORKERS, AI_ROLLOUT_BUDGET_MS)
+    except ValueError: # Demasiadas unidades ou tabuleiro demasiado grande para ArcanumVecEnv
+        return False
+    return True
+
+def ai_turn_logic():
+    ai_player_id = 2
+    enemy_player_id = 1
+
+    add_event_message("--- Turno da AI (Jogador 2) ---")
+
+    update_mystic_zone_control() 
+
+    # A procura por rollouts vê o tabuleiro todo: com nevoeiro de guerra a AI usa sempre o planeador
+    if AI_ROLLOUT_WORKERS is not None and not state.fog_of_war and play_ai_turn_with_rollouts():
+        add_event_message("--- Fim do Turno da AI ---")
+        return
+
+    # Turnos iniciais repetem-se entre jogos: tenta primeiro o plano guardado para esta posição
+    state_hash = None
+    if POLICY_CACHE_PATH and state.turn_number <= POLICY_CACHE_MAX_TURN:
+        state_hash = get_policy_state_hash()
+        cached_plan = lookup_policy(state_hash)
+        if cached_plan is not None and replay_ai_plan(cached_plan):
+            state.policy_cache_stats['hits'] += 1
+            add_event_message("--- Fim do Turno da AI ---")
+            return
+        if cached_plan is not None:
+            state_hash = None # A posição mudou a meio do plano: não é a posição guardada
+        state.policy_cache_stats['misses'] += 1
+    plan = []
+
+    ai_unit_ids = list(get_player_units(ai_player_id).keys())
+    mobile_unit_ids = []
+    for uid in ai_unit_ids:
+        unit = state.units[uid]
+        if unit['type'] == 'Arcane Core' or unit['mv_remaining'] <= 0:
+            continue
+        if unit['cell'] in MYSTIC_ZONES: # Unidades em zonas místicas mantêm a posição
+            continue
+        mobile_unit_ids.append(uid)
+
+    objectives, enemy_core_coords = get_ai_objectives(enemy_player_id)
+    assignments = {}
+    objective_field = None
+    if len(mobile_unit_ids) <= AI_PLANNER_MAX_UNITS:
+        assignments = plan_ai_assignments(mobile_unit_ids, objectives, enemy_core_coords)
+    elif objectives:
+        objective_field = build_objective_field(objectives)
+
+    for unit_id in ai_unit_ids:
+        if unit_id not in state.units:
+            continue
+
+        unit = state.units[unit_id]
+
+        if unit['player'] != ai_player_id or unit['type'] == 'Arcane Core':
+            continue
+
+        # PRIORIDADE 1: Atacar se possível
+        if ai_try_attack(unit_id, plan):
+            continue 
+
+        # PRIORIDADE 2: Avançar para o objetivo atribuído pelo planeador (ou descer o campo de objetivos)
+        if unit['mv_remaining'] <= 0:
+            continue
+        current_coords = unit['cell']
+
+        destination = remaining_path = None
+        if unit_id in assignments:
+            kind, objective_coords = assignments[unit_id]
+            if kind != 'zone' and calculate_distance(current_coords, objective_coords) <= unit['range']:
+                continue # Já está ao alcance do alvo
+            # Um plano que vai para a cache de planos não pode depender dos caminhos guardados em turnos
+            # anteriores (não fazem parte de get_policy_state_hash): nesse caso o caminho é recalculado
+            destination, remaining_path = plan_path_move(unit, kind, objective_coords, use_path_cache=state_hash is None)
+        elif objective_field is not None and unit_id in mobile_unit_ids:
+            destination = plan_field_move(unit, objective_field)
+
+        if destination is not None and move_unit_streamlit(unit_id, destination):
+            plan.append(('move', current_coords, destination))
+            if remaining_path:
+                # O resto do caminho fica em cache para o próximo turno
+                store_path(destination, assignments[unit_id][1], remaining_path)
+            # PRIORIDADE 3: Atacar depois de avançar
+            ai_try_attack(unit_id, plan)
+
+    if state_hash is not None:
+        store_policy(state_hash, plan)
+    add_event_message("--- Fim do Turno da AI ---")
+
+# --- TURN MANAGEMENT FUNCTIONS ---
+
+def start_turn_streamlit():
+    player_id = state.current_turn
+    
+    update_mystic_zone_control()
+
+    player_to_check_for_victory = 1 if player_id == 2 else 2
+
+    if check_mystic_zone_victory(player_to_check_for_victory):
+        state.game_over = True 
+        return 
+
+    state.mana[player_id] += 1
+    add_event_message(f"--- Turno {state.turn_number} do Jogador {player_id} Começa ---")
+    
+    if player_id in DRAWING_PLAYERS and len(state.hand[player_id]) < MAX_HAND_SIZE:
+        new_card = random.choice(list(CARD_DATA.keys()))
+        state.hand[player_id].append(new_card)
+        add_event_message(f"Jogador {player_id} desenhou uma carta: {new_card}.")
+    elif player_id in DRAWING_PLAYERS and len(state.hand[player_id]) >= MAX_HAND_SIZE:
+        add_event_message(f"Jogador {player_id} não desenhou carta (mão cheia).")
+        
+    add_event_message(f"Jogador {player_id} agora tem {state.mana[player_id]} Mana.")
+
+    for uid, unit in state.units.items():
+        if unit['player'] == player_id:
+            unit['mv_remaining'] = unit['max_mv'] 
+            unit['ap_remaining'] = 1
+            state.dirty_units.add(uid)
+    bump_state_version()
+
+def end_turn_streamlit():
+    end_turn_start = time.perf_counter()
+    metrics.touch_game(state.metrics_game_id)
+    add_event_message(f"--- Turno do Jogador {state.current_turn} Termina ---")
+    
+    player_id = state.current_turn
+    
+    update_mystic_zone_control()
+
+    if len(state.hand[player_id]) > MAX_HAND_SIZE:
+        add_event_message(f"Mão do Jogador {player_id} está cheia. Descartar cartas (lógica a implementar).")
+
+    state.current_turn = 2 if state.current_turn == 1 else 1
+    state.turn_number += 1
+    state.selected_unit = None 
+    state.valid_moves = set() 
+    state.valid_attacks = set() 
+    state.invocation_mode = False
+    state.unit_type_to_invoke = None
+    state.valid_invocations = set()
+    # Limpar estados de feedback visual de turnos anteriores
+    state.last_moved_unit = None
+    state.last_move_from = None
+    state.last_move_to = None
+    state.last_attack_info = None
+
+    if state.current_turn == 2 and not state.game_over:
+        # Repõe MV/AP das unidades da AI e verifica a vitória por zonas do Jogador 1
+        start_turn_streamlit()
+        if not state.game_over:
+            nodes_before = state.path_cache_stats['nodes']
+            with metrics.AI_TURN_SECONDS.time():
+                ai_turn_logic()
+            metrics.AI_PATH_NODES.observe(state.path_cache_stats['nodes'] - nodes_before)
+        state.current_turn = 1
+        add_event_message("--- Turno da AI concluído. Turno do Jogador 1 começa ---")
+        if not state.game_over:
+            start_turn_streamlit() 
+    elif not state.game_over: 
+        start_turn_streamlit() 
+
+    record_history(f"Início do turno {state.turn_number}", turn_start=True)
+    metrics.END_TURN_SECONDS.observe(time.perf_counter() - end_turn_start)
+
+def get_valid_moves_for_unit(unit_id):
+    return cached_query('moves', unit_id, lambda: compute_valid_moves_for_unit(unit_id))
+
+def get_valid_attack_targets_for_unit(unit_id):
+    return cached_query('attacks', unit_id, lambda: compute_valid_attack_targets_for_unit(unit_id))
+
+def get_valid_invocation_hexes(player_id, unit_type):
+    # O raio de invocação não depende do tipo de unidade, apenas do Núcleo do jogador
+    return cached_query('invocations', player_id, lambda: compute_valid_invocation_hexes(player_id))
+
+def compute_valid_moves_for_unit(unit_id):
+    unit = state.units.get(unit_id)
+    if not unit or unit['mv_remaining'] <= 0 or unit['type'] == 'Arcane Core':
+        return set()
+
+    start_coords = unit['cell']
+    max_mv = unit['mv_remaining']
+    
+    q = collections.deque([(start_coords, 0)])
+    reachable_hexes = set()
+    visited_with_cost = {start_coords: 0}
+    unit_positions = state.unit_positions
+
+    while q:
+        current_coords, current_cost = q.popleft()
+        
+        for neighbor in CELL_NEIGHBORS[current_coords]:
+            if neighbor in unit_positions: # Hexágono ocupado
+                continue 
+            
+            move_cost = 1 
+
+            new_total_cost = current_cost + move_cost
+            
+            if neighbor in visited_with_cost and new_total_cost >= visited_with_cost[neighbor]:
+                continue
+
+            if new_total_cost <= max_mv:
+                visited_with_cost[neighbor] = new_total_cost
+                reachable_hexes.add(neighbor)
+                q.append((neighbor, new_total_cost))
+                
+    return reachable_hexes
+
+def compute_valid_attack_targets_for_unit(unit_id):
+    unit = state.units.get(unit_id)
+    if not unit or unit['ap_remaining'] <= 0 or unit.get('atk', 0) <= 0 or unit['type'] == 'Arcane Core':
+        return set()
+
+    attacker_coords = unit['cell']
+    enemy_player_id = 1 if unit['player'] == 2 else 2
+    
+    # Percorre apenas os hexágonos ao alcance, não todas as unidades do tabuleiro
+    valid_targets_coords = set()
+    for target_coords in get_hex_disk(attacker_coords, unit['range']):
+        target_uid, target_unit = get_unit_at_coords_streamlit(target_coords)
+        if target_unit and target_unit['player'] == enemy_player_id:
+            valid_targets_coords.add(target_coords)
+                
+    return valid_targets_coords
+
+def compute_valid_invocation_hexes(player_id):
+    valid_hexes = set()
+    player_core = None
+    for uid, unit in state.units.items():
+        if unit['player'] == player_id and unit['type'] == 'Arcane Core':
+            player_core = unit
+            break
+    
+    if not player_core:
+        return set()
+
+    core_coords = player_core['cell']
+    
+    for current_coords in get_hex_disk(core_coords, 2): # Raio de 2 hexágonos
+        uid_at_target, unit_at_target = get_unit_at_coords_streamlit(current_coords)
+        if not unit_at_target:
+            valid_hexes.add(current_coords)
+                
+    return valid_hexes
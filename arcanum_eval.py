@@ -0,0 +1,190 @@
+"""
+Fits the linear position evaluation used by the AI (arcanum_engine.evaluate_position)
+from self-play games of the vectorized environment.
+
+Features are the ones in arcanum_engine.EVAL_FEATURES (own minus enemy, for the
+player to act). Games are played by a noisy greedy policy (uniformly random play
+almost never ends a game). Every sampled position is labelled with the final result of its
+game for that player; games that hit the turn limit are dropped.
+
+    python arcanum_eval.py [--envs 1024] [--steps 1000] [--noise 1.0] [--method logistic|lstsq] [--out arcanum_eval_weights.json]
+
+batch_features and evaluate_batch score a whole ArcanumVecEnv batch (thousands
+of positions) with a couple of array operations.
+
+Requires NumPy.
+"""
+import argparse
+import json
+
+import numpy as np
+
+import arcanum_engine as engine
+from arcanum_vecenv import ArcanumVecEnv, CORE_TYPE, UNIT_TYPES
+
+MATERIAL_TYPES = [name.split(':', 1)[1] for name in engine.EVAL_FEATURES if name.startswith('material:')]
+
+
+def batch_features(env):
+    """[B, len(EVAL_FEATURES)] float32 features of every game, for the player to act."""
+    b = env.num_envs
+    envs = np.arange(b)
+    cur = env.current[:, None]
+    alive = env.unit_type >= 0
+    sign = np.where(alive, np.where(env.unit_player == cur, 1, -1), 0)
+
+    is_core = env.unit_type == CORE_TYPE
+    core_hp = (sign * is_core * env.unit_hp).sum(axis=1)
+    material = np.stack([(sign * (env.unit_type == UNIT_TYPES.index(t))).sum(axis=1) for t in MATERIAL_TYPES], axis=1)
+
+    occupant = env.occupancy[:, env.zone_cells] # [B, Z]
+    zones = np.where(occupant >= 0, sign[envs[:, None], np.maximum(occupant, 0)], 0).sum(axis=1)
+
+    # Distância de cada zona à unidade móvel mais próxima de cada jogador
+    dist = env.distance[env.unit_cell[:, :, None], env.zone_cells[None, None, :]] # [B, U, Z]
+    no_unit_distance = env.num_cols + env.num_rows
+    mobile = alive & ~is_core
+    own_near = np.where((mobile & (sign > 0))[:, :, None], dist, no_unit_distance).min(axis=1).sum(axis=1)
+    enemy_near = np.where((mobile & (sign < 0))[:, :, None], dist, no_unit_distance).min(axis=1).sum(axis=1)
+
+    other = 3 - env.current
+    mana = env.mana[envs, env.current] - env.mana[envs, other]
+    hand = (env.hand[envs, env.current] >= 0).sum(axis=1) - (env.hand[envs, other] >= 0).sum(axis=1)
+
+    return np.column_stack([np.ones(b), core_hp, material, zones, enemy_near - own_near, mana, hand]).astype(np.float32)
+
+
+def evaluate_batch(features, weights):
+    """Scores [N, F] features with the weights in EVAL_FEATURES order."""
+    return np.asarray(features, dtype=np.float32) @ np.asarray(weights, dtype=np.float32)
+
+
+def scripted_actions(env, rng, noise=1.0):
+    """
+    Noisy greedy policy for data collection: attacks first, then cards and moves towards the
+    enemy core, ending the turn otherwise. Uniform noise in [0, noise) keeps the games varied.
+    """
+    b = env.num_envs
+    scores = rng.random(env.masks.shape, dtype=np.float32) * noise
+    scores[:, 0] += 0.2
+    scores[:, env.attack_offset:env.card_offset] += 2.0
+    scores[:, env.card_offset:] += 0.5
+
+    enemy_core = np.maximum(env.core_cells(3 - env.current), 0)
+    after_move = np.maximum(env.neighbors[env.unit_cell], 0) # [B, U, 6]
+    closer = env.distance[enemy_core[:, None], env.unit_cell][:, :, None] > env.distance[enemy_core[:, None, None], after_move]
+    scores[:, env.move_offset:env.attack_offset] += closer.reshape(b, -1)
+
+    scores[~env.masks] = -np.inf
+    return scores.argmax(axis=1)
+
+
+def collect_self_play(num_envs, steps, noise=1.0, seed=None):
+    """
+    Plays scripted_actions in every seat and returns (features [N, F], outcome [N], game [N]) where
+    outcome is 1 if the player to act at that position went on to win and 0 if they lost.
+    """
+    rng = np.random.default_rng(seed)
+    env = ArcanumVecEnv(num_envs, seed=seed)
+    env.reset()
+    game_ids = np.arange(num_envs)
+    next_game_id = num_envs
+    features, players, games, winners = [], [], [], {}
+
+    for _ in range(steps):
+        features.append(batch_features(env))
+        players.append(env.current.copy())
+        games.append(game_ids.copy())
+
+        _, _, terminated, truncated, info = env.step(scripted_actions(env, rng, noise))
+
+        for e in np.flatnonzero(terminated):
+            winners[int(game_ids[e])] = int(info['winner'][e])
+        done = np.flatnonzero(terminated | truncated)
+        game_ids[done] = next_game_id + np.arange(len(done))
+        next_game_id += len(done)
+
+    features = np.concatenate(features)
+    players = np.concatenate(players)
+    games = np.concatenate(games)
+    winner_by_game = np.zeros(next_game_id, dtype=np.int32) # 0 = jogo inacabado ou truncado
+    winner_by_game[list(winners)] = list(winners.values())
+    winner = winner_by_game[games]
+    finished = winner > 0
+    return features[finished], (winner[finished] == players[finished]).astype(np.float32), games[finished]
+
+
+def fit_weights(features, outcome, method='logistic', l2=1e-3, iterations=25):
+    """
+    Fits weights with least squares on a ±1 target ('lstsq') or L2-regularized logistic
+    regression by Newton's method ('logistic'). The bias feature is not regularized.
+    """
+    x = np.asarray(features, dtype=np.float64)
+    y = np.asarray(outcome, dtype=np.float64)
+    if method == 'lstsq':
+        return np.linalg.lstsq(x, 2.0 * y - 1.0, rcond=None)[0]
+    if method != 'logistic':
+        raise ValueError(f"Método de ajuste desconhecido: {method}")
+
+    penalty = np.full(x.shape[1], l2 * len(y))
+    penalty[0] = 0.0
+    w = np.zeros(x.shape[1])
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-(x @ w)))
+        gradient = x.T @ (p - y) + penalty * w
+        hessian = (x * (p * (1.0 - p))[:, None]).T @ x + np.diag(penalty)
+        step = np.linalg.solve(hessian, gradient)
+        w -= step
+        if np.abs(step).max() < 1e-8:
+            break
+    return w
+
+
+def save_eval_weights(path, weights, metadata=None):
+    """Writes a weights file that arcanum_engine.load_eval_weights reads."""
+    data = {
+        'version': engine.EVAL_WEIGHTS_VERSION,
+        'features': list(engine.EVAL_FEATURES),
+        'weights': [round(float(w), 6) for w in weights],
+        'metadata': metadata or {},
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--envs', type=int, default=1024)
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--noise', type=float, default=1.0)
+    parser.add_argument('--method', choices=['logistic', 'lstsq'], default='logistic')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=engine.EVAL_WEIGHTS_PATH)
+    args = parser.parse_args()
+
+    features, outcome, games = collect_self_play(args.envs, args.steps, noise=args.noise, seed=args.seed)
+    if not len(outcome):
+        raise SystemExit("Nenhum jogo terminou; aumenta --steps.")
+
+    # Jogos pares para ajustar, ímpares para medir a precisão
+    train = games % 2 == 0
+    weights = fit_weights(features[train], outcome[train], method=args.method)
+    scores = evaluate_batch(features[~train], weights)
+    accuracy = float(((scores > 0) == (outcome[~train] > 0.5)).mean())
+    weights = fit_weights(features, outcome, method=args.method)
+
+    save_eval_weights(args.out, weights, {
+        'method': args.method,
+        'positions': int(len(outcome)),
+        'holdout_accuracy': round(accuracy, 4),
+        'board': [len(engine.BOARD_COLS), len(engine.BOARD_ROWS)],
+    })
+    print(f"{len(outcome)} posições, precisão (metade de validação) {accuracy:.3f}")
+    for name, w in zip(engine.EVAL_FEATURES, weights):
+        print(f"  {name:<28} {w:+.4f}")
+    print(f"Pesos guardados em {args.out}")
+
+
+if __name__ == '__main__':
+    main()
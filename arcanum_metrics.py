@@ -0,0 +1,246 @@
+"""
+In-process metrics registry for Arcanum Tactics, exported in Prometheus text format.
+
+Counters, gauges and histograms live in one process-wide registry shared by all
+sessions (thread-safe). The app and the engine record:
+
+- arcanum_rerun_seconds: Streamlit script run duration (runs cut short by st.rerun() end when the next run starts);
+- arcanum_end_turn_seconds and arcanum_ai_turn_seconds;
+- arcanum_ai_path_nodes: A* nodes expanded per AI turn;
+- arcanum_rollout_decision_seconds and arcanum_rollouts_per_decision (arcanum_rollouts);
+- arcanum_actions_total{action}: successful moves, attacks and cards (rate() gives actions/s);
+- arcanum_games_started_total and arcanum_games_finished_total{winner, reason};
+- arcanum_active_games: games not finished with activity in the last ACTIVE_GAME_TIMEOUT seconds.
+
+Export with render_prometheus(), write_prometheus(path) (atomic, for a textfile
+collector) or start_http_server(port), which serves /metrics on localhost.
+start_exporters_from_env() does this from ARCANUM_METRICS_PORT and
+ARCANUM_METRICS_FILE (written every METRICS_FILE_INTERVAL seconds).
+
+Standard library only, so the engine can import it without a startup cost.
+"""
+import bisect
+import os
+import threading
+import time
+
+ACTIVE_GAME_TIMEOUT = 1800 # Jogos sem atividade há mais do que isto deixam de contar como ativos
+METRICS_FILE_INTERVAL = 15 # Segundos entre escritas do ficheiro de métricas
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 4, 16, 64, 256, 1024, 4096, 16384, 65536, 262144)
+
+REGISTRY = [] # Métricas pela ordem de registo
+REGISTRY_LOCK = threading.RLock()
+EXPORTERS = {} # 'http' -> servidor, 'file' -> thread (um de cada por processo)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}'
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = {} # tuplo de (rótulo, valor) -> total
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted((name, str(value)) for name, value in labels.items()))
+        with REGISTRY_LOCK:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        return [(self.name, key, value) for key, value in self.values.items()]
+
+
+class Gauge:
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, compute=None):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+        self.compute = compute # Função chamada na exportação (em vez de set/inc)
+        REGISTRY.append(self)
+
+    def set(self, value):
+        self.value = value
+
+    def samples(self):
+        return [(self.name, (), self.compute() if self.compute else self.value)]
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # Último = acima do maior limite
+        self.sum = 0.0
+        self.count = 0
+        REGISTRY.append(self)
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with REGISTRY_LOCK:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """Context manager that observes the duration of its block in seconds."""
+        return HistogramTimer(self)
+
+    def samples(self):
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            samples.append((self.name + '_bucket', (('le', format_value(bound)),), cumulative))
+        samples.append((self.name + '_sum', (), self.sum))
+        samples.append((self.name + '_count', (), self.count))
+        return samples
+
+
+class HistogramTimer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+# --- JOGOS ATIVOS ---
+
+GAME_ACTIVITY = {} # id do jogo -> última atividade (time.monotonic)
+GAME_IDS = iter(range(1, 2**63))
+
+def new_game():
+    """Registers a started game and returns its metrics ID."""
+    with REGISTRY_LOCK:
+        game_id = next(GAME_IDS)
+        GAME_ACTIVITY[game_id] = time.monotonic()
+    GAMES_STARTED.inc()
+    return game_id
+
+def touch_game(game_id):
+    if game_id is not None:
+        GAME_ACTIVITY[game_id] = time.monotonic()
+
+def finish_game(game_id, winner, reason):
+    GAMES_FINISHED.inc(winner=winner, reason=reason)
+    with REGISTRY_LOCK:
+        GAME_ACTIVITY.pop(game_id, None)
+
+def count_active_games():
+    cutoff = time.monotonic() - ACTIVE_GAME_TIMEOUT
+    with REGISTRY_LOCK:
+        for game_id in [gid for gid, last_seen in GAME_ACTIVITY.items() if last_seen < cutoff]:
+            del GAME_ACTIVITY[game_id]
+        return len(GAME_ACTIVITY)
+
+
+RERUN_SECONDS = Histogram('arcanum_rerun_seconds', 'Duração de cada execução do script Streamlit.')
+END_TURN_SECONDS = Histogram('arcanum_end_turn_seconds', 'Duração de end_turn_streamlit (inclui o turno da AI).')
+AI_TURN_SECONDS = Histogram('arcanum_ai_turn_seconds', 'Duração de ai_turn_logic.')
+AI_PATH_NODES = Histogram('arcanum_ai_path_nodes', 'Nós A* expandidos por turno da AI.', COUNT_BUCKETS)
+ROLLOUT_DECISION_SECONDS = Histogram('arcanum_rollout_decision_seconds', 'Latência de cada decisão da procura por rollouts.')
+ROLLOUTS_PER_DECISION = Histogram('arcanum_rollouts_per_decision', 'Rollouts concluídos por decisão.', COUNT_BUCKETS)
+ACTIONS = Counter('arcanum_actions_total', 'Ações concluídas com sucesso, por tipo.')
+GAMES_STARTED = Counter('arcanum_games_started_total', 'Jogos iniciados.')
+GAMES_FINISHED = Counter('arcanum_games_finished_total', 'Jogos terminados, por vencedor e motivo.')
+ACTIVE_GAMES = Gauge('arcanum_active_games', 'Jogos por terminar com atividade recente.', compute=count_active_games)
+
+
+# --- EXPORTAÇÃO ---
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    with REGISTRY_LOCK: # Leitura consistente enquanto outras sessões registam valores
+        for metric in REGISTRY:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+def write_prometheus(path):
+    """Writes the metrics to path atomically (temporary file and rename)."""
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as f:
+        f.write(render_prometheus())
+    os.replace(temporary_path, path)
+
+def start_http_server(port, host='127.0.0.1'):
+    """Serves the metrics at http://host:port/metrics from a daemon thread (once per process)."""
+    if 'http' in EXPORTERS:
+        return EXPORTERS['http']
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass # Sem log por pedido
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='arcanum-metrics-http', daemon=True).start()
+    EXPORTERS['http'] = server
+    return server
+
+def start_file_writer(path, interval=METRICS_FILE_INTERVAL):
+    """Rewrites path every `interval` seconds from a daemon thread (once per process)."""
+    if 'file' in EXPORTERS:
+        return EXPORTERS['file']
+
+    def write_forever():
+        while True:
+            try:
+                write_prometheus(path)
+            except OSError:
+                pass # Diretório indisponível: tenta de novo no próximo intervalo
+            time.sleep(interval)
+
+    thread = threading.Thread(target=write_forever, name='arcanum-metrics-file', daemon=True)
+    thread.start()
+    EXPORTERS['file'] = thread
+    return thread
+
+def start_exporters_from_env():
+    """Starts the exporters configured with ARCANUM_METRICS_PORT and ARCANUM_METRICS_FILE."""
+    with REGISTRY_LOCK:
+        port = os.environ.get('ARCANUM_METRICS_PORT')
+        if port and 'http' not in EXPORTERS:
+            try:
+                start_http_server(int(port))
+            except OSError:
+                EXPORTERS['http'] = None # Porta ocupada (outro processo já exporta): não tenta de novo
+        path = os.environ.get('ARCANUM_METRICS_FILE')
+        if path:
+            start_file_writer(path)
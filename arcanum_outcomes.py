@@ -0,0 +1,527 @@
+"""
+Append-only columnar store of game outcomes for balance work on UNIT_DATA and CARD_DATA.
+
+A store is a directory with two tables, each a set of immutable parts (one
+.npy file per column):
+
+    <store>/schema.json                     categories of the coded columns
+    <store>/rulesets/<ruleset>.json         UNIT_DATA and CARD_DATA of each ruleset id
+    <store>/games/part-<writer>-<n>/*.npy   one row per game
+    <store>/actions/part-<writer>-<n>/*.npy one row per completed move, attack or card
+    <store>/compact.lock                    held by the running compaction
+
+games: game_id, ruleset (hash of UNIT_DATA and CARD_DATA), source (simulated or
+real), seed (-1 for real games), winner (0 = no result), victory ('core',
+'zones' or -1 = no result: turn limit or unfinished) and turns.
+actions: game_id, turn, player, kind ('move', 'attack', 'card'), unit_type (the
+acting unit, or the unit invoked by a card), damage, card, mana_spent and
+zone_captures (zones the player took with the action). Turns are half-turns:
+1 is Player 1's first turn, 2 the opponent's, and so on.
+
+OutcomeWriter buffers at most chunk_rows rows per table and writes each part to a
+temporary directory that is renamed into place, so memory does not grow with the
+dataset and readers never see a partial part. Several processes can append to
+the same store. Games come from self-play in ArcanumVecEnv (simulate) or from
+finished engine games (record_engine_game, one small part per game; compact merges
+the parts of each table into one, which lists the parts it replaces in
+replaces.json so that it replaces them atomically for concurrent readers).
+
+balance_report streams the actions from memory-mapped parts in blocks and answers
+win rate by unit type and card, time to win and zone-capture timing with vectorized
+pandas/NumPy aggregations per block, so its memory does not grow with the store.
+
+    python arcanum_outcomes.py simulate --store outcomes --envs 4096 --steps 5000
+    python arcanum_outcomes.py report --store outcomes [--source simulated] [--ruleset current]
+    python arcanum_outcomes.py compact --store outcomes
+
+Requires NumPy (and pandas for reports).
+"""
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import secrets
+import shutil
+import time
+
+import numpy as np
+
+import arcanum_engine as engine
+
+STORE_VERSION = 1
+CHUNK_ROWS = 1_000_000 # Linhas por parte (e máximo em memória por tabela num escritor ou bloco de um relatório)
+READ_ATTEMPTS = 5 # Leituras recomeçadas quando uma compactação concorrente apaga uma parte listada
+UNIT_TYPES = list(engine.UNIT_DATA)
+CARD_NAMES = list(engine.CARD_DATA)
+SOURCES = ['simulated', 'real']
+VICTORIES = ['core', 'zones'] # -1 = sem resultado
+KINDS = ['move', 'attack', 'card']
+
+TABLES = {
+    'games': {'game_id': np.int64, 'ruleset': np.int64, 'source': np.int8, 'seed': np.int64,
+              'winner': np.int8, 'victory': np.int8, 'turns': np.int16},
+    'actions': {'game_id': np.int64, 'turn': np.int16, 'player': np.int8, 'kind': np.int8, 'unit_type': np.int8,
+                'damage': np.int16, 'card': np.int8, 'mana_spent': np.int8, 'zone_captures': np.int8},
+}
+CATEGORIES = {'source': SOURCES, 'victory': VICTORIES, 'kind': KINDS, 'unit_type': UNIT_TYPES, 'card': CARD_NAMES}
+
+
+def ruleset_id():
+    """Signed 64-bit hash of the current UNIT_DATA and CARD_DATA."""
+    rules = json.dumps([engine.UNIT_DATA, engine.CARD_DATA], sort_keys=True, ensure_ascii=False)
+    return int.from_bytes(hashlib.blake2b(rules.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+
+def write_json_atomic(path, data):
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    os.replace(temporary_path, path)
+
+
+def open_store(path):
+    """Creates the store layout if needed and checks that its schema matches this version of the code."""
+    schema = {'version': STORE_VERSION, 'categories': CATEGORIES}
+    for directory in ('games', 'actions', 'rulesets'):
+        os.makedirs(os.path.join(path, directory), exist_ok=True)
+    schema_path = os.path.join(path, 'schema.json')
+    if not os.path.exists(schema_path):
+        write_json_atomic(schema_path, schema)
+    with open(schema_path, encoding='utf-8') as f:
+        stored = json.load(f)
+    if stored != schema:
+        raise ValueError(f"O esquema de {path} não corresponde aos tipos de unidade e cartas atuais; usa outro diretório.")
+
+    ruleset_path = os.path.join(path, 'rulesets', f"{ruleset_id()}.json")
+    if not os.path.exists(ruleset_path):
+        write_json_atomic(ruleset_path, {'units': engine.UNIT_DATA, 'cards': engine.CARD_DATA})
+
+
+# --- ESCRITA ---
+
+class OutcomeWriter:
+    def __init__(self, path, chunk_rows=CHUNK_ROWS):
+        open_store(path)
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.writer_id = secrets.randbits(31) # Prefixo dos IDs de jogo e nomes das partes deste escritor
+        self.next_game = 0
+        self.next_part = 0
+        self.buffers = {table: {column: [] for column in columns} for table, columns in TABLES.items()}
+        self.buffered = {table: 0 for table in TABLES}
+        self.rows_written = {table: 0 for table in TABLES}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def new_game_ids(self, count):
+        ids = (self.writer_id << 32) + np.arange(self.next_game, self.next_game + count, dtype=np.int64)
+        self.next_game += count
+        return ids
+
+    def append(self, table, **columns):
+        """Appends rows given as equal-length arrays, one per column of table."""
+        if set(columns) != set(TABLES[table]):
+            raise ValueError(f"Colunas de {table}: {sorted(TABLES[table])}")
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError("Todas as colunas têm de ter o mesmo número de linhas.")
+        for column, dtype in TABLES[table].items():
+            self.buffers[table][column].append(np.asarray(columns[column], dtype=dtype))
+        self.buffered[table] += lengths.pop()
+        if self.buffered[table] >= self.chunk_rows:
+            self.flush(table)
+
+    def flush(self, table):
+        if not self.buffered[table]:
+            return
+        name = f"part-{self.writer_id:08x}-{self.next_part:06d}"
+        self.next_part += 1
+        temporary_dir = os.path.join(self.path, table, f".{name}.tmp")
+        os.makedirs(temporary_dir)
+        for column, chunks in self.buffers[table].items():
+            np.save(os.path.join(temporary_dir, f"{column}.npy"), np.concatenate(chunks))
+            chunks.clear()
+        os.rename(temporary_dir, os.path.join(self.path, table, name)) # A parte só aparece completa
+        self.rows_written[table] += self.buffered[table]
+        self.buffered[table] = 0
+
+    def close(self):
+        # Ações primeiro: uma leitura concorrente nunca vê um jogo sem as suas ações
+        self.flush('actions')
+        self.flush('games')
+
+
+def simulate(path, num_envs=1024, steps=1000, noise=1.0, seed=None, max_turns=200, chunk_rows=CHUNK_ROWS):
+    """
+    Plays arcanum_eval.scripted_actions in every seat of an ArcanumVecEnv for `steps` steps and
+    appends every game and action to the store (games still running at the end have no result).
+    Returns the rows written per table.
+    """
+    import arcanum_eval
+    from arcanum_vecenv import ArcanumVecEnv, CARD_INVOKE, CARD_PULSE, PULSE_DAMAGE
+
+    rng = np.random.default_rng(seed)
+    env = ArcanumVecEnv(num_envs, max_turns=max_turns, seed=seed, observations=False)
+    env.reset()
+    envs = np.arange(num_envs)
+    seed_column = -1 if seed is None else seed
+
+    with OutcomeWriter(path, chunk_rows) as writer:
+        game_ids = writer.new_game_ids(num_envs)
+        ruleset = ruleset_id()
+
+        def zone_owners():
+            occupant = env.occupancy[:, env.zone_cells]
+            return np.where(occupant >= 0, env.unit_player[envs[:, None], np.maximum(occupant, 0)], 0)
+
+        def append_games(done, winner, victory, turns):
+            writer.append('games', game_id=game_ids[done], ruleset=np.full(len(done), ruleset),
+                          source=np.full(len(done), SOURCES.index('simulated')), seed=np.full(len(done), seed_column),
+                          winner=winner, victory=victory, turns=turns)
+
+        for _ in range(steps):
+            actions = arcanum_eval.scripted_actions(env, rng, noise)
+            acting = env.current.copy()
+            turn = env.turn.copy()
+            owners_before = zone_owners()
+
+            # Descodifica as ações antes do passo (o passo reinicia os jogos terminados)
+            is_move = (actions >= env.move_offset) & (actions < env.attack_offset)
+            is_attack = (actions >= env.attack_offset) & (actions < env.card_offset)
+            is_card = actions >= env.card_offset
+            slot = np.where(is_move, (actions - env.move_offset) // 6, (actions - env.attack_offset) // env.max_units)
+            slot = np.where(is_move | is_attack, slot, 0)
+            hand_slot = np.where(is_card, (actions - env.card_offset) // env.card_targets, 0)
+            card = np.where(is_card, env.hand[envs, acting, hand_slot], -1)
+            card_kind = env.card_kind[np.maximum(card, 0)]
+            actor_type = env.unit_type[envs, slot]
+            unit_type = np.where(is_move | is_attack, actor_type,
+                                 np.where(is_card & (card_kind == CARD_INVOKE), env.card_unit_type[np.maximum(card, 0)], -1))
+            damage = np.where(is_attack, env.type_atk[np.maximum(actor_type, 0)],
+                              np.where(is_card & (card_kind == CARD_PULSE), PULSE_DAMAGE, 0))
+            mana_spent = np.where(is_card, env.card_cost[np.maximum(card, 0)], 0)
+            kind = np.select([is_move, is_attack, is_card], [0, 1, 2], -1)
+            recorded = (kind >= 0) & env.masks[envs, actions]
+            action_game_ids = game_ids.copy()
+
+            _, _, terminated, truncated, info = env.step(actions)
+            restarted = terminated | truncated
+            captures = ((zone_owners() == acting[:, None]) & (owners_before != acting[:, None])).sum(axis=1)
+            captures[restarted] = 0 # Jogos reiniciados: o tabuleiro já é o de um jogo novo
+
+            r = np.flatnonzero(recorded)
+            writer.append('actions', game_id=action_game_ids[r], turn=turn[r], player=acting[r], kind=kind[r],
+                          unit_type=unit_type[r], damage=damage[r], card=card[r], mana_spent=mana_spent[r],
+                          zone_captures=captures[r])
+
+            done = np.flatnonzero(restarted)
+            if len(done):
+                victory = np.where(terminated[done], np.where(actions[done] == 0, VICTORIES.index('zones'),
+                                                              VICTORIES.index('core')), -1)
+                append_games(done, info['winner'][done], victory, info['turns'][done])
+                game_ids[done] = writer.new_game_ids(len(done))
+
+        append_games(envs, np.zeros(num_envs), np.full(num_envs, -1), env.turn)
+    return writer.rows_written
+
+
+def record_engine_game(path, game_state):
+    """Appends a finished (or abandoned) arcanum_engine game and its action log to the store."""
+    log = game_state.action_log
+    winner, reason = game_state.outcome or (0, None)
+    if reason == 'zones':
+        # A vitória por zonas é verificada no início do meio-turno seguinte ao do vencedor
+        turns = 2 * game_state.turn_number - (2 if winner == 1 else 1)
+    else:
+        turns = log[-1][0] if log else 1
+
+    with OutcomeWriter(path) as writer:
+        game_id = writer.new_game_ids(1)
+        if log:
+            half_turn, player, kind, unit_type, damage, card_name, mana_spent, zone_captures = zip(*log)
+            writer.append('actions', game_id=np.repeat(game_id, len(log)), turn=half_turn, player=player,
+                          kind=[KINDS.index(k) for k in kind],
+                          unit_type=[UNIT_TYPES.index(t) if t else -1 for t in unit_type], damage=damage,
+                          card=[CARD_NAMES.index(c) if c else -1 for c in card_name],
+                          mana_spent=mana_spent, zone_captures=zone_captures)
+        writer.append('games', game_id=game_id, ruleset=[ruleset_id()], source=[SOURCES.index('real')], seed=[-1],
+                      winner=[winner], victory=[VICTORIES.index(reason) if reason else -1], turns=[turns])
+    return game_id[0]
+
+
+def scan_parts(directory):
+    """
+    (visible, replaced) part names of a table directory. A compacted part lists the parts it
+    replaces in replaces.json; those are hidden even before the compaction deletes them.
+    """
+    names = sorted(name for name in os.listdir(directory) if name.startswith('part-'))
+    replaced = set()
+    for name in names:
+        replaces_path = os.path.join(directory, name, 'replaces.json')
+        if os.path.exists(replaces_path):
+            with open(replaces_path, encoding='utf-8') as f:
+                replaced.update(json.load(f))
+    return [name for name in names if name not in replaced], replaced
+
+
+def list_parts(path, table):
+    directory = os.path.join(path, table)
+    return [os.path.join(directory, name) for name in scan_parts(directory)[0]]
+
+
+def retry_on_compaction(read):
+    """
+    Runs read() and starts it over when a part it listed is deleted by a concurrent compaction
+    before it could be opened (the rows are then in the compacted part, which a new listing sees).
+    """
+    for attempt in range(READ_ATTEMPTS):
+        try:
+            return read()
+        except FileNotFoundError:
+            if attempt == READ_ATTEMPTS - 1:
+                raise
+
+
+def compact(path):
+    """
+    Merges the parts of each table into one part (e.g. after many real games). The merged part
+    is written next to the others with the names of the parts it replaces and appears with one
+    rename, so readers see either the old parts or the merged one, never both; the old parts are
+    deleted afterwards (or by the next compaction, if this one is interrupted). Compactions of a
+    store take turns on compact.lock; writers keep appending new parts meanwhile.
+    """
+    open_store(path)
+    merged = {}
+    with open(os.path.join(path, 'compact.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        for table, columns in TABLES.items():
+            directory = os.path.join(path, table)
+            visible, replaced = scan_parts(directory)
+            for name in os.listdir(directory): # Restos de uma compactação interrompida
+                if name in replaced or name.startswith('.compact-'):
+                    shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+            if len(visible) < 2:
+                continue
+
+            parts = [os.path.join(directory, name) for name in visible]
+            rows = [len(np.load(os.path.join(part, 'game_id.npy'), mmap_mode='r')) for part in parts]
+            name = f"part-{secrets.randbits(31):08x}-{0:06d}"
+            temporary_dir = os.path.join(directory, f".compact-{name}.tmp")
+            os.makedirs(temporary_dir)
+            for column, dtype in columns.items(): # Cópia por partes para um memmap: memória constante
+                merged_column = np.lib.format.open_memmap(os.path.join(temporary_dir, f"{column}.npy"),
+                                                          mode='w+', dtype=dtype, shape=(sum(rows),))
+                offset = 0
+                for part, count in zip(parts, rows):
+                    merged_column[offset:offset + count] = np.load(os.path.join(part, f"{column}.npy"), mmap_mode='r')
+                    offset += count
+                merged_column.flush()
+                del merged_column
+            write_json_atomic(os.path.join(temporary_dir, 'replaces.json'), visible)
+            os.rename(temporary_dir, os.path.join(directory, name)) # As partes antigas deixam de ser lidas
+            for part in parts:
+                shutil.rmtree(part)
+            merged[table] = (len(parts), 1)
+    return merged
+
+
+# --- ANÁLISE ---
+
+def load_table(path, table, columns=None, decode=False):
+    """
+    pandas DataFrame with `columns` of table from every part (copied into memory; balance_report
+    streams blocks instead). With decode=True the coded columns become Categoricals; analytics keep
+    the integer codes, which group faster.
+    """
+    import pandas as pd
+
+    columns = list(columns or TABLES[table])
+
+    def read():
+        parts = list_parts(path, table)
+        data = {}
+        for column in columns:
+            chunks = [np.load(os.path.join(part, f"{column}.npy"), mmap_mode='r') for part in parts]
+            data[column] = np.concatenate(chunks) if chunks else np.empty(0, dtype=TABLES[table][column])
+            if decode and column in CATEGORIES:
+                data[column] = pd.Categorical.from_codes(data[column], CATEGORIES[column])
+        return pd.DataFrame(data)
+
+    return retry_on_compaction(read)
+
+
+def iter_blocks(path, table, columns, block_rows=CHUNK_ROWS):
+    """Yields dicts of at most block_rows rows of `columns`, read part by part from memory maps."""
+    for part in list_parts(path, table):
+        data = {column: np.load(os.path.join(part, f"{column}.npy"), mmap_mode='r') for column in columns}
+        rows = len(data[columns[0]])
+        for start in range(0, rows, block_rows):
+            yield {column: values[start:start + block_rows] for column, values in data.items()}
+
+
+def win_rate_by(keys, winner, names):
+    """
+    Games played and win rate of the players who used each category at least once in a game,
+    from the distinct (game, player, category) keys (see player_category_keys).
+    """
+    import pandas as pd
+
+    n = len(names)
+    category, player_game = keys % n, keys // n
+    won = winner[player_game // 3] == player_game % 3
+    games = np.bincount(category, minlength=n)
+    wins = np.bincount(category, weights=won, minlength=n)
+    with np.errstate(invalid='ignore'):
+        return pd.DataFrame({'jogos': games, 'vitórias %': 100 * wins / games}, index=pd.Index(names))
+
+
+def player_category_keys(game_index, player, category, n):
+    import pandas as pd
+
+    return pd.unique((game_index * 3 + player) * n + category)
+
+
+def balance_report(path, source=None, ruleset=None):
+    """
+    Dict of pandas DataFrames: 'resumo', 'tempo até vencer', 'unidades', 'cartas' and 'zonas'.
+    Win rates only count games with a result; source and ruleset filter the games. The actions
+    are aggregated in blocks of CHUNK_ROWS rows, so memory does not grow with the store.
+    """
+    return retry_on_compaction(lambda: build_balance_report(path, source, ruleset))
+
+
+def build_balance_report(path, source, ruleset):
+    import pandas as pd
+
+    games = load_table(path, 'games')
+    if source is not None:
+        games = games[games['source'] == SOURCES.index(source)]
+    if ruleset is not None:
+        games = games[games['ruleset'] == ruleset]
+    finished = games[games['winner'] > 0]
+    finished_ids = pd.Index(finished['game_id'].to_numpy())
+    winner = finished['winner'].to_numpy()
+
+    num_units, num_cards = len(UNIT_TYPES), len(CARD_NAMES)
+    unit_keys, card_keys, captures = [], [], []
+    unit_sums = np.zeros((num_units, 3)) # ações, ataques, dano
+    card_sums = np.zeros((num_cards, 4)) # jogadas, mana, dano, jogadas ganhas
+    num_actions = 0
+    for block in iter_blocks(path, 'actions', list(TABLES['actions'])):
+        game_index = finished_ids.get_indexer(block['game_id'])
+        keep = game_index >= 0 # Ações de jogos com resultado (e dentro dos filtros)
+        if not keep.any():
+            continue
+        block = {column: values[keep] for column, values in block.items()}
+        game_index = game_index[keep].astype(np.int64)
+        num_actions += len(game_index)
+        player = block['player'].astype(np.int64)
+        won = winner[game_index] == player
+        damage = block['damage']
+
+        unit_type = block['unit_type'].astype(np.int64)
+        has_unit = unit_type >= 0
+        unit_keys.append(player_category_keys(game_index[has_unit], player[has_unit], unit_type[has_unit], num_units))
+        unit_sums += np.stack([np.bincount(unit_type[has_unit], minlength=num_units),
+                               np.bincount(unit_type[has_unit], weights=block['kind'][has_unit] == KINDS.index('attack'),
+                                           minlength=num_units),
+                               np.bincount(unit_type[has_unit], weights=damage[has_unit], minlength=num_units)], axis=1)
+
+        card = block['card'].astype(np.int64)
+        has_card = card >= 0
+        card_keys.append(player_category_keys(game_index[has_card], player[has_card], card[has_card], num_cards))
+        card_sums += np.stack([np.bincount(card[has_card], minlength=num_cards),
+                               np.bincount(card[has_card], weights=block['mana_spent'][has_card], minlength=num_cards),
+                               np.bincount(card[has_card], weights=damage[has_card], minlength=num_cards),
+                               np.bincount(card[has_card], weights=won[has_card], minlength=num_cards)], axis=1)
+
+        captured = block['zone_captures'] > 0
+        captures.append(pd.DataFrame({'game_id': block['game_id'][captured], 'turn': block['turn'][captured],
+                                      'player': block['player'][captured], 'won': won[captured]}))
+
+    summary = pd.Series({
+        'jogos': len(games),
+        'com resultado': len(finished),
+        'vitórias Jogador 1 %': 100 * (finished['winner'] == 1).mean(),
+        'vitórias por núcleo %': 100 * (finished['victory'] == VICTORIES.index('core')).mean(),
+        'vitórias por zonas %': 100 * (finished['victory'] == VICTORIES.index('zones')).mean(),
+        'ações': num_actions,
+    })
+
+    time_to_win = finished.groupby('victory')['turns'].describe(percentiles=[0.5, 0.9])
+    time_to_win.index = [VICTORIES[v] for v in time_to_win.index]
+
+    # Chaves (jogo, jogador, categoria) distintas de cada bloco; um jogo pode estar em vários blocos
+    def distinct(keys):
+        return pd.unique(np.concatenate(keys)) if keys else np.empty(0, dtype=np.int64)
+
+    units = win_rate_by(distinct(unit_keys), winner, UNIT_TYPES)
+    unit_actions = pd.DataFrame(unit_sums.astype(np.int64), index=UNIT_TYPES, columns=['ações', 'ataques', 'dano'])
+    units = units.join(unit_actions[unit_actions['ações'] > 0])
+
+    cards = win_rate_by(distinct(card_keys), winner, CARD_NAMES)
+    plays = card_sums[:, 0]
+    with np.errstate(invalid='ignore'):
+        card_plays = pd.DataFrame({'jogadas': plays.astype(np.int64), 'mana': card_sums[:, 1].astype(np.int64),
+                                   'dano': card_sums[:, 2].astype(np.int64),
+                                   'vitórias % (por jogada)': 100 * card_sums[:, 3] / plays}, index=CARD_NAMES)
+    cards = cards.join(card_plays[plays > 0])
+
+    # Primeira captura de zona de cada jogo: quem capturou primeiro e quando
+    captures = pd.concat(captures) if captures else pd.DataFrame({'game_id': [], 'turn': [], 'player': [], 'won': []})
+    first = captures.sort_values(['game_id', 'turn'], kind='stable').drop_duplicates('game_id')
+    zones = first.groupby('player').agg(jogos=('turn', 'size'), **{
+        'meio-turno médio': ('turn', 'mean'),
+        'meio-turno mediano': ('turn', 'median'),
+        'vitórias %': ('won', lambda w: 100 * w.mean()),
+    })
+    zones.index = [f"Jogador {p} captura primeiro" for p in zones.index]
+
+    return {'resumo': summary, 'tempo até vencer': time_to_win, 'unidades': units, 'cartas': cards, 'zonas': zones}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    simulate_parser = commands.add_parser('simulate', help='joga self-play e acrescenta os jogos ao armazém')
+    simulate_parser.add_argument('--store', required=True)
+    simulate_parser.add_argument('--envs', type=int, default=1024)
+    simulate_parser.add_argument('--steps', type=int, default=1000)
+    simulate_parser.add_argument('--noise', type=float, default=1.0)
+    simulate_parser.add_argument('--seed', type=int, default=None)
+    report_parser = commands.add_parser('report', help='taxas de vitória, tempo até vencer e capturas de zonas')
+    report_parser.add_argument('--store', required=True)
+    report_parser.add_argument('--source', choices=SOURCES)
+    report_parser.add_argument('--ruleset', help="ID do conjunto de regras ou 'current' (UNIT_DATA/CARD_DATA atuais)")
+    compact_parser = commands.add_parser('compact', help='junta partes pequenas')
+    compact_parser.add_argument('--store', required=True)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == 'simulate':
+        rows = simulate(args.store, args.envs, args.steps, noise=args.noise, seed=args.seed)
+        print(f"{rows['games']} jogos e {rows['actions']} ações acrescentados a {args.store} "
+              f"em {time.perf_counter() - start:.1f} s")
+    elif args.command == 'compact':
+        for table, (before, after) in compact(args.store).items():
+            print(f"{table}: {before} partes -> {after}")
+    else:
+        import pandas as pd
+
+        ruleset = ruleset_id() if args.ruleset == 'current' else (int(args.ruleset) if args.ruleset else None)
+        report = balance_report(args.store, source=args.source, ruleset=ruleset)
+        with pd.option_context('display.width', 160, 'display.max_columns', 20, 'display.precision', 1):
+            for title, table in report.items():
+                print(f"\n== {title} ==")
+                print(table.to_string())
+        print(f"\nRelatório em {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+Perft: counts every legal action sequence from a position to a fixed depth.
+
+legal_actions() enumerates what the player to act can do in the rules engine:
+moves (get_valid_moves_for_unit), attacks (get_valid_attack_targets_for_unit),
+every card in hand that the player can pay for with each of its valid targets,
+and ending the turn (end_turn_streamlit, which also plays the AI turn when it
+is the AI's turn next). perft(depth) plays each action, recurses and undoes it
+by restoring the last history snapshot, and returns the number of leaf
+sequences; divide(depth) gives the count below each root action.
+
+Every action generated must be accepted by the engine (otherwise ActionRejected
+is raised), and the counts for the positions in REFERENCE_POSITIONS are stored
+in benchmarks/perft_reference.json, so a faster move generator or an engine
+rewrite can be checked against them (benchmarks/bench_perft.py also reports
+nodes per second).
+
+Card draws are random: `random` is reseeded with `seed` before every action,
+so counts do not depend on the order of the search. Disable the AI plan cache
+(engine.configure_policy_cache(None)) so it does not fill up with perft positions.
+
+    python arcanum_perft.py --position opening --depth 3 --divide
+
+Standard library only, like the engine.
+"""
+import argparse
+import random
+import time
+
+import arcanum_engine as engine
+
+DEFAULT_SEED = 0
+
+
+class ActionRejected(RuntimeError):
+    """An action returned by legal_actions was refused by the engine."""
+
+
+# --- GERAÇÃO DE AÇÕES ---
+
+def legal_actions():
+    """
+    Legal actions of the player to act, in a fixed order:
+    ('move', unit_id, coords), ('attack', unit_id, target_id),
+    ('card', card_name, target_coords, target_unit_id) and ('end',).
+    Copies of the same card give the same positions and appear once.
+    """
+    state = engine.state
+    if state.game_over:
+        return []
+    player_id = state.current_turn
+    own_units = sorted(((uid, unit) for uid, unit in state.units.items() if unit['player'] == player_id),
+                       key=lambda item: int(item[0]))
+
+    actions = []
+    for uid, unit in own_units:
+        for coords in sorted(engine.get_valid_moves_for_unit(uid)):
+            actions.append(('move', uid, coords))
+        for coords in sorted(engine.get_valid_attack_targets_for_unit(uid)):
+            actions.append(('attack', uid, state.unit_positions[coords]))
+
+    for card_name in sorted(set(state.hand[player_id])):
+        card_info = engine.CARD_DATA[card_name]
+        if card_info['cost'] <= state.mana[player_id]:
+            actions.extend(('card', card_name, coords, uid) for coords, uid in card_targets(card_name, player_id, own_units))
+
+    actions.append(('end',))
+    return actions
+
+def card_targets(card_name, player_id, own_units):
+    """(target_coords, target_unit_id) pairs accepted by play_card_streamlit for card_name."""
+    state = engine.state
+    card_info = engine.CARD_DATA[card_name]
+    if card_info['type'] == 'invocation':
+        hexes = engine.get_valid_invocation_hexes(player_id, card_info['unit_type'])
+        return [(coords, None) for coords in sorted(hexes)]
+
+    if card_name == "Feitiço: Pulso Etéreo":
+        core = next((unit for uid, unit in own_units if unit['type'] == 'Arcane Core'), None)
+        if core is None:
+            return []
+        enemies = sorted(((uid, unit) for uid, unit in state.units.items() if unit['player'] != player_id),
+                         key=lambda item: int(item[0]))
+        return [(None, uid) for uid, unit in enemies
+                if engine.calculate_distance(core['cell'], unit['cell']) <= 4]
+    if card_name == "Feitiço: Escudo Etéreo":
+        return [(None, uid) for uid, unit in own_units]
+    if card_name == "Feitiço: Reflexo Estratégico":
+        return [(None, None)]
+    if card_name == "Feitiço: Translocação Rápida":
+        return [(coords, uid) for uid, unit in own_units
+                for coords in sorted(engine.get_adjacent_hexes(unit['cell']))
+                if coords not in state.unit_positions]
+    return []
+
+def action_label(action):
+    kind = action[0]
+    if kind == 'move':
+        return f"mover {action[1]} {engine.coord_label(action[2])}"
+    if kind == 'attack':
+        return f"atacar {action[1]} {action[2]}"
+    if kind == 'card':
+        target = ' '.join(part for part in (action[2] is not None and engine.coord_label(action[2]), action[3]) if part)
+        return f"{action[1]} {target}".rstrip()
+    return "terminar turno"
+
+
+# --- JOGAR E DESFAZER ---
+
+def apply_action(action, seed=DEFAULT_SEED):
+    """Plays action on the bound state. Raises ActionRejected if the engine refuses it."""
+    random.seed(seed)
+    kind = action[0]
+    if kind == 'move':
+        accepted = engine.move_unit_streamlit(action[1], action[2])
+    elif kind == 'attack':
+        accepted = engine.attack_unit_streamlit(action[1], action[2])
+    elif kind == 'card':
+        accepted = engine.play_card_streamlit(action[1], target_coords=action[2], target_unit_id=action[3])
+    else:
+        engine.end_turn_streamlit()
+        accepted = True
+    if not accepted:
+        raise ActionRejected(f"Ação gerada recusada pelo motor: {action_label(action)} ({engine.state.event_log[-1]})")
+
+def undo_to(history_length):
+    """Discards the snapshots after history_length and restores the position they started from."""
+    del engine.state.history[history_length:]
+    engine.restore_snapshot(engine.state.history[-1])
+
+
+# --- PERFT ---
+
+def perft(depth, seed=DEFAULT_SEED, bulk=True):
+    """
+    Number of legal action sequences of length depth from the bound position, which must
+    be the last history snapshot (true after initialize_game or any engine action).
+    With bulk=True the last ply is counted without playing it.
+    """
+    random_state = random.getstate()
+    try:
+        return count_leaves(depth, seed, bulk)
+    finally:
+        random.setstate(random_state)
+
+def count_leaves(depth, seed, bulk):
+    if depth == 0:
+        return 1
+    actions = legal_actions()
+    if depth == 1 and bulk:
+        return len(actions)
+
+    history_length = len(engine.state.history)
+    nodes = 0
+    for action in actions:
+        apply_action(action, seed)
+        nodes += count_leaves(depth - 1, seed, bulk)
+        undo_to(history_length)
+    return nodes
+
+def divide(depth, seed=DEFAULT_SEED, bulk=True):
+    """[(root action, perft(depth - 1) after it)] for depth >= 1, in legal_actions order."""
+    random_state = random.getstate()
+    history_length = len(engine.state.history)
+    counts = []
+    try:
+        for action in legal_actions():
+            apply_action(action, seed)
+            counts.append((action, count_leaves(depth - 1, seed, bulk)))
+            undo_to(history_length)
+    finally:
+        random.setstate(random_state)
+    return counts
+
+
+# --- POSIÇÕES DE REFERÊNCIA ---
+# Tabuleiro 11x13 por omissão; as contagens conhecidas estão em benchmarks/perft_reference.json.
+
+def setup_opening(seed=DEFAULT_SEED):
+    engine.configure_board(11, 13)
+    engine.initialize_game()
+
+def setup_midgame(seed=DEFAULT_SEED):
+    """Turn 3, units in contact: Player 1 advances towards the enemy core for two turns."""
+    setup_opening(seed)
+    rng = random.Random(seed)
+    enemy_core = next(unit['cell'] for unit in engine.get_player_units(2).values()
+                      if unit['type'] == 'Arcane Core')
+    for _ in range(2):
+        for uid in sorted(engine.get_player_units(1), key=int):
+            moves = sorted(engine.get_valid_moves_for_unit(uid),
+                           key=lambda coords: (engine.calculate_distance(coords, enemy_core), coords))
+            if moves:
+                apply_action(('move', uid, moves[0]), rng.randrange(2**32))
+        apply_action(('end',), rng.randrange(2**32))
+
+REFERENCE_POSITIONS = {
+    'opening': setup_opening,
+    'midgame': setup_midgame,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--position', choices=sorted(REFERENCE_POSITIONS), default='opening')
+    parser.add_argument('--depth', type=int, default=2)
+    parser.add_argument('--divide', action='store_true', help='contagem por ação da raiz')
+    parser.add_argument('--no-bulk', action='store_true', help='joga também o último nível (valida todas as ações)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    engine.configure_policy_cache(None)
+    REFERENCE_POSITIONS[args.position](args.seed)
+    start = time.perf_counter()
+    if args.divide:
+        counts = divide(args.depth, args.seed, not args.no_bulk)
+        for action, count in counts:
+            print(f"{action_label(action)}: {count}")
+        nodes = sum(count for _, count in counts)
+    else:
+        nodes = perft(args.depth, args.seed, not args.no_bulk)
+    elapsed = time.perf_counter() - start
+    print(f"perft({args.depth}) {args.position}: {nodes} ({nodes / elapsed:,.0f} nós/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""
+Root-parallel Monte Carlo search for AI decisions on all cores.
+
+The position to decide is packed into a multiprocessing.shared_memory buffer
+(arcanum_vecenv.pack_engine_state), so a decision sends each worker only
+(decision id, deadline, seed) and never pickles the unit dicts. Each worker of a
+persistent pool keeps its own ArcanumVecEnv and, until the deadline, plays
+batches of rollouts: every legal root action is played, followed by
+ROLLOUT_HORIZON steps of the noisy greedy policy from arcanum_eval, and the final
+position is scored with the learned evaluation (a finished game counts ±1).
+Workers return per-action sums and counts, which are merged at the root.
+
+    with RolloutSearch(num_workers=4) as search:
+        result = search.search(engine.state, budget_ms=200)
+        search.apply(result)
+
+play_ai_turn plays a whole turn for the player to act this way. With
+num_workers=0 the rollouts run in the calling process (the single-core baseline
+used by benchmarks/bench_rollouts.py). The rollout games draw cards like the
+engine (engine.DRAWING_PLAYERS), so the AI never plans with cards it cannot get.
+
+With ARCANUM_AI_ROLLOUT_WORKERS set, arcanum_engine plays the AI turn through
+play_process_ai_turn, whose search (and worker pool) is owned by the process
+and shared by its games.
+
+Requires NumPy; games are limited to max_units units on boards accepted by ArcanumVecEnv.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import arcanum_engine as engine
+import arcanum_eval
+import arcanum_metrics as metrics
+from arcanum_vecenv import (ArcanumVecEnv, CARD_DRAW, CARD_INVOKE, CARD_NAMES, CARD_PULSE, CARD_SHIELD,
+                            CARD_TRANSLOCATE, pack_engine_state)
+
+ROLLOUT_BATCH = 128 # Rollouts simultâneos em cada processo (jogos no ArcanumVecEnv do worker)
+ROLLOUT_HORIZON = 16 # Passos jogados depois da ação da raiz antes de avaliar a posição
+ROLLOUT_NOISE = 1.0 # Ruído da política de rollout (ver arcanum_eval.scripted_actions)
+MAX_TURN_ACTIONS = 40 # Limite de ações por turno em play_ai_turn
+HEADER_WORDS = 1 # Cabeçalho do buffer partilhado: id da decisão (int64)
+
+WORKER = {} # Estado de cada processo do pool: memória partilhada, ambiente e pesos
+PROCESS_SEARCHES = {} # num_workers -> RolloutSearch do processo, partilhada pelos jogos (ver play_process_ai_turn)
+PROCESS_SEARCH_LOCK = threading.Lock() # Uma decisão de cada vez: o buffer partilhado é único
+
+
+def run_rollouts(env, packed, deadline, rng, weights, horizon, noise):
+    """
+    Plays batches of rollouts from `packed` until `deadline` (time.monotonic).
+    Returns (candidate actions, value sums, rollout counts), values from the root player's view.
+    """
+    env.load_packed(packed)
+    candidates = np.flatnonzero(env.masks[0])
+    root_player = int(env.current[0])
+    sums = np.zeros(len(candidates))
+    counts = np.zeros(len(candidates), dtype=np.int64)
+
+    offset = 0
+    batch_time = 0.0 # Não começa um lote que já não acabaria antes do prazo
+    while time.monotonic() + batch_time < deadline:
+        start = time.monotonic()
+        env.load_packed(packed)
+        choice = (np.arange(env.num_envs) + offset) % len(candidates)
+        offset += env.num_envs
+        values = rollout(env, candidates[choice], root_player, rng, weights, horizon, noise)
+        np.add.at(sums, choice, values)
+        counts += np.bincount(choice, minlength=len(candidates))
+        batch_time = time.monotonic() - start
+    return candidates, sums, counts
+
+
+def rollout(env, first_actions, root_player, rng, weights, horizon, noise):
+    """Values in [-1, 1] for the root player after first_actions and `horizon` policy steps."""
+    values = np.zeros(env.num_envs)
+    done = np.zeros(env.num_envs, dtype=bool)
+    actions = first_actions
+    for _ in range(horizon + 1):
+        _, _, terminated, truncated, info = env.step(actions)
+        finished = terminated & ~done
+        values[finished] = np.where(info['winner'][finished] == root_player, 1.0, -1.0)
+        done |= terminated | truncated # Jogos truncados valem 0; os terminados reiniciam e são ignorados
+        if done.all():
+            return values
+        actions = arcanum_eval.scripted_actions(env, rng, noise)
+
+    score = np.tanh(arcanum_eval.evaluate_batch(arcanum_eval.batch_features(env), weights) / 2)
+    values[~done] = np.where(env.current == root_player, score, -score)[~done]
+    return values
+
+
+def init_worker(shm_name, packed_size, batch, max_units, horizon, noise):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    WORKER.update(
+        shm=shm,
+        header=np.ndarray(HEADER_WORDS, dtype=np.int64, buffer=shm.buf),
+        packed=np.ndarray(packed_size, dtype=np.int32, buffer=shm.buf, offset=HEADER_WORDS * 8),
+        env=ArcanumVecEnv(batch, max_units=max_units, observations=False, draw_players=engine.DRAWING_PLAYERS),
+        weights=np.asarray(engine.EVAL_WEIGHTS, dtype=np.float32),
+        horizon=horizon,
+        noise=noise,
+    )
+
+
+def worker_search(decision_id, deadline, seed):
+    if WORKER['header'][0] != decision_id:
+        raise RuntimeError(f"Decisão {decision_id} já não está na memória partilhada.")
+    packed = WORKER['packed'].copy()
+    rng = np.random.default_rng(seed)
+    return run_rollouts(WORKER['env'], packed, deadline, rng, WORKER['weights'], WORKER['horizon'], WORKER['noise'])
+
+
+class RolloutSearch:
+    def __init__(self, num_workers=None, batch=ROLLOUT_BATCH, horizon=ROLLOUT_HORIZON, noise=ROLLOUT_NOISE,
+                 max_units=20, seed=None):
+        self.num_workers = os.cpu_count() if num_workers is None else num_workers
+        self.max_units = max_units
+        self.horizon = horizon
+        self.noise = noise
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.decision_id = 0
+        self.layout = ArcanumVecEnv(1, max_units=max_units, observations=False) # Traduz ações para o motor
+
+        packed_size = self.layout.packed_size()
+        self.shm = shared_memory.SharedMemory(create=True, size=HEADER_WORDS * 8 + packed_size * 4)
+        self.header = np.ndarray(HEADER_WORDS, dtype=np.int64, buffer=self.shm.buf)
+        self.packed = np.ndarray(packed_size, dtype=np.int32, buffer=self.shm.buf, offset=HEADER_WORDS * 8)
+
+        self.pool = None
+        self.local_env = None
+        if self.num_workers > 0:
+            self.pool = multiprocessing.Pool(
+                self.num_workers, initializer=init_worker,
+                initargs=(self.shm.name, packed_size, batch, max_units, horizon, noise))
+        else:
+            self.local_env = ArcanumVecEnv(batch, max_units=max_units, observations=False,
+                                           draw_players=engine.DRAWING_PLAYERS)
+            self.local_weights = np.asarray(engine.EVAL_WEIGHTS, dtype=np.float32)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        # As vistas NumPy têm de desaparecer antes de fechar o buffer
+        self.header = self.packed = None
+        self.shm.close()
+        self.shm.unlink()
+
+    def search(self, game_state, budget_ms):
+        """
+        Searches the position of game_state for the player to act for budget_ms milliseconds.
+        Returns {'action', 'value', 'rollouts', 'unit_ids', 'stats'} where action is an
+        ArcanumVecEnv action index (None if no rollout finished in time).
+        """
+        decision_start = time.perf_counter()
+        packed, unit_ids = pack_engine_state(game_state, self.max_units)
+        self.decision_id += 1
+        self.packed[:] = packed
+        self.header[0] = self.decision_id
+        deadline = time.monotonic() + budget_ms / 1000
+
+        seeds = self.seed_sequence.spawn(max(1, self.num_workers))
+        if self.pool is not None:
+            pending = [self.pool.apply_async(worker_search, (self.decision_id, deadline, seed)) for seed in seeds]
+            results = [task.get() for task in pending]
+        else:
+            results = [run_rollouts(self.local_env, packed, deadline, np.random.default_rng(seeds[0]),
+                                    self.local_weights, self.horizon, self.noise)]
+
+        # Junta as estatísticas de todos os workers por ação da raiz
+        sums = np.zeros(self.layout.num_actions)
+        counts = np.zeros(self.layout.num_actions, dtype=np.int64)
+        for candidates, worker_sums, worker_counts in results:
+            sums[candidates] += worker_sums
+            counts[candidates] += worker_counts
+
+        stats = {int(a): (counts[a], sums[a] / counts[a]) for a in np.flatnonzero(counts)}
+        action = max(stats, key=lambda a: stats[a][1]) if stats else None
+        metrics.ROLLOUT_DECISION_SECONDS.observe(time.perf_counter() - decision_start)
+        metrics.ROLLOUTS_PER_DECISION.observe(int(counts.sum()))
+        return {
+            'action': action,
+            'value': stats[action][1] if stats else 0.0,
+            'rollouts': int(counts.sum()),
+            'unit_ids': unit_ids,
+            'stats': stats,
+        }
+
+    def apply(self, result):
+        """Plays the chosen action on the bound engine state. Returns False for end turn or no action."""
+        action, unit_ids = result['action'], result['unit_ids']
+        layout = self.layout
+        if not action:
+            return False
+
+        def neighbour_of(slot, direction):
+            unit = engine.state.units[unit_ids[slot]]
+            return int(layout.neighbors[unit['cell'], direction])
+
+        if action < layout.attack_offset:
+            slot, direction = divmod(action - layout.move_offset, 6)
+            return engine.move_unit_streamlit(unit_ids[slot], neighbour_of(slot, direction))
+        if action < layout.card_offset:
+            attacker, target = divmod(action - layout.attack_offset, self.max_units)
+            return engine.attack_unit_streamlit(unit_ids[attacker], unit_ids[target])
+
+        hand_slot, target = divmod(action - layout.card_offset, layout.card_targets)
+        card_name = engine.state.hand[engine.state.current_turn][hand_slot]
+        kind = layout.card_kind[CARD_NAMES.index(card_name)]
+        if kind == CARD_INVOKE:
+            core_id = next(uid for uid, unit in engine.get_player_units(engine.state.current_turn).items()
+                           if unit['type'] == 'Arcane Core')
+            core = engine.state.units[core_id]
+            return engine.play_card_streamlit(card_name, target_coords=int(layout.disk[core['cell'], target]))
+        if kind in (CARD_PULSE, CARD_SHIELD):
+            return engine.play_card_streamlit(card_name, target_unit_id=unit_ids[target])
+        if kind == CARD_DRAW:
+            return engine.play_card_streamlit(card_name)
+        if kind == CARD_TRANSLOCATE:
+            slot, direction = divmod(target, 6)
+            return engine.play_card_streamlit(card_name, target_coords=neighbour_of(slot, direction),
+                                              target_unit_id=unit_ids[slot])
+        return False
+
+
+def play_ai_turn(search, budget_ms):
+    """
+    Plays the turn of the player to act one searched action at a time (budget_ms per decision),
+    stopping when the search prefers ending the turn. Does not end the turn itself.
+    Returns the number of actions played.
+    """
+    played = 0
+    while played < MAX_TURN_ACTIONS and not engine.state.game_over:
+        if not search.apply(search.search(engine.state, budget_ms)):
+            break
+        played += 1
+    return played
+
+
+def play_process_ai_turn(num_workers, budget_ms):
+    """
+    play_ai_turn with the RolloutSearch of this process for num_workers, created on first use,
+    shared by every game in the process (one turn at a time) and closed at exit.
+    """
+    with PROCESS_SEARCH_LOCK:
+        search = PROCESS_SEARCHES.get(num_workers)
+        if search is None:
+            search = PROCESS_SEARCHES[num_workers] = RolloutSearch(num_workers)
+            atexit.register(search.close)
+        return play_ai_turn(search, budget_ms)
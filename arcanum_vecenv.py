@@ -0,0 +1,534 @@
+"""
+Gym-style vectorized environment that steps N independent Arcanum Tactics games in lockstep.
+
+Board, unit and hand state live in batched NumPy arrays (one row per game), so a
+step costs a handful of array operations for the whole batch instead of one
+st.session_state game at a time. The rules mirror arcanum_engine:
+
+- units move one hex per MV point around occupied hexes (the same cells the UI offers);
+- attacks use AP and range; destroying the enemy Arcane Core wins;
+- cards cost mana: invocations within 2 hexes of the own core (units arrive without MV/AP),
+  Pulso Etéreo, Escudo Etéreo, Reflexo Estratégico and Translocação Rápida;
+- at the start of a turn the opponent wins if they control MYSTIC_ZONES_TO_WIN zones;
+  the player gains 1 mana and draws a card, and their units get MV/AP back.
+
+Both seats are played by the agent (self-play). By default both draw a card per turn;
+draw_players=engine.DRAWING_PLAYERS matches the engine, where the AI does not draw.
+Observations are from the point of view of the player to act.
+
+Action layout (per game, see ArcanumVecEnv.num_actions):
+    [end turn | move: unit slot x 6 directions | attack: unit slot x target slot |
+     card: hand slot x card target]
+where the card target is an invocation cell (index in the disk around the core),
+a unit slot (Pulso/Escudo), 0 (Reflexo) or unit slot x direction (Translocação).
+Illegal actions are ignored (the game does not change).
+
+    env = ArcanumVecEnv(num_envs=1024, seed=0)
+    obs, info = env.reset()
+    obs, rewards, terminated, truncated, info = env.step(actions)
+    masks = env.action_masks()
+
+pack/load_packed copy a single position in and out of a batch, and pack_engine_state
+packs an arcanum_engine game so it can be searched with the batched rules.
+
+Requires NumPy; the board must be small enough for arcanum_batch.get_distance_table.
+"""
+import numpy as np
+
+import arcanum_batch
+import arcanum_engine as engine
+
+UNIT_TYPES = list(engine.UNIT_DATA)
+CARD_NAMES = list(engine.CARD_DATA)
+CORE_TYPE = UNIT_TYPES.index('Arcane Core')
+
+# Tipos de efeito das cartas
+CARD_INVOKE, CARD_PULSE, CARD_SHIELD, CARD_DRAW, CARD_TRANSLOCATE = range(5)
+CARD_KIND_BY_NAME = {
+    "Feitiço: Pulso Etéreo": CARD_PULSE,
+    "Feitiço: Escudo Etéreo": CARD_SHIELD,
+    "Feitiço: Reflexo Estratégico": CARD_DRAW,
+    "Feitiço: Translocação Rápida": CARD_TRANSLOCATE,
+}
+PULSE_RANGE = 4
+PULSE_DAMAGE = 2
+SHIELD_AMOUNT = 3
+INVOCATION_RADIUS = 2
+CARDS_PER_DRAW_SPELL = 2
+
+OBS_CHANNELS = len(UNIT_TYPES) + 8 # tipo (one-hot), meu/inimigo, hp, mv, ap, zona, zona minha, zona inimiga
+
+
+class ArcanumVecEnv:
+    def __init__(self, num_envs, max_units=20, max_turns=200, seed=None, observations=True, draw_players=(1, 2)):
+        distance_table = arcanum_batch.get_distance_table()
+        if distance_table is None:
+            raise ValueError("Tabuleiro demasiado grande para o ambiente vetorizado.")
+
+        self.num_envs = num_envs
+        self.max_units = max_units
+        self.max_turns = max_turns
+        self.observations = observations # False: step/reset devolvem None como observação (rollouts)
+        self.hand_size = engine.MAX_HAND_SIZE
+        self.draw_players = np.array(draw_players, dtype=np.int32) # Jogadores que desenham no início do turno
+        self.rng = np.random.default_rng(seed)
+
+        self.num_cols = len(engine.BOARD_COLS)
+        self.num_rows = len(engine.BOARD_ROWS)
+        self.num_cells = self.num_cols * self.num_rows
+        self.distance = distance_table.astype(np.int32)
+        self.distance_flat = self.distance.ravel()
+        self.neighbors = self.build_neighbor_table()
+        self.disk = self.build_disk_table(INVOCATION_RADIUS)
+        self.zone_cells = np.array(engine.MYSTIC_ZONES, dtype=np.int64)
+
+        self.type_hp = np.array([engine.UNIT_DATA[t]['hp'] for t in UNIT_TYPES], dtype=np.int32)
+        self.type_atk = np.array([engine.UNIT_DATA[t]['atk'] for t in UNIT_TYPES], dtype=np.int32)
+        self.type_mv = np.array([engine.UNIT_DATA[t]['mv'] for t in UNIT_TYPES], dtype=np.int32)
+        self.type_range = np.array([engine.UNIT_DATA[t]['range'] for t in UNIT_TYPES], dtype=np.int32)
+        self.card_cost = np.array([engine.CARD_DATA[c]['cost'] for c in CARD_NAMES], dtype=np.int32)
+        self.card_kind = np.array([CARD_KIND_BY_NAME.get(c, CARD_INVOKE) for c in CARD_NAMES], dtype=np.int32)
+        self.card_unit_type = np.array([UNIT_TYPES.index(engine.CARD_DATA[c]['unit_type'])
+                                        if engine.CARD_DATA[c]['type'] == 'invocation' else -1
+                                        for c in CARD_NAMES], dtype=np.int32)
+
+        # Disposição das ações
+        self.card_targets = max_units * 6
+        self.move_offset = 1
+        self.attack_offset = self.move_offset + max_units * 6
+        self.card_offset = self.attack_offset + max_units * max_units
+        self.num_actions = self.card_offset + self.hand_size * self.card_targets
+
+        self.build_initial_template()
+        self.allocate_state()
+        self.mask_buffer = np.zeros((num_envs, self.num_actions), dtype=bool)
+        self.masks = None
+
+    # --- GEOMETRIA ---
+
+    def build_neighbor_table(self):
+        """[cell, direction] -> neighbouring cell ID or -1, in engine.AXIAL_DIRECTIONS order."""
+        table = np.full((self.num_cells, 6), -1, dtype=np.int64)
+        for row in range(1, self.num_rows + 1):
+            for col in range(self.num_cols):
+                q = col - (row - (row & 1)) // 2
+                for d, (dq, dr) in enumerate(engine.AXIAL_DIRECTIONS):
+                    nr = row + dr
+                    nc = q + dq + (nr - (nr & 1)) // 2
+                    if 0 <= nc < self.num_cols and 1 <= nr <= self.num_rows:
+                        table[(row - 1) * self.num_cols + col, d] = (nr - 1) * self.num_cols + nc
+        return table
+
+    def build_disk_table(self, radius):
+        """[cell, k] -> k-th cell of the disk of `radius` around cell (-1 padded), from the engine index."""
+        disks = [engine.get_hex_disk(cell, radius) for cell in range(self.num_cells)]
+        table = np.full((self.num_cells, 1 + 3 * radius * (radius + 1)), -1, dtype=np.int64)
+        for cell, disk in enumerate(disks):
+            table[cell, :len(disk)] = disk
+        return table
+
+    # --- ESTADO ---
+
+    def build_initial_template(self):
+        self.template_type = np.full(self.max_units, -1, dtype=np.int32)
+        self.template_player = np.zeros(self.max_units, dtype=np.int32)
+        self.template_cell = np.zeros(self.max_units, dtype=np.int64)
+        center_col = self.num_cols // 2
+        for slot, (player_id, unit_type, col_offset, rows_from_edge) in enumerate(engine.INITIAL_LAYOUT):
+            row = self.num_rows - rows_from_edge if player_id == 1 else 1 + rows_from_edge
+            self.template_type[slot] = UNIT_TYPES.index(unit_type)
+            self.template_player[slot] = player_id
+            self.template_cell[slot] = (row - 1) * self.num_cols + center_col + col_offset
+        self.template_hand = np.full((3, self.hand_size), -1, dtype=np.int32)
+        for player_id, cards in engine.INITIAL_HANDS.items():
+            self.template_hand[player_id, :len(cards)] = [CARD_NAMES.index(c) for c in cards]
+
+    def allocate_state(self):
+        b, u = self.num_envs, self.max_units
+        self.unit_type = np.full((b, u), -1, dtype=np.int32)
+        self.unit_player = np.zeros((b, u), dtype=np.int32)
+        self.unit_cell = np.zeros((b, u), dtype=np.int64)
+        self.unit_hp = np.zeros((b, u), dtype=np.int32)
+        self.unit_mv = np.zeros((b, u), dtype=np.int32)
+        self.unit_ap = np.zeros((b, u), dtype=np.int32)
+        self.occupancy = np.full((b, self.num_cells), -1, dtype=np.int64)
+        self.mana = np.zeros((b, 3), dtype=np.int32) # Índices 1 e 2 = jogadores
+        self.hand = np.full((b, 3, self.hand_size), -1, dtype=np.int32)
+        self.current = np.ones(b, dtype=np.int32)
+        self.turn = np.ones(b, dtype=np.int32)
+        # Geometria das unidades para as máscaras, atualizada só quando o tabuleiro muda:
+        # in_range[e, s, t]: a unidade s alcança a unidade t; nbr_free[e, s, d]: o vizinho d de s está livre
+        self.in_range = np.zeros((b, u, u), dtype=bool)
+        self.nbr_free = np.zeros((b, u, 6), dtype=bool)
+
+    def reset_envs(self, envs):
+        """Puts the games in `envs` (index array) back to the initial position."""
+        if len(envs) == 0:
+            return
+        alive = self.template_type >= 0
+        self.unit_type[envs] = self.template_type
+        self.unit_player[envs] = self.template_player
+        self.unit_cell[envs] = self.template_cell
+        self.unit_hp[envs] = np.where(alive, self.type_hp[self.template_type], 0)
+        self.unit_mv[envs] = np.where(alive, self.type_mv[self.template_type], 0)
+        self.unit_ap[envs] = alive.astype(np.int32)
+        self.occupancy[envs] = -1
+        slots = np.flatnonzero(alive)
+        self.occupancy[envs[:, None], self.template_cell[slots][None, :]] = slots
+        for player_id, mana in engine.INITIAL_MANA.items():
+            self.mana[envs, player_id] = mana
+        self.hand[envs] = self.template_hand
+        self.current[envs] = 1
+        self.turn[envs] = 1
+        self.refresh_geometry(envs)
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.reset_envs(np.arange(self.num_envs))
+        self.masks = self.compute_action_masks()
+        return self.observe() if self.observations else None, {}
+
+    # --- ESTADO EMPACOTADO ---
+    # Um jogo num vetor int32 (ver pack_engine_state): unidades [U, 6] (tipo, jogador, célula, hp, mv, ap),
+    # mana [3], mão [3, H], jogador atual e turno. Serve para copiar uma posição entre processos.
+
+    def packed_size(self):
+        return self.max_units * 6 + 3 + 3 * self.hand_size + 2
+
+    def pack(self, env):
+        """Packs game `env` into a flat int32 vector."""
+        units = np.stack([self.unit_type[env], self.unit_player[env], self.unit_cell[env],
+                          self.unit_hp[env], self.unit_mv[env], self.unit_ap[env]], axis=1)
+        return np.concatenate([units.ravel(), self.mana[env], self.hand[env].ravel(),
+                               [self.current[env], self.turn[env]]]).astype(np.int32)
+
+    def load_packed(self, packed, envs=None):
+        """Copies one packed position into the games in `envs` (all games by default)."""
+        envs = np.arange(self.num_envs) if envs is None else envs
+        u, h = self.max_units, self.hand_size
+        units = np.asarray(packed[:u * 6]).reshape(u, 6)
+        self.unit_type[envs] = units[:, 0]
+        self.unit_player[envs] = units[:, 1]
+        self.unit_cell[envs] = units[:, 2]
+        self.unit_hp[envs] = units[:, 3]
+        self.unit_mv[envs] = units[:, 4]
+        self.unit_ap[envs] = units[:, 5]
+        self.occupancy[envs] = -1
+        slots = np.flatnonzero(units[:, 0] >= 0)
+        self.occupancy[envs[:, None], units[slots, 2][None, :]] = slots
+        self.mana[envs] = packed[u * 6:u * 6 + 3]
+        self.hand[envs] = np.asarray(packed[u * 6 + 3:u * 6 + 3 + 3 * h]).reshape(3, h)
+        self.current[envs] = packed[-2]
+        self.turn[envs] = packed[-1]
+        self.refresh_geometry(envs)
+        self.masks = self.compute_action_masks(envs)
+
+    # --- MÁSCARAS ---
+
+    def core_cells(self, player):
+        """Cell of `player`'s core per game ([B] arrays of player ids), -1 if destroyed."""
+        is_core = (self.unit_type == CORE_TYPE) & (self.unit_player == player[:, None])
+        has_core = is_core.any(axis=1)
+        return np.where(has_core, self.unit_cell[np.arange(self.num_envs), is_core.argmax(axis=1)], -1)
+
+    def refresh_geometry(self, envs):
+        """Recomputes in_range and nbr_free for every unit slot of the games in `envs` (index array)."""
+        cells = self.unit_cell[envs] # [n, U]
+        unit_range = self.type_range[np.maximum(self.unit_type[envs], 0)]
+        dist = self.distance_flat.take(cells[:, :, None] * self.num_cells + cells[:, None, :])
+        self.in_range[envs] = dist <= unit_range[:, :, None]
+        nbr = self.neighbors[cells]
+        self.nbr_free[envs] = (nbr >= 0) & (self.occupancy[envs[:, None, None], np.maximum(nbr, 0)] < 0)
+
+    def update_geometry(self, envs, slots, cells):
+        """
+        Updates in_range and nbr_free after the units at (envs, slots) moved or appeared (slots may be
+        None) and the occupancy of `cells` ([n, k], per game) changed. Each game appears at most once.
+        """
+        if slots is not None:
+            # Distâncias: linha (a unidade como atacante) e coluna (como alvo)
+            unit_type = np.maximum(self.unit_type[envs], 0)
+            dist = self.distance_flat.take(self.unit_cell[envs, slots][:, None] * self.num_cells + self.unit_cell[envs])
+            self.in_range[envs, slots, :] = dist <= self.type_range[unit_type[np.arange(len(envs)), slots]][:, None]
+            self.in_range[envs, :, slots] = dist <= self.type_range[unit_type]
+
+        # Vizinhos livres: as unidades movidas e as que estão junto às células alteradas
+        nbr_cells = self.neighbors[cells].reshape(len(envs), cells.shape[1] * 6)
+        occupants = np.where(nbr_cells >= 0, self.occupancy[envs[:, None], np.maximum(nbr_cells, 0)], -1)
+        if slots is not None:
+            occupants = np.concatenate([occupants, slots[:, None]], axis=1)
+        game, j = np.nonzero(occupants >= 0)
+        envs, slots = envs[game], occupants[game, j]
+        nbr = self.neighbors[self.unit_cell[envs, slots]]
+        self.nbr_free[envs, slots] = (nbr >= 0) & (self.occupancy[envs[:, None], np.maximum(nbr, 0)] < 0)
+
+    def compute_action_masks(self, envs=None):
+        """
+        Writes the masks of the games in `envs` (index array, all games by default) into mask_buffer
+        and returns it. The buffer is reused: its rows are overwritten by the next step.
+        """
+        sel = slice(None) if envs is None else envs
+        b = self.num_envs if envs is None else len(envs)
+        u = self.max_units
+        rows = np.arange(b)[:, None]
+        current = self.current[sel]
+        raw_type = self.unit_type[sel]
+        player = self.unit_player[sel]
+        alive = raw_type >= 0
+        own = alive & (player == current[:, None])
+        enemy = alive & (player != current[:, None])
+        unit_type = np.where(alive, raw_type, 0)
+        nbr_free = self.nbr_free[sel]
+
+        # Movimento: um hexágono por ponto de MV, para vizinhos livres
+        can_step = own & (raw_type != CORE_TYPE) & (self.unit_mv[sel] > 0)
+
+        # Ataque
+        can_attack = own & (raw_type != CORE_TYPE) & (self.unit_ap[sel] > 0) & (self.type_atk[unit_type] > 0)
+
+        # Cartas: alvos por tipo de efeito (a linha 5 fica vazia para as cartas que não se podem jogar),
+        # distribuídos pelas posições da mão conforme o tipo de cada carta
+        is_core = (raw_type == CORE_TYPE) & (player == current[:, None])
+        has_core = is_core.any(axis=1)
+        core = np.where(has_core, self.unit_cell[sel][rows[:, 0], is_core.argmax(axis=1)], 0)
+        occupancy = self.occupancy[sel]
+        disk = self.disk[core] # [b, K]
+        disk_free = (disk >= 0) & (occupancy[rows, np.maximum(disk, 0)] < 0) & has_core[:, None]
+        disk_free &= (~alive).any(axis=1)[:, None] # Precisa de uma posição livre para a nova unidade
+        core_dist = self.distance_flat.take(core[:, None] * self.num_cells + self.unit_cell[sel])
+
+        targets = np.zeros((b, 6, self.card_targets), dtype=bool)
+        targets[:, CARD_INVOKE, :disk.shape[1]] = disk_free
+        targets[:, CARD_PULSE, :u] = enemy & has_core[:, None] & (core_dist <= PULSE_RANGE)
+        targets[:, CARD_SHIELD, :u] = own
+        targets[:, CARD_DRAW, 0] = True
+        targets[:, CARD_TRANSLOCATE] = (own[:, :, None] & nbr_free).reshape(b, self.card_targets)
+
+        hand = self.hand[sel][rows[:, 0], current] # [b, H]
+        card = np.maximum(hand, 0)
+        playable = (hand >= 0) & (self.card_cost[card] <= self.mana[sel][rows[:, 0], current][:, None])
+        hand_kind = np.where(playable, self.card_kind[card], 5)
+
+        masks = self.mask_buffer
+        masks[sel, 0] = True
+        masks[sel, self.move_offset:self.attack_offset] = (can_step[:, :, None] & nbr_free).reshape(b, u * 6)
+        masks[sel, self.attack_offset:self.card_offset] = (
+            can_attack[:, :, None] & enemy[:, None, :] & self.in_range[sel]).reshape(b, u * u)
+        masks[sel, self.card_offset:] = targets[rows, hand_kind].reshape(b, self.hand_size * self.card_targets)
+        return masks
+
+    def action_masks(self):
+        """
+        [num_envs, num_actions] boolean mask of the legal actions in the current positions.
+        The array is reused and updated in place by step/reset; copy it to keep it.
+        """
+        return self.masks
+
+    # --- REGRAS ---
+
+    def kill_dead_units(self, envs, slots):
+        """Removes the units at (envs, slots) whose HP dropped to 0. Returns the games where a core died."""
+        dead = self.unit_hp[envs, slots] <= 0
+        envs, slots = envs[dead], slots[dead]
+        core_killed = envs[self.unit_type[envs, slots] == CORE_TYPE]
+        cells = self.unit_cell[envs, slots]
+        self.occupancy[envs, cells] = -1
+        self.unit_type[envs, slots] = -1
+        self.update_geometry(envs, None, cells[:, None])
+        return core_killed
+
+    def relocate(self, envs, slots, cells):
+        old_cells = self.unit_cell[envs, slots]
+        self.occupancy[envs, old_cells] = -1
+        self.unit_cell[envs, slots] = cells
+        self.occupancy[envs, cells] = slots
+        self.update_geometry(envs, slots, np.stack([old_cells, cells], axis=1))
+
+    def draw_cards(self, envs, players):
+        """Each game in envs draws one random card for `players` if their hand is not full."""
+        hands = self.hand[envs, players]
+        free = hands < 0
+        has_room = free.any(axis=1)
+        envs, players = envs[has_room], players[has_room]
+        free_slot = free[has_room].argmax(axis=1)
+        self.hand[envs, players, free_slot] = self.rng.integers(0, len(CARD_NAMES), size=len(envs))
+
+    def zones_controlled(self, envs, player):
+        occupant = self.occupancy[envs[:, None], self.zone_cells[None, :]]
+        owner = np.where(occupant >= 0, self.unit_player[envs[:, None], np.maximum(occupant, 0)], 0)
+        return (owner == player[:, None]).sum(axis=1)
+
+    def end_turn(self, envs, winner):
+        """Ends the turn in envs and starts the next player's turn (zone victory, mana, card, MV/AP)."""
+        ending = self.current[envs]
+        starting = 3 - ending
+        self.current[envs] = starting
+        self.turn[envs] += 1
+
+        if engine.MYSTIC_ZONES_TO_WIN > 0:
+            zone_win = self.zones_controlled(envs, ending) >= engine.MYSTIC_ZONES_TO_WIN
+            winner[envs[zone_win]] = ending[zone_win]
+            envs, starting = envs[~zone_win], starting[~zone_win]
+
+        self.mana[envs, starting] += 1
+        draws = np.isin(starting, self.draw_players)
+        self.draw_cards(envs[draws], starting[draws])
+        own = (self.unit_player[envs] == starting[:, None]) & (self.unit_type[envs] >= 0)
+        self.unit_mv[envs] = np.where(own, self.type_mv[np.maximum(self.unit_type[envs], 0)], self.unit_mv[envs])
+        self.unit_ap[envs] = np.where(own, 1, self.unit_ap[envs])
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        envs = np.arange(self.num_envs)
+        acting = self.current.copy()
+        winner = np.zeros(self.num_envs, dtype=np.int32)
+
+        legal = self.masks[envs, actions]
+        envs, actions = envs[legal], actions[legal]
+
+        # Movimento
+        sel = (actions >= self.move_offset) & (actions < self.attack_offset)
+        e, a = envs[sel], actions[sel] - self.move_offset
+        slots, directions = a // 6, a % 6
+        self.relocate(e, slots, self.neighbors[self.unit_cell[e, slots], directions])
+        self.unit_mv[e, slots] -= 1
+
+        # Ataque
+        sel = (actions >= self.attack_offset) & (actions < self.card_offset)
+        e, a = envs[sel], actions[sel] - self.attack_offset
+        attackers, targets = a // self.max_units, a % self.max_units
+        self.unit_hp[e, targets] -= self.type_atk[self.unit_type[e, attackers]]
+        self.unit_ap[e, attackers] -= 1
+        core_killed = self.kill_dead_units(e, targets)
+        winner[core_killed] = acting[core_killed]
+
+        # Cartas
+        sel = actions >= self.card_offset
+        e, a = envs[sel], actions[sel] - self.card_offset
+        hand_slots, card_targets = a // self.card_targets, a % self.card_targets
+        players = acting[e]
+        cards = self.hand[e, players, hand_slots]
+        self.mana[e, players] -= self.card_cost[cards]
+        self.hand[e, players, hand_slots] = -1
+        kinds = self.card_kind[cards]
+
+        k = kinds == CARD_INVOKE
+        ek, cells = e[k], self.disk[self.core_cells(acting)[e[k]], card_targets[k]]
+        new_slots = (self.unit_type[ek] < 0).argmax(axis=1)
+        new_types = self.card_unit_type[cards[k]]
+        self.unit_type[ek, new_slots] = new_types
+        self.unit_player[ek, new_slots] = players[k]
+        self.unit_hp[ek, new_slots] = self.type_hp[new_types]
+        self.unit_mv[ek, new_slots] = 0 # Fadiga de invocação
+        self.unit_ap[ek, new_slots] = 0
+        self.unit_cell[ek, new_slots] = cells
+        self.occupancy[ek, cells] = new_slots
+        self.update_geometry(ek, new_slots, cells[:, None])
+
+        k = kinds == CARD_PULSE
+        self.unit_hp[e[k], card_targets[k]] -= PULSE_DAMAGE
+        core_killed = self.kill_dead_units(e[k], card_targets[k])
+        winner[core_killed] = acting[core_killed]
+
+        k = kinds == CARD_SHIELD
+        ek, slots = e[k], card_targets[k]
+        self.unit_hp[ek, slots] = np.minimum(self.type_hp[self.unit_type[ek, slots]], self.unit_hp[ek, slots] + SHIELD_AMOUNT)
+
+        k = kinds == CARD_DRAW
+        for _ in range(CARDS_PER_DRAW_SPELL):
+            self.draw_cards(e[k], players[k])
+
+        k = kinds == CARD_TRANSLOCATE
+        ek, slots, directions = e[k], card_targets[k] // 6, card_targets[k] % 6
+        self.relocate(ek, slots, self.neighbors[self.unit_cell[ek, slots], directions])
+
+        # Fim de turno
+        sel = (actions == 0) & (winner[envs] == 0)
+        self.end_turn(envs[sel], winner)
+
+        terminated = winner > 0
+        truncated = ~terminated & (self.turn > self.max_turns)
+        rewards = np.where(terminated, np.where(winner == acting, 1.0, -1.0), 0.0).astype(np.float32)
+        info = {'winner': winner, 'turns': self.turn.copy()}
+
+        # Reinício automático dos jogos terminados; a observação devolvida é a do novo jogo.
+        # Só as máscaras dos jogos que mudaram (ação legal ou reinício) são recalculadas.
+        done = terminated | truncated
+        self.reset_envs(np.flatnonzero(done))
+        changed = done.copy()
+        changed[envs] = True
+        self.masks = self.compute_action_masks(None if changed.all() else np.flatnonzero(changed))
+        return self.observe() if self.observations else None, rewards, terminated, truncated, info
+
+    # --- OBSERVAÇÕES ---
+
+    def observe(self):
+        """
+        'board': [B, OBS_CHANNELS, rows, cols] float32 with unit type one-hot, mine/enemy, hp, mv, ap
+        and zone channels; 'globals': [B, 4 + len(CARD_NAMES)] with mana, hand sizes, turn and own hand counts.
+        """
+        b = self.num_envs
+        envs = np.arange(b)
+        board = np.zeros((b, OBS_CHANNELS, self.num_cells), dtype=np.float32)
+
+        # Canais de unidades: escreve só nas células ocupadas, a partir dos arrays de unidades
+        # (índices planos em board, mais baratos do que a indexação com três arrays)
+        ei, si = np.nonzero(self.unit_type >= 0)
+        n = self.num_cells
+        base = ei * (OBS_CHANNELS * n) + self.unit_cell[ei, si]
+        mine = self.unit_player[ei, si] == self.current[ei]
+        c = len(UNIT_TYPES)
+        flat = board.reshape(-1)
+        flat[base + self.unit_type[ei, si] * n] = 1.0
+        flat[base + np.where(mine, c, c + 1) * n] = 1.0
+        flat[base + (c + 2) * n] = self.unit_hp[ei, si] / self.type_hp.max()
+        flat[base + (c + 3) * n] = self.unit_mv[ei, si] / max(1, self.type_mv.max())
+        flat[base + (c + 4) * n] = self.unit_ap[ei, si]
+
+        board[:, c + 5, self.zone_cells] = 1.0
+        occupant = self.occupancy[:, self.zone_cells]
+        zone_owner = np.where(occupant >= 0, self.unit_player[envs[:, None], np.maximum(occupant, 0)], 0)
+        board[:, c + 6, self.zone_cells] = zone_owner == self.current[:, None]
+        board[:, c + 7, self.zone_cells] = (zone_owner != 0) & (zone_owner != self.current[:, None])
+
+        own_hand = self.hand[envs, self.current]
+        other_hand = self.hand[envs, 3 - self.current]
+        held = own_hand >= 0
+        hand_counts = np.bincount(np.nonzero(held)[0] * len(CARD_NAMES) + own_hand[held],
+                                  minlength=b * len(CARD_NAMES)).reshape(b, len(CARD_NAMES))
+        globals_ = np.concatenate([
+            np.stack([self.mana[envs, self.current], self.mana[envs, 3 - self.current],
+                      (other_hand >= 0).sum(axis=1), self.turn], axis=1),
+            hand_counts,
+        ], axis=1).astype(np.float32)
+
+        return {'board': board.reshape(b, OBS_CHANNELS, self.num_rows, self.num_cols), 'globals': globals_}
+
+
+def pack_engine_state(game_state, max_units=20):
+    """
+    Packs an arcanum_engine game state into the ArcanumVecEnv.pack layout.
+    Returns (packed, unit_ids) where unit_ids[slot] is the engine ID of the unit in that slot.
+    Raises ValueError if the game has more than max_units units.
+    """
+    units = sorted(game_state.units.items(), key=lambda item: int(item[0]))
+    if len(units) > max_units:
+        raise ValueError(f"O jogo tem {len(units)} unidades (máximo {max_units}).")
+    hand_size = engine.MAX_HAND_SIZE
+
+    packed_units = np.zeros((max_units, 6), dtype=np.int32)
+    packed_units[:, 0] = -1
+    for slot, (uid, unit) in enumerate(units):
+        packed_units[slot] = (UNIT_TYPES.index(unit['type']), unit['player'], unit['cell'],
+                              unit['hp'], unit['mv_remaining'], unit['ap_remaining'])
+
+    mana = [0, game_state.mana.get(1, 0), game_state.mana.get(2, 0)]
+    hand = np.full((3, hand_size), -1, dtype=np.int32)
+    for player_id, cards in game_state.hand.items():
+        cards = [CARD_NAMES.index(card) for card in cards[:hand_size]]
+        hand[player_id, :len(cards)] = cards
+
+    packed = np.concatenate([packed_units.ravel(), mana, hand.ravel(),
+                             [game_state.current_turn, game_state.turn_number]]).astype(np.int32)
+    return packed, [uid for uid, _ in units]
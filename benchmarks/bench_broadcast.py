@@ -0,0 +1,110 @@
+"""
+Cost of spectators with the shared frame broadcast (arcanum_broadcast.py).
+
+Plays a game with random legal actions and publishes every position while N
+viewer threads wait in wait_for_frame and read the new frame. For each number
+of viewers it reports the frames built, the process CPU time per state change
+and the delivery latency (publish to viewer wake-up), next to the CPU time per
+change if every viewer formatted the board itself from the snapshot.
+
+    python benchmarks/bench_broadcast.py [--viewers 1 10 100 1000] [--changes 30] [--interval-ms 20]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import arcanum_broadcast as broadcast
+import arcanum_engine as engine
+import arcanum_perft
+
+GAME_ID = -1 # Fora da gama dos IDs de jogos reais
+
+
+def game_snapshots(changes, seed):
+    """History snapshots of a game played with random legal actions (restarting when it ends)."""
+    rng = random.Random(seed)
+    arcanum_perft.setup_opening(seed)
+    snapshots = []
+    while len(snapshots) < changes:
+        if engine.state.game_over:
+            arcanum_perft.setup_opening(seed)
+        arcanum_perft.apply_action(rng.choice(arcanum_perft.legal_actions()), rng.randrange(2**32))
+        snapshots.append(engine.state.history[-1])
+    return snapshots
+
+
+def viewer(latencies, ready):
+    version = 0
+    ready.release()
+    while True:
+        frame = broadcast.wait_for_frame(GAME_ID, version)
+        if frame is None:
+            return
+        latencies.append(time.time() - frame.published_at)
+        version = frame.version
+        len(frame.board_html) + len(frame.event_log) # O que uma sessão de espectador desenha
+
+
+def run_shared(num_viewers, snapshots, interval):
+    broadcast.publish(GAME_ID, snapshots[0])
+    latencies = []
+    ready = threading.Semaphore(0)
+    threads = [threading.Thread(target=viewer, args=(latencies, ready), daemon=True) for _ in range(num_viewers)]
+    for thread in threads:
+        thread.start()
+    for _ in threads:
+        ready.acquire()
+    time.sleep(interval)
+    del latencies[:] # Entrega do primeiro frame, anterior à medição
+
+    built_before = broadcast.BROADCAST_STATS['frames_built']
+    cpu_start = time.process_time()
+    for snapshot in snapshots[1:]:
+        broadcast.publish(GAME_ID, snapshot)
+        time.sleep(interval)
+    cpu = time.process_time() - cpu_start
+    broadcast.unpublish(GAME_ID)
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return broadcast.BROADCAST_STATS['frames_built'] - built_before, cpu, latencies
+
+
+def per_viewer_cpu(num_viewers, snapshots):
+    """CPU time per change if every viewer built its own frame (measured on up to 100 viewers)."""
+    measured = min(num_viewers, 100)
+    start = time.process_time()
+    for version, snapshot in enumerate(snapshots[1:], 1):
+        for _ in range(measured):
+            broadcast.build_frame(GAME_ID, version, snapshot)
+    return (time.process_time() - start) * num_viewers / measured
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--viewers', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--changes', type=int, default=30)
+    parser.add_argument('--interval-ms', type=float, default=20, help='tempo entre alterações do jogo')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    engine.configure_policy_cache(None)
+    snapshots = game_snapshots(args.changes + 1, args.seed)
+    print(f"{args.changes} alterações, uma a cada {args.interval_ms:.0f} ms")
+    print(f"{'espectadores':>12} {'frames':>7} {'CPU ms/alteração':>17} {'sem partilha':>13} {'entrega p50 ms':>15} {'p99 ms':>8}")
+    for num_viewers in args.viewers:
+        built, cpu, latencies = run_shared(num_viewers, snapshots, args.interval_ms / 1000)
+        unshared = per_viewer_cpu(num_viewers, snapshots)
+        p50 = latencies[len(latencies) // 2] * 1000 if latencies else float('nan')
+        p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000 if latencies else float('nan')
+        print(f"{num_viewers:>12} {built:>7} {cpu * 1000 / args.changes:>17.2f} "
+              f"{unshared * 1000 / args.changes:>13.2f} {p50:>15.2f} {p99:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Allocations of the integer cell-ID position layer.
+
+Positions in the engine are cell IDs with prebuilt neighbour tuples, instead of
+(col_char, row) tuples rebuilt on every lookup. For each board size and unit
+count (games set up as in bench_scaling.py) it reports, measured with tracemalloc:
+
+- neighbour lookups over every cell: bytes allocated per lookup and time, next to
+  the former tuple layer (reproduced below as tuple_neighbors);
+- the memory allocated by setting up the game (board tables, units, occupancy index, history);
+- the peak memory allocated and the time to compute every unit's valid moves
+  (uncached BFS) and to play one full turn cycle (end_turn_streamlit, with the AI).
+
+    python benchmarks/bench_cells.py [--sizes 11 50 100] [--units 10 200 1000]
+
+--tree runs the same measurements on the engine and bench_scaling.py of another
+checkout, e.g. one from before the cell-ID layer, where positions are tuples and
+the first table measures the engine's own get_adjacent_hexes over them:
+
+    git worktree add /tmp/arcanum-tuples <commit>
+    python benchmarks/bench_cells.py --tree /tmp/arcanum-tuples
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+import tracemalloc
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+game = None # arcanum_engine da árvore medida (ver load_tree)
+setup_game = None
+
+
+def load_tree(root):
+    """Imports arcanum_engine and bench_scaling.setup_game from the checkout at root."""
+    global game, setup_game
+    sys.path[:0] = [root, os.path.join(root, 'benchmarks')]
+    game = importlib.import_module('arcanum_engine')
+    setup_game = importlib.import_module('bench_scaling').setup_game
+
+
+def tuple_neighbors(coords):
+    """Neighbours as the engine computed them before cell IDs: a new list of new tuples per call."""
+    col_char, row = coords
+    col = game.BOARD_COL_INDEX[col_char]
+    potential_neighbors = [(col, row - 1), (col, row + 1), (col - 1, row), (col + 1, row)]
+    if row % 2 != 0:
+        potential_neighbors.extend([(col + 1, row - 1), (col + 1, row + 1)])
+    else:
+        potential_neighbors.extend([(col - 1, row - 1), (col - 1, row + 1)])
+    num_cols = len(game.BOARD_COLS)
+    num_rows = len(game.BOARD_ROWS)
+    return [(game.BOARD_COLS[c], r) for c, r in potential_neighbors if 0 <= c < num_cols and 1 <= r <= num_rows]
+
+
+def lookup_cost(neighbors, positions):
+    """(bytes allocated per lookup, ns per lookup) of neighbors() over positions, results kept alive."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    results = [neighbors(position) for position in positions]
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del results
+
+    start = time.perf_counter()
+    for position in positions:
+        neighbors(position)
+    elapsed = time.perf_counter() - start
+    return allocated / len(positions), elapsed * 1e9 / len(positions)
+
+
+def traced(function):
+    """Peak bytes allocated by function() above the memory in use before it."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    function()
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return peak
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def all_valid_moves():
+    for uid in list(game.state.units):
+        game.compute_valid_moves_for_unit(uid)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[11, 50, 100])
+    parser.add_argument('--units', type=int, nargs='+', default=[10, 200, 1000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tree', default=os.path.join(BENCHMARKS_DIR, os.pardir),
+                        help='raiz da árvore a medir (por omissão, esta)')
+    args = parser.parse_args()
+    load_tree(os.path.abspath(args.tree))
+
+    print(f"{'board':>9} {'vizinhos B/consulta':>20} {'tuplos B/consulta':>18} {'ns':>6} {'ns tuplos':>10}")
+    for board_size in args.sizes:
+        game.configure_board(board_size, board_size)
+        coords = [(col_char, row) for row in game.BOARD_ROWS for col_char in game.BOARD_COLS]
+        positions = list(range(len(coords))) if hasattr(game, 'CELL_NEIGHBORS') else coords
+        cell_bytes, cell_ns = lookup_cost(game.get_adjacent_hexes, positions)
+        tuple_bytes, tuple_ns = lookup_cost(tuple_neighbors, coords)
+        print(f"{board_size:>4}x{board_size:<4} {cell_bytes:>20.1f} {tuple_bytes:>18.1f} {cell_ns:>6.0f} {tuple_ns:>10.0f}")
+
+    print()
+    print(f"{'board':>9} {'units':>7} {'estado KiB':>11} {'movimentos KiB':>15} {'ms':>7} {'turno KiB':>10} {'ms':>7}")
+    for board_size in args.sizes:
+        for num_units in args.units:
+            if num_units > board_size * board_size // 4:
+                continue # Tabuleiro demasiado cheio para a disposição aleatória
+            tracemalloc.start()
+            setup_game(board_size, num_units, args.seed)
+            state_bytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            moves_bytes = traced(all_valid_moves)
+            moves_time = timed(all_valid_moves)
+            turn_bytes = traced(game.end_turn_streamlit)
+            setup_game(board_size, num_units, args.seed)
+            turn_time = timed(game.end_turn_streamlit)
+            print(f"{board_size:>4}x{board_size:<4} {num_units:>7} {state_bytes / 1024:>11.0f} "
+                  f"{moves_bytes / 1024:>15.0f} {moves_time * 1000:>7.1f} {turn_bytes / 1024:>10.0f} {turn_time * 1000:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
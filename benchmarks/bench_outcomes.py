@@ -0,0 +1,65 @@
+"""
+Write and report throughput of the columnar game-outcome store (arcanum_outcomes.py).
+
+Simulates a sample of self-play games, then appends copies of it under fresh game
+IDs until the store holds --actions action rows (simulating tens of millions of
+actions takes hours on one core), and times balance_report over the whole store.
+
+    python benchmarks/bench_outcomes.py [--actions 20000000] [--store /tmp/arcanum_outcomes_bench]
+
+The store directory is deleted first.
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import pandas as pd
+
+import arcanum_outcomes as outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--actions', type=int, default=20_000_000)
+    parser.add_argument('--sample-envs', type=int, default=512)
+    parser.add_argument('--sample-steps', type=int, default=500)
+    parser.add_argument('--store', default='/tmp/arcanum_outcomes_bench')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    shutil.rmtree(args.store, ignore_errors=True)
+    start = time.perf_counter()
+    rows = outcomes.simulate(args.store, args.sample_envs, args.sample_steps, seed=args.seed)
+    print(f"Amostra: {rows['games']} jogos, {rows['actions']} ações simuladas em {time.perf_counter() - start:.1f} s")
+
+    games = outcomes.load_table(args.store, 'games')
+    actions = outcomes.load_table(args.store, 'actions')
+    sample_index = pd.Index(games['game_id'].to_numpy()).get_indexer(actions['game_id'].to_numpy())
+    total_games, total_actions = len(games), len(actions)
+    start = time.perf_counter()
+    with outcomes.OutcomeWriter(args.store) as writer:
+        while total_actions < args.actions:
+            game_ids = writer.new_game_ids(len(games))
+            writer.append('actions', **{column: actions[column].to_numpy() for column in outcomes.TABLES['actions']
+                                        if column != 'game_id'}, game_id=game_ids[sample_index])
+            writer.append('games', **{column: games[column].to_numpy() for column in outcomes.TABLES['games']
+                                      if column != 'game_id'}, game_id=game_ids)
+            total_games += len(games)
+            total_actions += len(actions)
+    elapsed = time.perf_counter() - start
+    print(f"Armazém: {total_games:,} jogos, {total_actions:,} ações "
+          f"({(total_actions - len(actions)) / elapsed:,.0f} linhas/s na escrita)")
+
+    start = time.perf_counter()
+    report = outcomes.balance_report(args.store)
+    elapsed = time.perf_counter() - start
+    print(f"balance_report: {elapsed:.2f} s ({total_actions / elapsed:,.0f} ações/s)")
+    print(report['cartas'][['jogos', 'vitórias %', 'jogadas']].round(1).to_string())
+
+
+if __name__ == '__main__':
+    main()
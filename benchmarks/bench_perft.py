@@ -0,0 +1,70 @@
+"""
+Perft counts on the reference positions: correctness oracle and throughput benchmark.
+
+For each position in arcanum_perft.REFERENCE_POSITIONS and each depth, runs
+perft and compares the count with benchmarks/perft_reference.json, reporting
+nodes per second. After an intentional rule change, rewrite the file with
+--update (and say why in the commit).
+
+    python benchmarks/bench_perft.py [--max-depth 3] [--no-bulk] [--update]
+
+Exits with status 1 when a count differs from the reference, so it can run in CI.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import arcanum_engine as engine
+import arcanum_perft
+
+REFERENCE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'perft_reference.json')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-depth', type=int, default=3)
+    parser.add_argument('--no-bulk', action='store_true', help='joga também o último nível (mais lento)')
+    parser.add_argument('--update', action='store_true', help='reescreve as contagens de referência')
+    args = parser.parse_args()
+
+    with open(REFERENCE_FILE) as f:
+        reference = json.load(f)
+    seed = reference['seed']
+
+    engine.configure_policy_cache(None)
+    print(f"{'posição':>10} {'prof.':>5} {'nós':>10} {'referência':>11} {'nós/s':>9}")
+    mismatches = []
+    for name, setup in arcanum_perft.REFERENCE_POSITIONS.items():
+        expected = reference['positions'].get(name, [])
+        counts = []
+        for depth in range(1, args.max_depth + 1):
+            setup(seed)
+            start = time.perf_counter()
+            nodes = arcanum_perft.perft(depth, seed, bulk=not args.no_bulk)
+            elapsed = time.perf_counter() - start
+            counts.append(nodes)
+            known = expected[depth - 1] if depth <= len(expected) else None
+            if known is not None and known != nodes:
+                mismatches.append(f"{name} perft({depth})")
+            print(f"{name:>10} {depth:>5} {nodes:>10} {known if known is not None else '-':>11} {nodes / elapsed:>9,.0f}")
+        if args.update:
+            reference['positions'][name] = counts
+
+    if args.update:
+        with open(REFERENCE_FILE, 'w') as f:
+            json.dump(reference, f, indent=4)
+            f.write('\n')
+        print(f"Referências reescritas em {REFERENCE_FILE}.")
+    elif mismatches:
+        print(f"CONTAGENS DIFERENTES: {', '.join(mismatches)}")
+        sys.exit(1)
+    else:
+        print("Contagens iguais às de referência.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Speedup of the root-parallel rollout search with the number of worker processes.
+
+For each worker count, runs several AI decisions from the opening position with a
+fixed time budget and reports rollouts per decision, the decision latency beyond
+the budget (state broadcast, result gather and the last batch) and the speedup in
+rollouts per second of wall time over the single-core search (0 workers:
+rollouts in this process).
+
+    python benchmarks/bench_rollouts.py [--workers 0 1 2 4 8 16] [--budget-ms 200] [--decisions 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import arcanum_engine as engine
+from arcanum_rollouts import RolloutSearch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4, 8, 16])
+    parser.add_argument('--budget-ms', type=float, default=200)
+    parser.add_argument('--decisions', type=int, default=5)
+    args = parser.parse_args()
+
+    engine.configure_policy_cache(None)
+    engine.initialize_game()
+    print(f"CPUs disponíveis: {os.cpu_count()}; orçamento por decisão: {args.budget_ms:.0f} ms")
+    print(f"{'workers':>8} {'rollouts/decisão':>17} {'latência extra ms':>18} {'rollouts/s':>11} {'speedup':>8}")
+
+    baseline = None
+    for num_workers in args.workers:
+        with RolloutSearch(num_workers=num_workers, seed=0) as search:
+            search.search(engine.state, args.budget_ms) # Aquecimento: arranque dos processos e imports
+            rollouts = 0
+            elapsed = 0.0
+            for _ in range(args.decisions):
+                start = time.perf_counter()
+                result = search.search(engine.state, args.budget_ms)
+                elapsed += time.perf_counter() - start
+                rollouts += result['rollouts']
+        overhead = elapsed * 1000 / args.decisions - args.budget_ms
+        rate = rollouts / elapsed
+        if baseline is None:
+            baseline = rate
+        print(f"{num_workers:>8} {rollouts / args.decisions:>17,.0f} {overhead:>18.1f} {rate:>11,.0f} {rate / baseline:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Scaling benchmark for the rules engine and the AI.
+
+Measures, for each board size and unit count, the cost of one full turn cycle:
+the player's selection queries (valid moves and attack targets for every unit of
+player 1) and end_turn_streamlit (AI turn plus the start of the next player turn).
+With --fog the games use the fog-of-war rule (vision updated on every unit change)
+and the table adds what recomputing every unit's vision from scratch would cost.
+
+    python benchmarks/bench_scaling.py
+    python benchmarks/bench_scaling.py --sizes 11 50 100 200 --units 10 500 2000 --plot scaling.png
+    python benchmarks/bench_scaling.py --fog
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import arcanum_engine as game
+
+MOBILE_UNIT_TYPES = [unit_type for unit_type in game.UNIT_DATA if unit_type != 'Arcane Core']
+
+
+def setup_game(board_size, num_units, seed, fog_of_war=False):
+    """Starts a fresh game on a board_size x board_size board with num_units extra units split between players."""
+    random.seed(seed)
+    game.configure_policy_cache(None) # Mede o cálculo da AI, não consultas à cache persistente
+    game.configure_board(board_size, board_size)
+    game.initialize_game(fog_of_war=fog_of_war)
+
+    half_rows = board_size // 2
+    for i in range(num_units):
+        player_id = 1 if i % 2 == 0 else 2
+        # Jogador 1 ocupa a metade de baixo, a AI a metade de cima
+        rows = game.BOARD_ROWS[half_rows:] if player_id == 1 else game.BOARD_ROWS[:half_rows]
+        for _ in range(100):
+            coords = game.cell_id(random.randrange(board_size), random.choice(rows))
+            if coords not in game.state.unit_positions:
+                game.add_unit(game.create_unit(random.choice(MOBILE_UNIT_TYPES), player_id, coords))
+                break
+    game.update_mystic_zone_control()
+
+
+def measure_turn():
+    start = time.perf_counter()
+    for uid in list(game.get_player_units(1)):
+        game.get_valid_moves_for_unit(uid)
+        game.get_valid_attack_targets_for_unit(uid)
+    queries_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    game.end_turn_streamlit()
+    end_turn_time = time.perf_counter() - start
+    return queries_time, end_turn_time
+
+
+def measure_vision_rebuild():
+    start = time.perf_counter()
+    game.rebuild_vision()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[11, 50, 100, 200])
+    parser.add_argument('--units', type=int, nargs='+', default=[10, 200, 1000, 3000])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--plot', help="Guarda um gráfico (requer matplotlib) neste ficheiro")
+    parser.add_argument('--fog', action='store_true', help="Joga com nevoeiro de guerra")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'board':>9} {'units':>7} {'queries ms':>11} {'end turn ms':>12} {'total ms':>10}"
+          + (f" {'rebuild vision ms':>18}" if args.fog else ""))
+    for board_size in args.sizes:
+        for num_units in args.units:
+            if num_units > board_size * board_size // 4:
+                continue # Tabuleiro demasiado cheio para a disposição aleatória
+            timings = []
+            rebuilds = []
+            for repeat in range(args.repeats):
+                setup_game(board_size, num_units, seed=repeat, fog_of_war=args.fog)
+                timings.append(measure_turn())
+                if args.fog:
+                    rebuilds.append(measure_vision_rebuild())
+            queries_ms = 1000 * min(t[0] for t in timings)
+            end_turn_ms = 1000 * min(t[1] for t in timings)
+            results.append((board_size, num_units, queries_ms, end_turn_ms))
+            print(f"{board_size:>4}x{board_size:<4} {num_units:>7} {queries_ms:>11.1f} {end_turn_ms:>12.1f} {queries_ms + end_turn_ms:>10.1f}"
+                  + (f" {1000 * min(rebuilds):>18.1f}" if args.fog else ""))
+
+    if args.plot:
+        try:
+            import matplotlib
+            matplotlib.use('Agg')
+            import matplotlib.pyplot as plt
+        except ImportError:
+            print("matplotlib não está instalado; gráfico não gerado.")
+            return
+
+        fig, ax = plt.subplots()
+        for board_size in args.sizes:
+            points = [(n, q + e) for size, n, q, e in results if size == board_size]
+            if points:
+                ax.plot([p[0] for p in points], [p[1] for p in points], marker='o', label=f"{board_size}x{board_size}")
+        ax.set_xlabel("Unidades no tabuleiro")
+        ax.set_ylabel("Custo por turno (ms)")
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.legend()
+        fig.savefig(args.plot)
+        print(f"Gráfico guardado em {args.plot}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Cold-start benchmark for worker processes that only need the rules.
+
+Runs `python -X importtime -c "import arcanum_engine"` in fresh interpreters and
+checks the result against benchmarks/startup_budget.json:
+
+- the cumulative import time reported by -X importtime for the engine module,
+- the extra wall-clock time of a process that imports it, compared with an empty
+  interpreter,
+- that none of the forbidden heavy modules (Streamlit, pandas, ...) get imported.
+
+    python benchmarks/bench_startup.py [--runs 15]
+
+Exits with status 1 when the budget is exceeded, so it can run in CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_budget.json')
+
+
+def run_python(code, *flags):
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None) # Os workers reais correm com bytecode em cache
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *flags, '-c', code], cwd=REPO_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, result
+
+
+def import_cumulative_us(module):
+    """Cumulative import time of `module` in a fresh interpreter, from -X importtime."""
+    _, result = run_python(f"import {module}", '-X', 'importtime')
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if name.strip() == module:
+            return int(cumulative_us)
+    raise RuntimeError(f"{module} não aparece na saída de -X importtime")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=15)
+    args = parser.parse_args()
+
+    with open(BUDGET_FILE) as f:
+        budget = json.load(f)
+    module = budget['module']
+
+    run_python(f"import {module}") # Aquece a cache de bytecode
+
+    import_times = [import_cumulative_us(module) for _ in range(args.runs)]
+    baseline_times = [run_python("pass")[0] for _ in range(args.runs)]
+    module_times = [run_python(f"import {module}")[0] for _ in range(args.runs)]
+    overhead_ms = 1000 * (statistics.median(module_times) - statistics.median(baseline_times))
+
+    _, result = run_python(f"import sys, {module}; print(','.join(sorted(sys.modules)))")
+    loaded = set(result.stdout.strip().split(','))
+    forbidden_loaded = [name for name in budget['forbidden_modules'] if name in loaded]
+
+    import_us = statistics.median(import_times)
+    print(f"{module}: import cumulativo {import_us:.0f} us (orçamento {budget['max_import_cumulative_us']} us)")
+    print(f"{module}: custo extra do processo {overhead_ms:.1f} ms (orçamento {budget['max_process_overhead_ms']} ms)")
+    print(f"Módulos proibidos carregados: {', '.join(forbidden_loaded) or 'nenhum'}")
+
+    failures = []
+    if import_us > budget['max_import_cumulative_us']:
+        failures.append("tempo de import")
+    if overhead_ms > budget['max_process_overhead_ms']:
+        failures.append("custo extra do processo")
+    if forbidden_loaded:
+        failures.append("módulos proibidos")
+
+    if failures:
+        print(f"ORÇAMENTO EXCEDIDO: {', '.join(failures)}")
+        sys.exit(1)
+    print("Dentro do orçamento.")
+
+
+if __name__ == '__main__':
+    main()
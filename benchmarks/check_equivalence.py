@@ -0,0 +1,169 @@
+"""
+Equivalence checks for the caches and batched rules that must agree with the engine.
+
+- arcanum_batch: legal_moves_mask / legal_attacks_mask against move_unit_streamlit
+  and attack_unit_streamlit (each candidate played and undone) on random positions;
+- arcanum_vecenv: the incrementally updated unit geometry and action masks against
+  a full recompute (refresh_geometry + compute_action_masks) after every step;
+- turn history: every snapshot against the live units, undo_last_action against
+  the position before the action and rewind_to_turn against the turn start.
+
+    python benchmarks/check_equivalence.py [--games 6] [--steps 300] [--seed 0]
+
+Reports the first mismatch of each check and exits with status 1 if there is
+one, so it can run in CI next to bench_perft.py.
+"""
+import argparse
+import copy
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import arcanum_batch
+import arcanum_engine as engine
+import arcanum_perft
+from arcanum_vecenv import ArcanumVecEnv
+
+
+def random_positions(games, steps, seed):
+    """Plays random legal actions from the reference positions, yielding (game, rng) after each one."""
+    rng = random.Random(seed)
+    setups = list(arcanum_perft.REFERENCE_POSITIONS.values())
+    for game in range(games):
+        setups[game % len(setups)](seed + game)
+        for _ in range(steps):
+            actions = arcanum_perft.legal_actions()
+            if not actions:
+                break
+            arcanum_perft.apply_action(rng.choice(actions), seed + game)
+            yield game, rng
+
+
+def engine_accepts(play):
+    """Plays an action on the bound state, undoes it and returns whether the engine accepted it."""
+    history_length = len(engine.state.history)
+    accepted = play()
+    arcanum_perft.undo_to(history_length)
+    return accepted
+
+
+def check_batch_masks(games, steps, seed):
+    checked = 0
+    for position, (_, rng) in enumerate(random_positions(games, steps, seed)):
+        if position % 10:
+            continue
+        units = list(engine.state.units.items())
+        move_units, move_cells = [], []
+        for uid, unit in units:
+            cells = set(engine.get_hex_disk(unit['cell'], unit['mv_remaining'] + 1))
+            cells.update(rng.randrange(engine.NUM_CELLS) for _ in range(3))
+            move_units += [uid] * len(cells)
+            move_cells += sorted(cells)
+        attackers = [uid for uid, _ in units for _ in units]
+        targets = [uid for _ in units for uid, _ in units]
+
+        snapshot = arcanum_batch.BatchSnapshot()
+        got_moves = arcanum_batch.legal_moves_mask(move_units, move_cells, snapshot)
+        got_attacks = arcanum_batch.legal_attacks_mask(attackers, targets, snapshot)
+        for uid, cell, got in zip(move_units, move_cells, got_moves):
+            if engine_accepts(lambda: engine.move_unit_streamlit(uid, cell)) != got:
+                return f"legal_moves_mask({uid} -> {engine.coord_label(cell)})"
+        for attacker, target, got in zip(attackers, targets, got_attacks):
+            if engine_accepts(lambda: engine.attack_unit_streamlit(attacker, target)) != got:
+                return f"legal_attacks_mask({attacker} -> {target})"
+        checked += len(move_units) + len(attackers)
+    print(f"arcanum_batch: {checked} ações candidatas iguais ao motor")
+    return None
+
+
+def check_vecenv(steps, seed, num_envs=64):
+    env = ArcanumVecEnv(num_envs, seed=seed, observations=False)
+    env.reset()
+    rng = np.random.default_rng(seed)
+    for step in range(steps * 10):
+        scores = rng.random(env.masks.shape)
+        scores[~env.masks] = -1.0
+        actions = scores.argmax(axis=1)
+        illegal = rng.random(num_envs) < 0.1 # Ações ilegais também não podem alterar as tabelas
+        actions[illegal] = rng.integers(0, env.num_actions, illegal.sum())
+        env.step(actions)
+
+        masks, in_range, nbr_free = env.masks.copy(), env.in_range.copy(), env.nbr_free.copy()
+        envs = np.arange(num_envs)
+        env.refresh_geometry(envs)
+        env.compute_action_masks()
+        alive = env.unit_type >= 0 # As posições livres guardam valores antigos, que as máscaras ignoram
+        pairs = alive[:, :, None] & alive[:, None, :]
+        if not (in_range[pairs] == env.in_range[pairs]).all():
+            return f"in_range no passo {step}"
+        if not (nbr_free[alive] == env.nbr_free[alive]).all():
+            return f"nbr_free no passo {step}"
+        if not (masks == env.masks).all():
+            return f"máscaras no passo {step}"
+    print(f"arcanum_vecenv: {steps * 10} passos x {num_envs} jogos iguais ao recálculo completo")
+    return None
+
+
+def position_record():
+    state = engine.state
+    return copy.deepcopy((state.units, state.mana, state.hand, state.current_turn, state.turn_number,
+                          state.game_over, state.next_unit_id))
+
+
+def check_history(games, steps, seed):
+    undos = rewinds = 0
+    current_game = None
+    for game, rng in random_positions(games, steps, seed):
+        if game != current_game:
+            current_game, turn_starts, before = game, {}, None
+        state = engine.state
+        snapshot = state.history[-1]
+        stored = {uid: unit for bucket in snapshot['unit_buckets'] for uid, unit in bucket.items()}
+        if stored != state.units:
+            return f"snapshot '{snapshot['label']}'"
+        if snapshot['turn_start']:
+            turn_starts = {turn: record for turn, record in turn_starts.items() if turn < snapshot['turn_number']}
+            turn_starts[snapshot['turn_number']] = position_record()
+
+        if before is not None and engine.can_undo() and rng.random() < 0.2:
+            engine.undo_last_action()
+            undos += 1
+            if position_record() != before:
+                return f"undo_last_action depois de '{snapshot['label']}'"
+        elif len(turn_starts) > 1 and rng.random() < 0.05:
+            turn = rng.choice(sorted(turn_starts)[:-1])
+            engine.rewind_to_turn(turn)
+            rewinds += 1
+            if position_record() != turn_starts[turn]:
+                return f"rewind_to_turn({turn})"
+            turn_starts = {t: record for t, record in turn_starts.items() if t <= turn}
+        before = position_record()
+    print(f"histórico: snapshots, {undos} desfazer e {rewinds} recuos iguais às posições de referência")
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=6)
+    parser.add_argument('--steps', type=int, default=300, help='ações aleatórias por jogo')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    engine.configure_policy_cache(None)
+    mismatches = [mismatch for mismatch in (
+        check_batch_masks(args.games, args.steps // 3, args.seed),
+        check_vecenv(args.steps, args.seed),
+        check_history(args.games, args.steps, args.seed),
+    ) if mismatch]
+    if mismatches:
+        print(f"DIFERENÇAS: {', '.join(mismatches)}")
+        sys.exit(1)
+    print("Caches iguais às computações de referência.")
+
+
+if __name__ == '__main__':
+    main()
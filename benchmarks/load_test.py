@@ -0,0 +1,347 @@
+"""
+Load test for the Streamlit app with many concurrent simulated players.
+
+Starts the app with `streamlit run` in a subprocess and connects one websocket
+client per player to it (/_stcore/stream, the protocol the browser speaks: a
+BackMsg rerun request with the widget states, ForwardMsg deltas back), so
+sessions overlap in the server exactly as real browsers would. The players read
+the rendered board buttons, the unit list, the mana and the card selector, and
+click hex_ buttons to select units and move or attack, choose invocation cards in
+the card selector, play them on a valid hex and press "Terminar turno",
+following a policy:
+
+- random: any legal interaction, uniformly;
+- scripted: attack if possible, otherwise invoke when there is mana, move towards
+  the enemy core and end the turn when nothing is left.
+
+An interaction's latency runs from sending the widget states until the server
+finishes the script run that answers it (st.rerun() included). For each number of
+sessions it reports p50/p95/p99 interaction latency, interactions per second, the
+server process's CPU use and resident memory (peak), the CPU use of this client
+process, and stops early once p99 exceeds --max-p99-ms (the session count where
+the server falls over). If the client's CPU nears 100%, the client is the
+bottleneck: run several with fewer sessions each against one server instead.
+
+    python benchmarks/load_test.py --sessions 1 10 50 100 200 --interactions 20 --policy random
+
+Linux only (the server's CPU and memory are read from /proc/<pid>). Needs the
+websockets package.
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+import arcanum_engine as engine
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'arcanum_tactics.py')
+UNIT_LINE = re.compile(r"\*\*ID: (\d+)\*\* \| (.+?) \(Tu\) \| Pos: (\w+) \| HP: \d+/\d+ \| MV: (\d+)/\d+ \| AP: (\d+)")
+MANA_LINE = re.compile(r"\*\*Mana:\*\* (\d+)")
+
+
+# --- SERVIDOR ---
+
+def start_server(port):
+    """Starts `streamlit run` on the app and waits until it answers its health check."""
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', APP_PATH, '--server.headless', 'true',
+         '--server.port', str(port), '--server.enableXsrfProtection', 'false',
+         '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"O servidor terminou ao arrancar (código {server.returncode}).")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("O servidor não respondeu em 60 s.")
+
+
+def process_cpu_seconds(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split() # O nome do processo pode ter espaços
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK') # utime + stime
+
+
+def process_memory_mb(pid):
+    with open(f'/proc/{pid}/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+# --- CLIENTE ---
+
+class Session:
+    """One browser tab: a websocket session and what the last script run rendered."""
+
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.websocket = None
+        self.widget_values = {} # id -> WidgetState dos widgets alterados pelo jogador (enviados em cada execução)
+
+    async def connect(self):
+        await self.close()
+        self.websocket = await websockets.connect(self.url, subprotocols=['streamlit'], max_size=None)
+        self.widget_values = {}
+        return await self.rerun()
+
+    async def close(self):
+        if self.websocket is not None:
+            await self.websocket.close()
+            self.websocket = None
+
+    async def rerun(self, trigger=None):
+        """Sends the widget states (plus a button trigger) and reads until the script run finishes."""
+        message = BackMsg()
+        message.rerun_script.query_string = ''
+        message.rerun_script.page_script_hash = ''
+        message.rerun_script.widget_states.widgets.extend(self.widget_values.values())
+        if trigger is not None:
+            message.rerun_script.widget_states.widgets.append(WidgetState(id=trigger, trigger_value=True))
+        await self.websocket.send(message.SerializeToString())
+
+        failed = False
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await asyncio.wait_for(self.websocket.recv(), self.timeout))
+            kind = msg.WhichOneof('type')
+            if kind == 'new_session': # Cada execução do script volta a enviar todos os elementos
+                self.buttons, self.markdown, self.selectbox = {}, [], None
+            elif kind == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+                element = msg.delta.new_element
+                element_type = element.WhichOneof('type')
+                if element_type == 'button':
+                    self.buttons[element.button.id.split('-', 2)[2]] = element.button # $$ID-<hash>-<key>
+                elif element_type == 'markdown':
+                    self.markdown.append(element.markdown.body)
+                elif element_type == 'selectbox':
+                    self.selectbox = element.selectbox
+                elif element_type == 'exception':
+                    failed = True
+            elif kind == 'script_finished' and msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return not failed
+
+    async def click(self, key):
+        return await self.rerun(self.buttons[key].id)
+
+    async def choose_card(self, card):
+        self.widget_values[self.selectbox.id] = WidgetState(id=self.selectbox.id, string_value=card)
+        return await self.rerun()
+
+    # --- Leitura da página ---
+
+    def game_over(self):
+        return any(button.label == "Reiniciar Jogo" for button in self.buttons.values())
+
+    def hexes_marked(self, *marks):
+        return [int(key[4:]) for key, button in self.buttons.items()
+                if key.startswith('hex_') and any(mark in button.help for mark in marks)]
+
+    def own_units(self):
+        """(cell, mv_remaining, ap_remaining) of the player's units, from the unit list."""
+        units = []
+        for body in self.markdown:
+            match = UNIT_LINE.match(body)
+            if match and match.group(2) != 'Arcane Core':
+                units.append((engine.parse_coord_label(match.group(3)), int(match.group(4)), int(match.group(5))))
+        return units
+
+    def mana(self):
+        return next((int(m.group(1)) for m in map(MANA_LINE.match, self.markdown) if m), 0)
+
+    def enemy_core(self):
+        return next((int(key[4:]) for key, button in self.buttons.items()
+                     if key.startswith('hex_') and '2N(' in button.label), None)
+
+
+def legal_interactions(session):
+    """
+    (kind, argument) pairs the player can do now: ('hex', coords), ('card', card name),
+    ('cancel', button key) or ('end', None).
+    """
+    if session.game_over():
+        return []
+    if 'cancel_invocation_button' in session.buttons:
+        valid = sorted(session.hexes_marked("(Invocação Válida)"))
+        return [('hex', coords) for coords in valid] or [('cancel', 'cancel_invocation_button')]
+    if 'cancel_selection_button' in session.buttons:
+        targets = sorted(session.hexes_marked("(Movimento Válido)", "(Alvo de Ataque Válido)"))
+        return [('hex', coords) for coords in targets] + [('cancel', 'cancel_selection_button')]
+
+    interactions = [('end', None)]
+    for coords, mv_remaining, ap_remaining in session.own_units():
+        if mv_remaining > 0 or ap_remaining > 0:
+            interactions.append(('hex', coords))
+    mana = session.mana()
+    for card in set(session.selectbox.options[1:]):
+        card_info = engine.CARD_DATA[card]
+        if card_info['type'] == 'invocation' and card_info['cost'] <= mana:
+            interactions.append(('card', card))
+    return interactions
+
+
+def scripted_choice(session, interactions, rng, acted):
+    """
+    Attacks first, then invocations, then moves towards the enemy core, then ends the turn.
+    `acted` holds the hexes of units already selected this turn.
+    """
+    enemy_core = session.enemy_core()
+
+    if 'cancel_selection_button' in session.buttons:
+        valid_attacks = set(session.hexes_marked("(Alvo de Ataque Válido)"))
+        attacks = [i for i in interactions if i[0] == 'hex' and i[1] in valid_attacks]
+        if attacks:
+            return rng.choice(attacks)
+        moves = [i for i in interactions if i[0] == 'hex']
+        if moves and enemy_core is not None:
+            return min(moves, key=lambda i: engine.calculate_distance(i[1], enemy_core))
+        return ('cancel', 'cancel_selection_button')
+    if 'cancel_invocation_button' in session.buttons:
+        return rng.choice(interactions)
+
+    cards = [i for i in interactions if i[0] == 'card']
+    if cards:
+        return rng.choice(cards)
+    units = [i for i in interactions if i[0] == 'hex' and i[1] not in acted]
+    if units:
+        return rng.choice(units)
+    return ('end', None)
+
+
+async def perform(session, interaction, acted):
+    kind, argument = interaction
+    if kind == 'hex':
+        if 'cancel_selection_button' not in session.buttons and 'cancel_invocation_button' not in session.buttons:
+            acted.add(argument) # A política scripted seleciona cada unidade uma vez por turno
+        return await session.click(f"hex_{argument}")
+    if kind == 'card':
+        return await session.choose_card(argument) and await session.click('activate_invocation_mode')
+    if kind == 'cancel':
+        return await session.click(argument)
+    acted.clear()
+    return await session.click('end_turn_button_bottom')
+
+
+async def run_player(url, args, seed, latencies, errors):
+    rng = random.Random(seed)
+    session = Session(url, args.timeout)
+    await session.connect()
+    acted = set()
+    done = 0
+    while done < args.interactions:
+        options = legal_interactions(session)
+        if not options: # Jogo terminado: nova sessão, como um novo jogador
+            await session.connect()
+            acted.clear()
+            continue
+        choice = rng.choice(options) if args.policy == 'random' else scripted_choice(session, options, rng, acted)
+        start = time.perf_counter()
+        try:
+            ok = await perform(session, choice, acted)
+        except Exception: # Qualquer falha conta como erro da interação; o jogador volta a ligar-se
+            ok = False
+            await session.connect()
+            acted.clear()
+        latencies.append(time.perf_counter() - start)
+        errors[0] += not ok
+        done += 1
+        if args.think_ms:
+            await asyncio.sleep(rng.uniform(0, 2 * args.think_ms / 1000))
+    await session.close()
+
+
+# --- RAMPA ---
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))]
+
+
+async def sample_memory(pid, peak, interval=0.25):
+    while True:
+        peak[0] = max(peak[0], process_memory_mb(pid))
+        await asyncio.sleep(interval)
+
+
+async def run_level(num_sessions, url, pid, args):
+    latencies, errors, peak_rss = [], [0], [process_memory_mb(pid)]
+    sampler = asyncio.create_task(sample_memory(pid, peak_rss))
+    server_cpu_start = process_cpu_seconds(pid)
+    client_start = resource.getrusage(resource.RUSAGE_SELF)
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(run_player(url, args, args.seed * 100003 + i, latencies, errors)
+                           for i in range(num_sessions)))
+    wall = time.perf_counter() - wall_start
+    server_cpu = process_cpu_seconds(pid) - server_cpu_start
+    client_end = resource.getrusage(resource.RUSAGE_SELF)
+    client_cpu = (client_end.ru_utime - client_start.ru_utime) + (client_end.ru_stime - client_start.ru_stime)
+    sampler.cancel()
+
+    latencies.sort()
+    return {
+        'sessions': num_sessions,
+        'p50': percentile(latencies, 50) * 1000,
+        'p95': percentile(latencies, 95) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+        'rate': len(latencies) / wall,
+        'cpu': 100 * server_cpu / wall,
+        'rss': peak_rss[0],
+        'client_cpu': 100 * client_cpu / wall,
+        'errors': errors[0],
+    }
+
+
+async def ramp(url, pid, args):
+    print(f"{'sessões':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'inter/s':>8} {'CPU %':>6} {'RSS MB':>7} "
+          f"{'cliente %':>10} {'erros':>6}")
+    for num_sessions in args.sessions:
+        r = await run_level(num_sessions, url, pid, args)
+        print(f"{r['sessions']:>8} {r['p50']:>8.0f} {r['p95']:>8.0f} {r['p99']:>8.0f} {r['rate']:>8.1f} "
+              f"{r['cpu']:>6.0f} {r['rss']:>7.0f} {r['client_cpu']:>10.0f} {r['errors']:>6}")
+        if r['p99'] > args.max_p99_ms:
+            print(f"p99 acima de {args.max_p99_ms:.0f} ms com {num_sessions} sessões.")
+            break
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 5, 10, 25, 50])
+    parser.add_argument('--interactions', type=int, default=20, help='interações por jogador em cada nível')
+    parser.add_argument('--policy', choices=['random', 'scripted'], default='random')
+    parser.add_argument('--think-ms', type=float, default=0, help='pausa média entre interações de um jogador')
+    parser.add_argument('--max-p99-ms', type=float, default=2000, help='para a rampa quando o p99 passa disto')
+    parser.add_argument('--timeout', type=float, default=120, help='segundos de espera por uma execução do script')
+    parser.add_argument('--port', type=int, default=8599)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_server(args.port)
+    try:
+        print(f"CPUs: {os.cpu_count()}; servidor pid {server.pid}; política {args.policy}; "
+              f"{args.interactions} interações por jogador")
+        asyncio.run(ramp(f"ws://127.0.0.1:{args.port}/_stcore/stream", server.pid, args))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()